@@ -0,0 +1,296 @@
+import json
+import mmap
+import os
+import threading
+from array import array
+from datetime import date, datetime
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; aggregation falls back to plain Python
+    np = None
+
+
+# Column name -> array typecode. Strings are dictionary-encoded into "i" codes.
+TABLES = {
+    "sessions": (("start_ts", "d"), ("end_ts", "d"), ("room", "i"), ("console", "i"), ("mode", "i"),
+                 ("gaming_cost", "d"), ("bar_cost", "d"), ("total_cost", "d")),
+    "bar_sales": (("ts", "d"), ("room", "i"), ("item", "i"), ("qty", "i"), ("amount", "d")),
+}
+
+# Which dictionary each encoded column uses
+ENCODED = {"room": "room", "console": "console", "mode": "mode", "item": "item"}
+
+
+class ColumnarStore:
+    # Append-only history of closed sessions and bar sales. Each day gets its
+    # own directory with one raw binary file per column, so a reader can mmap
+    # just the columns and days it needs. Rows are buffered in memory and
+    # appended to the column files on flush(). Once every column of a table is
+    # appended, the day's {table}.rows file records the committed row count;
+    # readers stop there, and the next flush cuts any longer column back to it
+    # before appending, so a flush torn part way never misaligns the rows.
+    def __init__(self, root_dir):
+        self.root_dir = root_dir
+        os.makedirs(root_dir, exist_ok=True)
+        self.lock = threading.Lock()
+        self.dictionary_path = os.path.join(root_dir, "dictionary.json")
+        if os.path.exists(self.dictionary_path):
+            with open(self.dictionary_path, "r", encoding="utf-8") as f:
+                self.values = json.load(f)
+        else:
+            self.values = {kind: [] for kind in set(ENCODED.values())}
+        self.codes = {kind: {value: i for i, value in enumerate(values)} for kind, values in self.values.items()}
+        self.dictionary_dirty = False
+        self.buffers = {}  # (day, table) -> {column: array}
+        self.committed = {}  # (day, table) -> committed rows, for the days flushed by this store
+
+    def encode(self, kind, value):
+        codes = self.codes[kind]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(self.values[kind])
+            self.values[kind].append(value)
+            self.dictionary_dirty = True
+        return code
+
+    def decode(self, kind, code):
+        return self.values[kind][code]
+
+    def _append(self, day, table, row):
+        with self.lock:
+            buffer = self.buffers.get((day, table))
+            if buffer is None:
+                buffer = self.buffers[(day, table)] = {name: array(code) for name, code in TABLES[table]}
+            for name, _ in TABLES[table]:
+                value = row[name]
+                if name in ENCODED:
+                    value = self.encode(ENCODED[name], value)
+                buffer[name].append(value)
+
+    def append_session(self, room, console, mode, start_time, end_time, gaming_cost, bar_cost, total_cost):
+        # Sessions are filed under the day they ended, like the EOD report
+        self._append(end_time.date().isoformat(), "sessions", {
+            "start_ts": start_time.timestamp(), "end_ts": end_time.timestamp(),
+            "room": room, "console": console, "mode": mode,
+            "gaming_cost": gaming_cost, "bar_cost": bar_cost, "total_cost": total_cost
+        })
+
+    def append_bar_sale(self, room, item, when, qty=1, amount=0):
+        self._append(when.date().isoformat(), "bar_sales", {
+            "ts": when.timestamp(), "room": room, "item": item, "qty": qty, "amount": amount
+        })
+
+    def flush(self):
+        with self.lock:
+            # The dictionary goes first so every code on disk can be decoded
+            if self.dictionary_dirty:
+                tmp_path = self.dictionary_path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(self.values, f)
+                os.replace(tmp_path, self.dictionary_path)
+                self.dictionary_dirty = False
+            buffers = self.buffers
+            self.buffers = {}
+
+        try:
+            while buffers:
+                (day, table), columns = next(iter(buffers.items()))
+                day_dir = os.path.join(self.root_dir, day)
+                os.makedirs(day_dir, exist_ok=True)
+                rows = self.committed.get((day, table))
+                if rows is None:
+                    rows = self.committed_rows(day, table)
+                for name, values in columns.items():
+                    with open(os.path.join(day_dir, f"{table}.{name}.col"), "ab") as f:
+                        f.truncate(rows * values.itemsize)
+                        values.tofile(f)
+                rows += len(values)
+                tmp_path = os.path.join(day_dir, f"{table}.rows.tmp")
+                with open(tmp_path, "w") as f:
+                    f.write(str(rows))
+                os.replace(tmp_path, os.path.join(day_dir, f"{table}.rows"))
+                self.committed[(day, table)] = rows
+                del buffers[(day, table)]
+        except OSError:
+            # Rows not written yet go back in front of any appended since, for the retry
+            with self.lock:
+                for key, columns in self.buffers.items():
+                    if key in buffers:
+                        for name, values in columns.items():
+                            buffers[key][name].extend(values)
+                    else:
+                        buffers[key] = columns
+                self.buffers = buffers
+            raise
+
+    def days(self, start=None, end=None):
+        # Day directories between start and end (inclusive), oldest first
+        start = start.isoformat() if isinstance(start, date) else start
+        end = end.isoformat() if isinstance(end, date) else end
+        names = sorted(d for d in os.listdir(self.root_dir) if os.path.isdir(os.path.join(self.root_dir, d)))
+        return [d for d in names if (start is None or d >= start) and (end is None or d <= end)]
+
+    def committed_rows(self, day, table):
+        # Rows of one day's table that every column holds; none until its first flush completes
+        try:
+            with open(os.path.join(self.root_dir, day, f"{table}.rows")) as f:
+                return int(f.read())
+        except FileNotFoundError:
+            return 0
+
+    def read_day(self, day, table, columns=None):
+        # Memory-maps one day's columns, up to the committed row count. A column
+        # can be longer after a flush that failed or was cut short part way.
+        typecodes = dict(TABLES[table])
+        columns = columns or list(typecodes)
+        maps = []
+        views = {}
+        for name in columns:
+            path = os.path.join(self.root_dir, day, f"{table}.{name}.col")
+            if not os.path.exists(path) or os.path.getsize(path) == 0:
+                for m in maps:
+                    m.close()
+                return None
+            with open(path, "rb") as f:
+                m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            maps.append(m)
+            view = memoryview(m)
+            size = array(typecodes[name]).itemsize
+            views[name] = view[:len(view) - len(view) % size].cast(typecodes[name])
+        rows = min([self.committed_rows(day, table)] + [len(v) for v in views.values()])
+        return DayColumns({name: view[:rows] for name, view in views.items()}, maps, rows)
+
+
+class DayColumns:
+    def __init__(self, columns, maps, rows):
+        self.columns = columns
+        self.maps = maps
+        self.rows = rows
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def close(self):
+        try:
+            for view in self.columns.values():
+                view.release()
+            for m in self.maps:
+                m.close()
+        except BufferError:
+            # A caller still holds a view (e.g. a numpy array); the map closes when it is collected
+            pass
+        self.columns = {}
+        self.maps = []
+
+
+class Analytics:
+    # Streaming aggregates over a ColumnarStore. Only one day's columns are
+    # mapped at a time, so memory stays flat however much history is scanned.
+    def __init__(self, store):
+        self.store = store
+
+    def _scan(self, table, columns, start, end):
+        for day in self.store.days(start, end):
+            data = self.store.read_day(day, table, columns)
+            if data is None:
+                continue
+            try:
+                yield day, data
+            finally:
+                data.close()
+
+    def _key_fn(self, by, day, data):
+        if by == "hour":
+            midnight = datetime.fromisoformat(day).timestamp()
+            ts_column = "ts" if "ts" in data.columns else "start_ts"
+            ts = data[ts_column]
+            return lambda i: int((ts[i] - midnight) // 3600) % 24
+        codes = data[by]
+        kind = ENCODED[by]
+        return lambda i: self.store.decode(kind, codes[i])
+
+    def revenue(self, by="room", start=None, end=None):
+        totals = {}
+        key_column = "start_ts" if by == "hour" else by
+        for day, data in self._scan("sessions", [key_column, "total_cost"], start, end):
+            cost = data["total_cost"]
+            if np is not None and by != "hour":
+                # bincount over the dictionary codes sums a whole day without a Python loop
+                codes = np.frombuffer(data[by], dtype=np.int32)
+                sums = np.bincount(codes, weights=np.frombuffer(cost, dtype=np.float64))
+                for code in np.nonzero(sums)[0].tolist():
+                    key = self.store.decode(ENCODED[by], code)
+                    totals[key] = totals.get(key, 0) + float(sums[code])
+                continue
+            key_of = self._key_fn(by, day, data)
+            for i in range(data.rows):
+                key = key_of(i)
+                totals[key] = totals.get(key, 0) + cost[i]
+        return totals
+
+    def average_duration(self, by="room", start=None, end=None):
+        # Mean session length in hours
+        sums = {}
+        counts = {}
+        key_column = "start_ts" if by == "hour" else by
+        columns = list(dict.fromkeys([key_column, "start_ts", "end_ts"]))
+        for day, data in self._scan("sessions", columns, start, end):
+            starts = data["start_ts"]
+            ends = data["end_ts"]
+            key_of = self._key_fn(by, day, data)
+            for i in range(data.rows):
+                key = key_of(i)
+                sums[key] = sums.get(key, 0) + (ends[i] - starts[i]) / 3600
+                counts[key] = counts.get(key, 0) + 1
+        return {key: sums[key] / counts[key] for key in sums}
+
+    def utilization(self, by="room", start=None, end=None, units=None):
+        # Share of the scanned days that rooms were occupied. For "console" pass
+        # units={console: room count} so the denominator covers every room.
+        occupied = {}
+        days = 0
+        key_column = "start_ts" if by == "hour" else by
+        columns = list(dict.fromkeys([key_column, "start_ts", "end_ts"]))
+        for day, data in self._scan("sessions", columns, start, end):
+            days += 1
+            starts = data["start_ts"]
+            ends = data["end_ts"]
+            if by == "hour":
+                midnight = datetime.fromisoformat(day).timestamp()
+                for i in range(data.rows):
+                    # Spread each session over the hour buckets it covers
+                    t = starts[i]
+                    while t < ends[i]:
+                        bucket_end = midnight + (int((t - midnight) // 3600) + 1) * 3600
+                        hour = int((t - midnight) // 3600) % 24
+                        occupied[hour] = occupied.get(hour, 0) + min(ends[i], bucket_end) - t
+                        t = bucket_end
+                continue
+            key_of = self._key_fn(by, day, data)
+            for i in range(data.rows):
+                key = key_of(i)
+                occupied[key] = occupied.get(key, 0) + ends[i] - starts[i]
+
+        if not days:
+            return {}
+        window = days * (3600 if by == "hour" else 86400)
+        units = units or {}
+        return {key: seconds / (window * units.get(key, 1)) for key, seconds in occupied.items()}
+
+    def bar_items(self, start=None, end=None):
+        # {item: (quantity, revenue)}
+        totals = {}
+        for day, data in self._scan("bar_sales", ["item", "qty", "amount"], start, end):
+            items = data["item"]
+            qty = data["qty"]
+            amount = data["amount"]
+            for i in range(data.rows):
+                name = self.store.decode("item", items[i])
+                q, a = totals.get(name, (0, 0))
+                totals[name] = (q + qty[i], a + amount[i])
+        return totals
+
+    def session_count(self, start=None, end=None):
+        return sum(data.rows for _, data in self._scan("sessions", ["end_ts"], start, end))
+
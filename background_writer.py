@@ -0,0 +1,109 @@
+import os
+import queue
+import threading
+
+
+class BackgroundWriter:
+    # Runs file writes and other disk jobs on a worker thread so the Tk loop
+    # never blocks on I/O. Jobs are keyed: submitting a job whose key is still
+    # waiting replaces it (e.g. the same report saved twice only writes once).
+    # Results are handed back to the GUI thread by polling with root.after.
+    def __init__(self, root, on_done, on_error, maxsize=64, retries=3, retry_delay=0.5, poll_ms=100):
+        self.root = root
+        self.on_done = on_done
+        self.on_error = on_error
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.poll_ms = poll_ms
+
+        self.keys = queue.Queue(maxsize=maxsize)
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.results = queue.SimpleQueue()
+        self.closing = threading.Event()
+        self.discarding = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="background-writer", daemon=True)
+        self.thread.start()
+        self.root.after(self.poll_ms, self._poll)
+
+    def write_file(self, path, content, message=None, mode="w"):
+        def write():
+            tmp_path = path + ".tmp"
+            with open(tmp_path, mode) as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        return self.submit(("file", path), write, message, f"Failed to save {os.path.basename(path)}")
+
+    def submit(self, key, job, message=None, error_message=None, timeout=1.0):
+        with self.lock:
+            if key in self.pending:
+                # Coalesce with the job still waiting in the queue
+                self.pending[key] = (job, message, error_message)
+                return True
+            self.pending[key] = (job, message, error_message)
+        try:
+            # Bounded queue: if the disk has fallen far behind, push back briefly rather than grow
+            # forever; timeout=0 refuses at once
+            self.keys.put(key, timeout > 0, timeout if timeout > 0 else None)
+        except queue.Full:
+            with self.lock:
+                del self.pending[key]
+            self.on_error(error_message or "Background writer is busy")
+            return False
+        return True
+
+    def close(self, timeout=10.0, discard=False):
+        # Waits up to `timeout` for queued jobs to finish; discard=True drops the
+        # ones not started yet and stops retrying the current one
+        if discard:
+            self.discarding.set()
+            with self.lock:
+                self.pending.clear()
+        self.closing.set()
+        try:
+            self.keys.put_nowait(None)
+        except queue.Full:
+            pass  # the worker stops by itself once the queue is empty
+        self.thread.join(timeout)
+        self._drain()
+
+    def _run(self):
+        while not (self.closing.is_set() and self.keys.empty()):
+            key = self.keys.get()
+            if key is None:
+                return
+            with self.lock:
+                entry = self.pending.pop(key, None)
+            if entry is None:
+                continue  # dropped by close(discard=True)
+            job, message, error_message = entry
+
+            for attempt in range(self.retries):
+                try:
+                    job()
+                except Exception as e:
+                    if attempt + 1 == self.retries:
+                        self.results.put((False, f"{error_message or 'Background write failed'}: {e}"))
+                    elif self.discarding.wait(self.retry_delay * (2 ** attempt)):
+                        break
+                else:
+                    if message:
+                        self.results.put((True, message))
+                    break
+
+    def _drain(self):
+        while True:
+            try:
+                ok, message = self.results.get_nowait()
+            except queue.Empty:
+                return
+            if ok:
+                self.on_done(message)
+            else:
+                self.on_error(message)
+
+    def _poll(self):
+        self._drain()
+        self.root.after(self.poll_ms, self._poll)
@@ -0,0 +1,63 @@
+import json
+import os
+
+
+class StockError(Exception):
+    pass
+
+
+class BarCatalog:
+    # Bar items with their own price and an optional stock count. Items with no
+    # stock entry are not tracked and never run out.
+    def __init__(self, items, default_price=50, stock_path=None):
+        self.items = {item["name"]: item for item in items}
+        self.prices = {item["name"]: item.get("price", default_price) for item in items}
+        self.stock = {item["name"]: item["stock"] for item in items if item.get("stock") is not None}
+        self.stock_path = None
+        if stock_path:
+            self.load_stock(stock_path)
+
+    def load_stock(self, stock_path):
+        # Saved counts override the defaults from the item list
+        self.stock_path = stock_path
+        if os.path.exists(stock_path):
+            with open(stock_path, "r", encoding="utf-8") as f:
+                self.stock.update(json.load(f))
+
+    def price(self, name):
+        return self.prices[name]
+
+    def in_stock(self, name, qty=1):
+        left = self.stock.get(name)
+        return left is None or left >= qty
+
+    def take(self, name, qty=1):
+        if name not in self.prices:
+            raise StockError(f"{name} is not on the bar menu")
+        left = self.stock.get(name)
+        if left is not None:
+            if left < qty:
+                raise StockError(f"{name} is out of stock")
+            self.stock[name] = left - qty
+
+    def restock(self, name, qty):
+        self.stock[name] = self.stock.get(name, 0) + qty
+
+    def total(self, counts):
+        # counts is a session's {item: quantity}
+        return sum(self.prices.get(name, 0) * qty for name, qty in counts.items())
+
+    def save_stock(self, stock=None):
+        # Pass a copy of self.stock when saving from another thread
+        if not self.stock_path:
+            return
+        tmp_path = self.stock_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.stock if stock is None else stock, f)
+        os.replace(tmp_path, self.stock_path)
+
+
+def format_bar_items(items):
+    # Receipts store {item: quantity}
+    return ", ".join(f"{name} x{qty}" for name, qty in items.items())
+
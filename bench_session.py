@@ -0,0 +1,298 @@
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+import dialogs
+from headless import create_app, room_layout
+
+
+OPERATIONS = ("start_session", "add_bar_item", "end_session", "print_receipt", "end_of_day")
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baselines.json")
+
+
+class Bench:
+    # Drives one headless app through the session lifecycle at a fixed occupancy
+    def __init__(self, rooms, occupancy, seed=1):
+        self.app, _ = create_app(rooms=room_layout(rooms))
+        self.random = random.Random(seed)
+        self.items = [item["name"] for item in self.app.bar_items]
+        target = int(rooms * occupancy)
+        for name in list(self.app.rooms)[:target]:
+            self._start(name)
+        self.app.writer.run_pending()
+
+    def _start(self, name):
+        app = self.app
+        app.console_type.set(app.rooms[name].type)
+        app.update_room_dropdown()
+        app.room_var.set(name)
+        app.player_name.set("Bench Player")
+        app.contact_number.set("01000000000")
+        app.start_session()
+
+    def _end(self, name):
+        self.app.current_room = name
+        self.app.end_session()
+
+    def _occupied(self):
+        return self.random.choice(self.app.engine.occupied_rooms())
+
+    def _free(self):
+        console = self.random.choice(self.app.engine.consoles())
+        return self.app.engine.first_available(console) or self.app.engine.first_available(
+            "PS5" if console == "PS4" else "PS4")
+
+    def step(self, op):
+        # Returns a callable performing one `op`, plus a callable restoring the occupancy level
+        engine = self.app.engine
+        if op == "start_session":
+            name = self._free()
+            if name is None:
+                # Full floor: free one room off the clock first
+                name = self._occupied()
+                self._end(name)
+            return (lambda: self._start(name)), (lambda: self._end(name))
+        if op == "end_session":
+            if not engine.has_active_sessions():
+                name = self._free()
+                self._start(name)
+            else:
+                name = self._occupied()
+            return (lambda: self._end(name)), (lambda: self._start(name))
+        if op == "add_bar_item":
+            if not engine.has_active_sessions():
+                return None, None
+            name = self._occupied()
+            item = self.random.choice(self.items)
+            return (lambda: self.app.add_bar_item_to(name, item)), None
+        if op == "print_receipt":
+            recent = self.app.ledger.recent(1)
+            if not recent:
+                name = self._occupied() if engine.has_active_sessions() else self._free()
+                if engine.rooms[name].status == 0:
+                    self._start(name)
+                self._end(name)
+                self._start(name)
+                recent = self.app.ledger.recent(1)
+            # Without its id the receipt is formatted again rather than reprinted from the archive
+            receipt = dict(recent[0], id=None)
+
+            def print_one():
+                self.app.receipt_info = receipt
+                self.app.print_receipt()
+            return print_one, None
+        if op == "end_of_day":
+            return self.app.end_of_day, None
+        raise ValueError(op)
+
+
+def percentile(samples, q):
+    return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+def run_reference(iterations=50):
+    # p50 in us of a fixed pure-Python workload (sort, dict building, JSON) timed in the
+    # same run. Baselines keep every p50 as a multiple of it, so a baseline saved on one
+    # machine can be compared on another that is uniformly faster or slower.
+    rng = random.Random(0)
+    rows = [{"room": f"PS{rng.randint(4, 5)}-{i}", "total": rng.random() * 500} for i in range(2000)]
+    timings = []
+    for _ in range(iterations):
+        gc.collect()
+        started = time.perf_counter_ns()
+        by_room = {row["room"]: row for row in sorted(rows, key=lambda row: row["total"])}
+        json.loads(json.dumps(by_room))
+        timings.append(time.perf_counter_ns() - started)
+    timings.sort()
+    return percentile(timings, 0.50) / 1000
+
+
+def run_case(rooms, occupancy, iterations, eod_iterations, alloc_iterations, reference_us):
+    bench = Bench(rooms, occupancy)
+    results = {}
+    for op in OPERATIONS:
+        count = eod_iterations if op == "end_of_day" else iterations
+        timings = []
+        allocated = []
+        for i in range(count + alloc_iterations):
+            action, undo = bench.step(op)
+            if action is None:
+                break
+            measure_alloc = i >= count
+            gc.collect()
+            if measure_alloc:
+                tracemalloc.start()
+                before = tracemalloc.get_traced_memory()[0]
+                action()
+                after = tracemalloc.get_traced_memory()[0]
+                tracemalloc.stop()
+                allocated.append(after - before)
+            else:
+                started = time.perf_counter_ns()
+                action()
+                timings.append(time.perf_counter_ns() - started)
+            if undo is not None:
+                undo()
+            # Background jobs run off the clock, as they would on the writer thread
+            bench.app.writer.run_pending()
+        if not timings:
+            continue
+        timings.sort()
+        results[op] = {
+            "n": len(timings),
+            "p50_us": percentile(timings, 0.50) / 1000,
+            "p50_ref": percentile(timings, 0.50) / 1000 / reference_us,
+            "p95_us": percentile(timings, 0.95) / 1000,
+            "p99_us": percentile(timings, 0.99) / 1000,
+            "max_us": timings[-1] / 1000,
+            "alloc_bytes": sum(allocated) / len(allocated) if allocated else 0,
+        }
+    return results
+
+
+
+class TkCounter:
+    # Stands in for tkinter and ttk inside dialogs.py: counts the Tk objects a
+    # picker creates and the Tk calls it makes, without needing a display
+    def __init__(self):
+        self.objects = 0
+        self.calls = 0
+        counter = self
+
+        class Widget:
+            def __init__(self, *args, **kwargs):
+                counter.objects += 1
+                counter.calls += 1
+
+            def __getattr__(self, name):
+                def call(*args, **kwargs):
+                    counter.calls += 1
+                return call
+
+            def __setitem__(self, key, value):
+                counter.calls += 1
+
+        self.Toplevel = self.Label = self.Button = self.StringVar = self.Combobox = Widget
+
+
+def run_picker_case(rooms, iterations):
+    # One click on "End Session": a picker built and destroyed every time, as
+    # before the DialogPool, against the pooled picker shown and withdrawn.
+    # Python-side time only; the cost of the widgets in Tk itself is not included.
+    values = list(room_layout(rooms))
+
+    def fresh():
+        picker = dialogs.PickerDialog(None, "End Session", "#ff4444", "white")
+        picker.show("Select room to end session:", values, "End Session", print)
+        picker.window.destroy()
+
+    pool = dialogs.DialogPool(None)
+
+    def pooled():
+        picker = pool.picker("end_session", "End Session", "#ff4444")
+        picker.show("Select room to end session:", values, "End Session", print)
+        picker.hide()
+
+    counter = TkCounter()
+    saved = dialogs.tk, dialogs.ttk
+    dialogs.tk = dialogs.ttk = counter
+    results = {}
+    try:
+        for name, action in (("fresh", fresh), ("pooled", pooled)):
+            # The first click builds the pooled picker; later clicks are what is measured
+            action()
+            counter.objects = counter.calls = 0
+            timings = []
+            for _ in range(iterations):
+                started = time.perf_counter_ns()
+                action()
+                timings.append(time.perf_counter_ns() - started)
+            timings.sort()
+            results[name] = {
+                "n": iterations,
+                "p50_us": percentile(timings, 0.50) / 1000,
+                "objects": counter.objects / iterations,
+                "tk_calls": counter.calls / iterations,
+            }
+    finally:
+        dialogs.tk, dialogs.ttk = saved
+    return results
+
+
+def compare(results, baseline, threshold):
+    # Compares p50s as multiples of the reference workload. Baselines saved before the
+    # reference existed hold absolute timings from whichever machine saved them, so
+    # those are only reported, never counted as regressions.
+    regressions = []
+    for case, ops in results.items():
+        for op, stats in ops.items():
+            base = baseline.get(case, {}).get(op)
+            if not base:
+                continue
+            if "p50_ref" in base:
+                ratio = stats["p50_ref"] / base["p50_ref"] if base["p50_ref"] else 1.0
+                marker = "  REGRESSION" if ratio > threshold else ""
+                print(f"{case:<24}{op:<16}{base['p50_ref']:>9.2f}r -> {stats['p50_ref']:>9.2f}r"
+                      f"  x{ratio:.2f}{marker}")
+            else:
+                ratio = stats["p50_us"] / base["p50_us"] if base["p50_us"] else 1.0
+                marker = ""
+                print(f"{case:<24}{op:<16}{base['p50_us']:>10.1f} -> {stats['p50_us']:>10.1f} us  x{ratio:.2f}"
+                      f"  (absolute baseline, not checked)")
+            if marker:
+                regressions.append((case, op, ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless latency benchmarks for the session lifecycle")
+    parser.add_argument("--rooms", type=int, nargs="+", default=[6, 100, 1000, 10000])
+    parser.add_argument("--occupancy", type=float, nargs="+", default=[0.0, 0.5, 1.0])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--eod-iterations", type=int, default=10)
+    parser.add_argument("--alloc-iterations", type=int, default=20)
+    parser.add_argument("--picker-iterations", type=int, default=100, help="Room picker clicks; 0 skips them")
+    parser.add_argument("--save", nargs="?", const=DEFAULT_BASELINE, help="Write results as the new baseline")
+    parser.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE, help="Compare p50 against a baseline")
+    parser.add_argument("--threshold", type=float, default=1.5,
+                        help="Ratio of reference-relative p50s counted as a regression")
+    args = parser.parse_args()
+
+    results = {}
+    reference_us = run_reference()
+    print(f"Reference workload p50: {reference_us:.1f} us (r below is a multiple of it)")
+    print(f"{'case':<24}{'operation':<16}{'p50 us':>10}{'p95 us':>10}{'p99 us':>10}{'alloc B':>10}")
+    for rooms in args.rooms:
+        for occupancy in args.occupancy:
+            case = f"rooms={rooms} occ={occupancy:g}"
+            results[case] = run_case(rooms, occupancy, args.iterations, args.eod_iterations, args.alloc_iterations,
+                                     reference_us)
+            for op, stats in results[case].items():
+                print(f"{case:<24}{op:<16}{stats['p50_us']:>10.1f}{stats['p95_us']:>10.1f}"
+                      f"{stats['p99_us']:>10.1f}{stats['alloc_bytes']:>10.0f}")
+
+    if args.picker_iterations:
+        print(f"{'case':<24}{'picker':<16}{'p50 us':>10}{'objects':>10}{'Tk calls':>10}")
+        for rooms in args.rooms:
+            for name, stats in run_picker_case(rooms, args.picker_iterations).items():
+                print(f"{f'rooms={rooms}':<24}{name:<16}{stats['p50_us']:>10.1f}{stats['objects']:>10.1f}"
+                      f"{stats['tk_calls']:>10.1f}")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Baseline saved to {args.save}")
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; batch pricing falls back to plain Python
+    np = None
+
+
+# Hourly rate in EGP keyed by (console, game mode)
+DEFAULT_TARIFFS = {
+    ("PS4", "Single"): 100,
+    ("PS4", "Multi"): 120,
+    ("PS5", "Single"): 150,
+    ("PS5", "Multi"): 180,
+}
+
+
+class BillingEngine:
+    def __init__(self, tariffs=None, catalog=None, rules=None):
+        # catalog is a BarCatalog; without one bar items are free.
+        # rules is a pricing_rules.RateTable; without one every hour costs the flat tariff.
+        self.catalog = catalog
+        self.rules = rules
+        self.set_tariffs(tariffs or DEFAULT_TARIFFS)
+    
+    def set_rules(self, rules):
+        self.rules = rules
+
+    def set_tariffs(self, tariffs):
+        self.tariffs = dict(tariffs)
+        # Dense (console, mode) -> index table so batches can look rates up with one take()
+        self.consoles = sorted({console for console, _ in self.tariffs})
+        self.modes = sorted({mode for _, mode in self.tariffs})
+        self.console_index = {console: i for i, console in enumerate(self.consoles)}
+        self.mode_index = {mode: i for i, mode in enumerate(self.modes)}
+        self.rate_table = [[self.tariffs.get((console, mode), 0) for mode in self.modes]
+                           for console in self.consoles]
+
+    def rate(self, console, mode):
+        try:
+            return self.tariffs[(console, mode)]
+        except KeyError:
+            raise ValueError(f"No tariff for {console} {mode}")
+
+    def bar_cost(self, bar_items):
+        return self.catalog.total(bar_items) if self.catalog is not None else 0
+
+    def price(self, console, mode, start_time, end_time, bar_items):
+        duration = (end_time - start_time).total_seconds() / 3600  # in hours
+        rate = self.rate(console, mode)
+        segments = []
+        if self.rules is None:
+            gaming_cost = round(duration * rate, 2)
+        else:
+            # Each stretch under a different rule is priced on its own and listed on the receipt
+            for label, start, end, segment_rate in self.rules.segments(console, mode, start_time, end_time, rate):
+                hours = (end - start).total_seconds() / 3600
+                segments.append({
+                    "label": label,
+                    "start": start.strftime("%Y-%m-%d %H:%M:%S"),
+                    "end": end.strftime("%Y-%m-%d %H:%M:%S"),
+                    "hours": round(hours, 4),
+                    "rate": segment_rate,
+                    "cost": round(hours * segment_rate, 2)
+                })
+            gaming_cost = round(sum(segment["cost"] for segment in segments), 2)
+        bar_items_cost = self.bar_cost(bar_items)
+        return {
+            "duration_hours": duration,
+            "hourly_rate": rate,
+            "gaming_cost": gaming_cost,
+            "bar_items_cost": bar_items_cost,
+            "total_cost": gaming_cost + bar_items_cost,
+            "segments": segments
+        }
+
+    def price_batch(self, rooms, now):
+        # Prices every given active room as of `now` in one pass.
+        # Returns {room name: (gaming_cost, bar_items_cost, total_cost)}.
+        if not rooms:
+            return {}
+        if self.rules is not None:
+            # Rule-based prices depend on where each session falls in the week
+            totals = {}
+            for room in rooms:
+                cost = self.price(room.type, room.mode, room.start_time, now, room.bar_items)
+                totals[room.name] = (cost["gaming_cost"], cost["bar_items_cost"], cost["total_cost"])
+            return totals
+        names = [room.name for room in rooms]
+        elapsed = [(now - room.start_time).total_seconds() for room in rooms]
+        console_idx = [self.console_index[room.type] for room in rooms]
+        mode_idx = [self.mode_index[room.mode] for room in rooms]
+        bar_costs = [self.bar_cost(room.bar_items) for room in rooms]
+
+        if np is None:
+            totals = {}
+            for name, seconds, c, m, bar_items_cost in zip(names, elapsed, console_idx, mode_idx, bar_costs):
+                gaming_cost = round(seconds / 3600 * self.rate_table[c][m], 2)
+                totals[name] = (gaming_cost, bar_items_cost, gaming_cost + bar_items_cost)
+            return totals
+
+        rates = np.asarray(self.rate_table, dtype=np.float64)[np.asarray(console_idx), np.asarray(mode_idx)]
+        gaming = np.round(np.asarray(elapsed) / 3600 * rates, 2)
+        bar = np.asarray(bar_costs, dtype=np.float64)
+        total = gaming + bar
+        return {name: (float(g), float(b), float(t))
+                for name, g, b, t in zip(names, gaming.tolist(), bar.tolist(), total.tolist())}
+
+    def running_total(self, rooms, now):
+        return sum(total for _, _, total in self.price_batch(rooms, now).values())
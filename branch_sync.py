@@ -0,0 +1,305 @@
+import argparse
+import json
+import secrets
+import sqlite3
+import threading
+import urllib.request
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+DEFAULT_SYNC_PORT = 8780
+
+# Upload protocol: POST /batches with a zlib-compressed JSON body
+#   {"branch": "downtown", "epoch": "9f2c...", "batch": "downtown:9f2c...:41-540",
+#    "records": [{"seq": 41, "kind": "session", "data": {...}}, ...]}
+# The aggregator answers {"acked": 540}: everything up to that seq is stored.
+# Records are keyed by (branch, epoch, seq), so a batch resent after a lost
+# answer is stored only once. The epoch is a random id chosen when an outbox
+# is created; a branch whose outbox.db was deleted starts again at seq 1
+# under a new epoch instead of colliding with what it uploaded before.
+
+
+class Outbox:
+    # Closed sessions, bar sales and day totals waiting to be uploaded, kept in
+    # SQLite so they survive restarts and long stretches offline. Sequence
+    # numbers only ever grow (AUTOINCREMENT), so "everything after the last
+    # acknowledged seq" is exactly what the aggregator has not seen. Records
+    # are deleted once acknowledged; nothing is held in memory beyond the
+    # buffer of adds waiting for flush(), which the owner schedules.
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.RLock()
+        self.buffer = []
+
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS outbox (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                data TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+        """)
+        self.conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('epoch', ?)", (secrets.token_hex(8),))
+        self.conn.commit()
+        self.epoch = self.conn.execute("SELECT value FROM meta WHERE key = 'epoch'").fetchone()[0]
+
+    def __len__(self):
+        with self.lock:
+            self.flush()
+            return self.conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def add(self, kind, data):
+        # kind is "session", "bar" or "eod"; data must be JSON-serializable
+        with self.lock:
+            self.buffer.append((kind, json.dumps(data, separators=(",", ":"))))
+
+    def flush(self):
+        with self.lock:
+            if not self.buffer:
+                return
+            with self.conn:
+                self.conn.executemany("INSERT INTO outbox (kind, data) VALUES (?, ?)", self.buffer)
+            # Only dropped once committed, so a failed flush is retried with the same records
+            self.buffer = []
+
+    def pending(self, limit):
+        # The oldest `limit` records not yet acknowledged, as (seq, kind, data text)
+        with self.lock:
+            self.flush()
+            return self.conn.execute("SELECT seq, kind, data FROM outbox ORDER BY seq LIMIT ?", (limit,)).fetchall()
+
+    def ack(self, seq):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM outbox WHERE seq <= ?", (seq,))
+
+    def close(self):
+        with self.lock:
+            self.flush()
+            self.conn.close()
+
+
+def batch_id(branch, epoch, rows):
+    return f"{branch}:{epoch}:{rows[0][0]}-{rows[-1][0]}"
+
+
+def encode_batch(branch, epoch, rows):
+    # rows from Outbox.pending(); the record data is spliced in as already-encoded JSON
+    records = ",".join(f'{{"seq":{seq},"kind":{json.dumps(kind)},"data":{data}}}' for seq, kind, data in rows)
+    body = (f'{{"branch":{json.dumps(branch)},"epoch":{json.dumps(epoch)},'
+            f'"batch":{json.dumps(batch_id(branch, epoch, rows))},"records":[{records}]}}')
+    return zlib.compress(body.encode("utf-8"), 6)
+
+
+class SyncAgent:
+    # Uploads the outbox to the aggregator from a worker thread, one batch at a
+    # time, oldest first. While the link is down it waits with exponential
+    # backoff and tries again; a batch only leaves the outbox once the
+    # aggregator acknowledges it. The GUI reads `status` (a short text that
+    # changes when something happens) from its tick rather than being called
+    # back from this thread.
+    def __init__(self, outbox, url, branch, batch_size=500, interval=30.0, max_backoff=600.0, timeout=10.0):
+        self.outbox = outbox
+        self.url = url.rstrip("/") + "/batches"
+        self.branch = branch
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.status = "Sync waiting"
+        self.uploaded = 0
+        self.wake = threading.Event()
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="branch-sync", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def nudge(self):
+        # Upload now instead of at the next interval, e.g. after end of day
+        self.wake.set()
+
+    def stop(self, timeout=5.0):
+        self.stopping.set()
+        self.wake.set()
+        self.thread.join(timeout)
+
+    def upload(self, rows):
+        epoch = self.outbox.epoch
+        headers = {
+            "Content-Type": "application/json",
+            "Content-Encoding": "deflate",
+            "Idempotency-Key": batch_id(self.branch, epoch, rows),
+        }
+        request = urllib.request.Request(self.url, data=encode_batch(self.branch, epoch, rows), method="POST",
+                                         headers=headers)
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read())["acked"]
+
+    def sync_once(self):
+        # Uploads until the outbox is empty; returns how many records were acknowledged
+        sent = 0
+        while not self.stopping.is_set():
+            rows = self.outbox.pending(self.batch_size)
+            if not rows:
+                break
+            acked = self.upload(rows)
+            self.outbox.ack(acked)
+            count = sum(1 for row in rows if row[0] <= acked)
+            sent += count
+            self.uploaded += count
+            if acked < rows[-1][0]:
+                break  # the aggregator took part of the batch; the rest goes next time
+        return sent
+
+    def _run(self):
+        backoff = self.interval
+        while not self.stopping.is_set():
+            try:
+                sent = self.sync_once()
+            except (OSError, ValueError, KeyError) as e:
+                # urllib errors are OSErrors; a garbled answer is a ValueError or KeyError
+                self.status = f"Sync offline, retrying in {int(backoff)}s ({e})"
+                delay = backoff
+                backoff = min(backoff * 2, self.max_backoff)
+            else:
+                if sent:
+                    self.status = f"Synced {sent} records to head office"
+                backoff = self.interval
+                delay = self.interval
+            self.wake.wait(delay)
+            self.wake.clear()
+
+
+class Aggregator:
+    # Central store the branches upload to; everything is kept per branch
+    def __init__(self, path):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS records (
+                branch TEXT NOT NULL,
+                epoch TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                kind TEXT NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (branch, epoch, seq)
+            );
+            CREATE TABLE IF NOT EXISTS batches (
+                batch TEXT PRIMARY KEY,
+                received TEXT NOT NULL
+            );
+        """)
+        self.conn.commit()
+
+    def store(self, batch):
+        # Returns the highest seq now stored for the batch
+        rows = [(batch["branch"], batch["epoch"], record["seq"], record["kind"],
+                 json.dumps(record["data"], separators=(",", ":"))) for record in batch["records"]]
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO records (branch, epoch, seq, kind, data) VALUES (?, ?, ?, ?, ?)", rows)
+            self.conn.execute("INSERT OR IGNORE INTO batches (batch, received) VALUES (?, datetime('now'))",
+                              (batch["batch"],))
+        return max(record["seq"] for record in batch["records"])
+
+    def summary(self):
+        # {branch: {"sessions": n, "revenue": EGP, "bar_sales": n}}
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT branch, kind, COUNT(*), COALESCE(SUM(json_extract(data, '$.total_cost')), 0) "
+                "FROM records GROUP BY branch, kind").fetchall()
+        summary = {}
+        for branch, kind, count, total in rows:
+            figures = summary.setdefault(branch, {"sessions": 0, "revenue": 0.0, "bar_sales": 0})
+            if kind == "session":
+                figures["sessions"] = count
+                figures["revenue"] = round(total, 2)
+            elif kind == "bar":
+                figures["bar_sales"] = count
+        return summary
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class AggregatorHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        if self.path != "/batches":
+            self.send_error(404)
+            return
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        try:
+            if self.headers.get("Content-Encoding") == "deflate":
+                body = zlib.decompress(body)
+            batch = json.loads(body)
+            acked = self.server.aggregator.store(batch)
+        except (zlib.error, ValueError, KeyError, TypeError) as e:
+            self.send_error(400, str(e))
+            return
+        self._reply({"acked": acked})
+
+    def do_GET(self):
+        if self.path != "/summary":
+            self.send_error(404)
+            return
+        self._reply(self.server.aggregator.summary())
+
+    def _reply(self, message):
+        data = json.dumps(message).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_aggregator_server(host, port, path):
+    # A stand-in head office; port 0 picks a free port (see server.server_port)
+    server = ThreadingHTTPServer((host, port), AggregatorHandler)
+    server.aggregator = Aggregator(path)
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Head-office aggregator for branch uploads")
+    parser.add_argument("command", choices=["serve", "summary", "pending"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_SYNC_PORT)
+    parser.add_argument("--db", default="head_office.db", help="Aggregator database (serve, summary)")
+    parser.add_argument("--outbox", default="outbox.db", help="A branch outbox (pending)")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        server = make_aggregator_server(args.host, args.port, args.db)
+        print(f"Aggregator listening on {args.host}:{server.server_port}, storing to {args.db}")
+        try:
+            server.serve_forever()
+        finally:
+            server.aggregator.close()
+    elif args.command == "summary":
+        aggregator = Aggregator(args.db)
+        for branch, figures in sorted(aggregator.summary().items()):
+            print(f"{branch:<20}{figures['sessions']:>8} sessions{figures['revenue']:>14.2f} EGP"
+                  f"{figures['bar_sales']:>8} bar sales")
+        aggregator.close()
+    else:
+        outbox = Outbox(args.outbox)
+        print(f"{len(outbox)} records waiting to upload")
+        outbox.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+from datetime import datetime, timedelta
+
+
+class SystemClock:
+    def now(self):
+        return datetime.now()
+
+
+class SimulatedClock:
+    # Clock that only moves when told to, for simulations and replays
+    def __init__(self, start=None):
+        self.current = start or datetime(2025, 1, 1)
+
+    def now(self):
+        return self.current
+
+    def set(self, when):
+        if when < self.current:
+            raise ValueError("Simulated time cannot move backwards")
+        self.current = when
+
+    def advance(self, seconds):
+        self.current += timedelta(seconds=seconds)
+        return self.current
@@ -0,0 +1,164 @@
+import bisect
+import sqlite3
+import threading
+
+
+def normalize_phone(contact):
+    # Digits only, with the +20 / 0020 country code folded into the local 0 prefix
+    digits = "".join(ch for ch in str(contact) if ch.isdigit())
+    if digits.startswith("0020"):
+        digits = "0" + digits[4:]
+    elif digits.startswith("20") and len(digits) == 12:
+        digits = "0" + digits[2:]
+    return digits
+
+
+def name_keys(name):
+    # The whole name plus each later word, so "moh" finds "Omar Mohamed"
+    words = name.casefold().split()
+    return [" ".join(words[i:]) for i in range(len(words))]
+
+
+class Customer:
+    __slots__ = ("phone", "name", "visits", "spend", "last_visit", "last_receipt")
+
+    def __init__(self, phone, name, visits=0, spend=0.0, last_visit=None, last_receipt=0):
+        self.phone = phone
+        self.name = name
+        self.visits = visits
+        self.spend = spend
+        self.last_visit = last_visit
+        self.last_receipt = last_receipt
+
+
+class CustomerIndex:
+    # Every customer seen at the desk, keyed by normalized phone number. All of
+    # them are held in memory with two sorted key lists (phone numbers and name
+    # words) so a prefix lookup is one bisect plus a short scan. Visit counts and
+    # spend are updated per receipt rather than summed from the ledger on demand.
+    # Changes are written to SQLite by flush(), which the owner schedules.
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.RLock()
+        self.dirty = set()
+
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS customers (
+                phone TEXT PRIMARY KEY,
+                name TEXT,
+                visits INTEGER,
+                spend REAL,
+                last_visit TEXT,
+                last_receipt INTEGER
+            )
+        """)
+        self.conn.commit()
+
+        self.customers = {row[0]: Customer(*row) for row in self.conn.execute(
+            "SELECT phone, name, visits, spend, last_visit, last_receipt FROM customers")}
+        self.phones = sorted(self.customers)
+        self.names = sorted((key, c.phone) for c in self.customers.values() for key in name_keys(c.name))
+
+    def __len__(self):
+        return len(self.customers)
+
+    def get(self, contact):
+        return self.customers.get(normalize_phone(contact))
+
+    def record_visit(self, receipt):
+        # Receipt ids only grow, so a receipt replayed from the journal is counted once
+        phone = normalize_phone(receipt["contact"])
+        if not phone:
+            return None
+        with self.lock:
+            customer = self.customers.get(phone)
+            if customer is None:
+                customer = self.customers[phone] = Customer(phone, receipt["player"])
+                bisect.insort(self.phones, phone)
+                self._index_name(customer)
+            elif receipt["id"] <= customer.last_receipt:
+                return customer
+            elif receipt["player"] and receipt["player"] != customer.name:
+                # The latest name given for a number wins
+                self._unindex_name(customer)
+                customer.name = receipt["player"]
+                self._index_name(customer)
+            customer.visits += 1
+            customer.spend = round(customer.spend + receipt["total_cost"], 2)
+            customer.last_visit = receipt["end_time"]
+            customer.last_receipt = receipt["id"]
+            self.dirty.add(phone)
+            return customer
+
+    def rebuild(self, totals):
+        # totals: (contact, player, visits, spend, last_visit, last_receipt) rows
+        # from ReceiptLedger.customer_totals(), used to seed an empty index
+        with self.lock:
+            for contact, player, visits, spend, last_visit, last_receipt in totals:
+                phone = normalize_phone(contact)
+                if not phone:
+                    continue
+                customer = self.customers.get(phone)
+                if customer is None:
+                    customer = self.customers[phone] = Customer(phone, player)
+                elif last_receipt > customer.last_receipt:
+                    customer.name = player
+                customer.visits += visits
+                customer.spend = round(customer.spend + spend, 2)
+                customer.last_visit = max(customer.last_visit or "", last_visit)
+                customer.last_receipt = max(customer.last_receipt, last_receipt)
+                self.dirty.add(phone)
+            self.phones = sorted(self.customers)
+            self.names = sorted((key, c.phone) for c in self.customers.values() for key in name_keys(c.name))
+
+    def _index_name(self, customer):
+        for key in name_keys(customer.name):
+            bisect.insort(self.names, (key, customer.phone))
+
+    def _unindex_name(self, customer):
+        for key in name_keys(customer.name):
+            i = bisect.bisect_left(self.names, (key, customer.phone))
+            if i < len(self.names) and self.names[i] == (key, customer.phone):
+                del self.names[i]
+
+    def match_phone(self, prefix, limit=8):
+        prefix = normalize_phone(prefix)
+        if not prefix:
+            return []
+        matches = []
+        i = bisect.bisect_left(self.phones, prefix)
+        while i < len(self.phones) and len(matches) < limit and self.phones[i].startswith(prefix):
+            matches.append(self.customers[self.phones[i]])
+            i += 1
+        return matches
+
+    def match_name(self, prefix, limit=8):
+        prefix = " ".join(prefix.casefold().split())
+        if not prefix:
+            return []
+        matches = {}
+        i = bisect.bisect_left(self.names, (prefix, ""))
+        while i < len(self.names) and len(matches) < limit and self.names[i][0].startswith(prefix):
+            phone = self.names[i][1]
+            matches.setdefault(phone, self.customers[phone])
+            i += 1
+        return list(matches.values())
+
+    def flush(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            rows = [(c.phone, c.name, c.visits, c.spend, c.last_visit, c.last_receipt)
+                    for c in map(self.customers.get, self.dirty)]
+            with self.conn:
+                self.conn.executemany("INSERT OR REPLACE INTO customers VALUES (?, ?, ?, ?, ?, ?)", rows)
+            # Only cleared once committed, so a failed flush is retried with the same customers
+            self.dirty = set()
+
+    def close(self):
+        with self.lock:
+            self.flush()
+            self.conn.close()
@@ -0,0 +1,246 @@
+import tkinter as tk
+from tkinter import ttk
+
+
+class PickerDialog:
+    # A small window with a prompt, a readonly combobox and one button. The
+    # widgets are built the first time it is shown; closing it only withdraws
+    # the window so the next show() just swaps in new values.
+    def __init__(self, root, title, button_bg, button_fg):
+        self.root = root
+        self.title = title
+        self.button_bg = button_bg
+        self.button_fg = button_fg
+        self.window = None
+        self.on_confirm = None
+
+    def _build(self):
+        self.window = tk.Toplevel(self.root)
+        self.window.title(self.title)
+        self.window.geometry("300x200")
+        self.window.resizable(False, False)
+        self.window.configure(bg="#000000")
+        self.window.protocol("WM_DELETE_WINDOW", self.hide)
+
+        self.label = tk.Label(self.window,
+                              font=("Arial", 10),
+                              bg="#000000",
+                              fg="white")
+        self.label.pack(pady=10)
+
+        self.var = tk.StringVar()
+        self.dropdown = ttk.Combobox(self.window,
+                                     textvariable=self.var,
+                                     state="readonly",
+                                     font=("Arial", 10))
+        self.dropdown.pack(pady=5)
+
+        self.button = tk.Button(self.window,
+                                command=self._confirm,
+                                bg=self.button_bg,
+                                fg=self.button_fg,
+                                font=("Arial", 10, "bold"),
+                                bd=0,
+                                padx=10,
+                                pady=5)
+        self.button.pack(pady=10)
+
+    def show(self, prompt, values, button_text, on_confirm):
+        # on_confirm(selected value) runs when the button is pressed
+        if self.window is None:
+            self._build()
+        self.label.config(text=prompt)
+        self.dropdown["values"] = values
+        self.var.set(values[0] if values else "")
+        self.button.config(text=button_text)
+        self.on_confirm = on_confirm
+        self.window.deiconify()
+        self.window.lift()
+        self.window.focus_set()
+
+    def hide(self):
+        self.window.withdraw()
+        self.on_confirm = None
+
+    def _confirm(self):
+        selected = self.var.get()
+        if selected and self.on_confirm:
+            self.on_confirm(selected)
+            self.hide()
+
+
+class FormDialog:
+    # Like PickerDialog but with a labelled Entry per field. show() fills in the
+    # defaults; on_confirm gets {label: text}.
+    def __init__(self, root, title, fields, button_bg, button_fg):
+        self.root = root
+        self.title = title
+        self.fields = fields
+        self.button_bg = button_bg
+        self.button_fg = button_fg
+        self.window = None
+        self.on_confirm = None
+
+    def _build(self):
+        self.window = tk.Toplevel(self.root)
+        self.window.title(self.title)
+        self.window.resizable(False, False)
+        self.window.configure(bg="#000000", padx=10, pady=10)
+        self.window.protocol("WM_DELETE_WINDOW", self.hide)
+
+        self.label = tk.Label(self.window,
+                              font=("Arial", 10),
+                              bg="#000000",
+                              fg="white",
+                              justify=tk.LEFT)
+        self.label.grid(row=0, column=0, columnspan=2, sticky="w", pady=(0, 10))
+
+        self.entries = {}
+        for row, field in enumerate(self.fields, start=1):
+            tk.Label(self.window,
+                     text=f"{field}:",
+                     font=("Arial", 10),
+                     bg="#000000",
+                     fg="white").grid(row=row, column=0, sticky="w", padx=5, pady=3)
+            entry = tk.Entry(self.window,
+                             width=22,
+                             font=("Arial", 10),
+                             bd=1,
+                             relief=tk.SOLID,
+                             bg="#111111",
+                             fg="white",
+                             insertbackground="white")
+            entry.grid(row=row, column=1, padx=5, pady=3)
+            self.entries[field] = entry
+
+        self.button = tk.Button(self.window,
+                                command=self._confirm,
+                                bg=self.button_bg,
+                                fg=self.button_fg,
+                                font=("Arial", 10, "bold"),
+                                bd=0,
+                                padx=10,
+                                pady=5)
+        self.button.grid(row=len(self.fields) + 1, column=0, columnspan=2, pady=10)
+
+    def show(self, prompt, defaults, button_text, on_confirm):
+        # on_confirm returns True once it has handled the values, which closes the form
+        if self.window is None:
+            self._build()
+        self.label.config(text=prompt)
+        for field, entry in self.entries.items():
+            entry.delete(0, tk.END)
+            entry.insert(0, defaults.get(field, ""))
+        self.button.config(text=button_text)
+        self.on_confirm = on_confirm
+        self.window.deiconify()
+        self.window.lift()
+        self.window.focus_set()
+
+    def hide(self):
+        self.window.withdraw()
+        self.on_confirm = None
+
+    def _confirm(self):
+        values = {field: entry.get().strip() for field, entry in self.entries.items()}
+        if self.on_confirm and self.on_confirm(values):
+            self.hide()
+
+
+class DialogPool:
+    # One dialog per purpose, created on first request and reused after
+    def __init__(self, root):
+        self.root = root
+        self.pickers = {}
+
+    def picker(self, key, title, button_bg, button_fg="white"):
+        picker = self.pickers.get(key)
+        if picker is None:
+            picker = self.pickers[key] = PickerDialog(self.root, title, button_bg, button_fg)
+        return picker
+
+    def form(self, key, title, fields, button_bg, button_fg="white"):
+        form = self.pickers.get(key)
+        if form is None:
+            form = self.pickers[key] = FormDialog(self.root, title, fields, button_bg, button_fg)
+        return form
+
+
+class Autocomplete:
+    # Suggestion list that drops down under an Entry while typing. lookup(text)
+    # returns [(label, value)]; choosing a row calls on_pick(value). Down moves
+    # into the list, Return or a click picks, Escape closes it.
+    def __init__(self, entry, lookup, on_pick, rows=6):
+        self.entry = entry
+        self.lookup = lookup
+        self.on_pick = on_pick
+        self.rows = rows
+        self.popup = None
+        self.matches = []
+        entry.bind("<KeyRelease>", self._on_key, add="+")
+        entry.bind("<Down>", self._focus_list, add="+")
+        entry.bind("<Escape>", lambda e: self.hide(), add="+")
+        entry.bind("<FocusOut>", lambda e: entry.after(100, self._hide_unless_focused), add="+")
+
+    def _build(self):
+        self.popup = tk.Toplevel(self.entry)
+        self.popup.overrideredirect(True)
+        self.popup.withdraw()
+        self.listbox = tk.Listbox(self.popup,
+                                  height=self.rows,
+                                  font=("Arial", 10),
+                                  bg="#111111",
+                                  fg="white",
+                                  selectbackground="#5c7cfa",
+                                  activestyle="none",
+                                  bd=1,
+                                  relief=tk.SOLID)
+        self.listbox.pack(fill=tk.BOTH, expand=True)
+        self.listbox.bind("<ButtonRelease-1>", self._pick)
+        self.listbox.bind("<Return>", self._pick)
+        self.listbox.bind("<Escape>", lambda e: (self.hide(), self.entry.focus_set()))
+        self.listbox.bind("<FocusOut>", lambda e: self.entry.after(100, self._hide_unless_focused))
+
+    def _on_key(self, event):
+        if event.keysym in ("Down", "Up", "Return", "Escape", "Tab"):
+            return
+        text = self.entry.get().strip()
+        self.matches = self.lookup(text) if text else []
+        if not self.matches:
+            self.hide()
+            return
+        if self.popup is None:
+            self._build()
+        self.listbox.delete(0, tk.END)
+        for label, _ in self.matches:
+            self.listbox.insert(tk.END, label)
+        self.listbox.config(height=min(self.rows, len(self.matches)))
+        self.popup.geometry(f"+{self.entry.winfo_rootx()}+{self.entry.winfo_rooty() + self.entry.winfo_height()}")
+        self.popup.deiconify()
+        self.popup.lift()
+
+    def _focus_list(self, event):
+        if self.popup is not None and self.popup.winfo_viewable():
+            self.listbox.focus_set()
+            self.listbox.selection_clear(0, tk.END)
+            self.listbox.selection_set(0)
+            self.listbox.activate(0)
+
+    def _pick(self, event=None):
+        selection = self.listbox.curselection()
+        if not selection:
+            return
+        value = self.matches[selection[0]][1]
+        self.hide()
+        self.on_pick(value)
+        self.entry.focus_set()
+        self.entry.icursor(tk.END)
+
+    def _hide_unless_focused(self):
+        focused = self.entry.focus_get()
+        if self.popup is not None and focused not in (self.entry, self.listbox):
+            self.hide()
+
+    def hide(self):
+        if self.popup is not None:
+            self.popup.withdraw()
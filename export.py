@@ -0,0 +1,184 @@
+import argparse
+import csv
+import os
+import sqlite3
+import sys
+from datetime import date, datetime, timedelta
+
+from analytics_store import ColumnarStore
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional; without it only CSV export is available
+    pa = None
+    pq = None
+
+
+# Column name -> type, in output order. Types map to CSV text and to Parquet columns.
+SESSION_COLUMNS = (("id", "int"), ("room", "str"), ("console", "str"), ("mode", "str"), ("player", "str"),
+                   ("contact", "str"), ("start_time", "time"), ("end_time", "time"), ("hours", "float"),
+                   ("hourly_rate", "float"), ("gaming_cost", "float"), ("bar_items_cost", "float"),
+                   ("total_cost", "float"), ("bar_items", "str"))
+BAR_SALE_COLUMNS = (("time", "time"), ("room", "str"), ("item", "str"), ("qty", "int"), ("amount", "float"))
+
+TABLES = {"sessions": SESSION_COLUMNS, "bar_sales": BAR_SALE_COLUMNS}
+
+
+def session_chunks(ledger_path, start, end, rooms=None, chunk_rows=10000):
+    # Lists of session rows that ended in [start, end), oldest first, read from a
+    # receipts.db in chunks through one cursor; the ledger's end_time and
+    # (room, end_time) indexes serve both filters
+    conn = sqlite3.connect(f"file:{os.path.abspath(ledger_path)}?mode=ro", uri=True)
+    try:
+        sql = ("SELECT id, room, console, mode, player, contact, start_time, end_time, hourly_rate, gaming_cost, "
+               "bar_items_cost, total_cost, bar_items FROM receipts WHERE end_time >= ? AND end_time < ?")
+        params = [start.strftime("%Y-%m-%d %H:%M:%S"), end.strftime("%Y-%m-%d %H:%M:%S")]
+        if rooms:
+            sql += f" AND room IN ({', '.join('?' * len(rooms))})"
+            params += rooms
+        cursor = conn.execute(sql + " ORDER BY end_time, id", params)
+        while True:
+            rows = cursor.fetchmany(chunk_rows)
+            if not rows:
+                return
+            chunk = []
+            for (receipt_id, room, console, mode, player, contact, start_time, end_time, rate, gaming, bar, total,
+                 bar_items) in rows:
+                started = datetime.fromisoformat(start_time) if start_time else None
+                ended = datetime.fromisoformat(end_time)
+                # Item counts stay as the ledger's JSON text
+                if not bar_items or bar_items == "null":
+                    bar_items = "{}"
+                chunk.append((receipt_id, room, console, mode, player, contact, started, ended,
+                              round((ended - started).total_seconds() / 3600, 4) if started else None,
+                              rate, gaming, bar, total, bar_items))
+            yield chunk
+    finally:
+        conn.close()
+
+
+def bar_sale_chunks(history_dir, start, end, rooms=None, chunk_rows=10000):
+    # Lists of bar-sale rows from the columnar history, one mapped day at a time
+    store = ColumnarStore(history_dir)
+    wanted = None
+    if rooms:
+        codes = store.codes["room"]
+        wanted = {codes[room] for room in rooms if room in codes}
+        if not wanted:
+            return
+    first = start.timestamp()
+    last = end.timestamp()
+    for day in store.days(start.date(), (end - timedelta(microseconds=1)).date()):
+        data = store.read_day(day, "bar_sales")
+        if data is None:
+            continue
+        try:
+            ts, room_codes, item_codes, qty, amount = (data[name] for name in ("ts", "room", "item", "qty", "amount"))
+            chunk = []
+            for i in range(data.rows):
+                if not first <= ts[i] < last or (wanted is not None and room_codes[i] not in wanted):
+                    continue
+                chunk.append((datetime.fromtimestamp(ts[i]), store.decode("room", room_codes[i]),
+                              store.decode("item", item_codes[i]), qty[i], amount[i]))
+                if len(chunk) == chunk_rows:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+        finally:
+            data.close()
+
+
+class CsvSink:
+    # Times are written as "YYYY-mm-dd HH:MM:SS", like the ledger stores them
+    def __init__(self, out, columns):
+        self.writer = csv.writer(out)
+        self.time_columns = [i for i, (_, kind) in enumerate(columns) if kind == "time"]
+        self.writer.writerow([name for name, _ in columns])
+
+    def write(self, rows):
+        if self.time_columns:
+            rows = [list(row) for row in rows]
+            for row in rows:
+                for i in self.time_columns:
+                    if row[i] is not None:
+                        row[i] = row[i].isoformat(" ", "seconds")
+        self.writer.writerows(rows)
+
+    def close(self):
+        pass
+
+
+class ParquetSink:
+    # Each chunk becomes one row group, so only a chunk is ever held in memory
+    def __init__(self, path, columns):
+        if pq is None:
+            raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+        types = {"int": pa.int64(), "str": pa.string(), "float": pa.float64(), "time": pa.timestamp("s")}
+        self.schema = pa.schema([(name, types[kind]) for name, kind in columns])
+        self.writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+
+    def write(self, rows):
+        columns = list(zip(*rows))
+        self.writer.write_table(pa.Table.from_arrays(
+            [pa.array(values, type=field.type) for values, field in zip(columns, self.schema)], schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+def export(table, source, sink, start, end, rooms=None, chunk_rows=10000):
+    # Streams one table into a sink; returns the number of rows written
+    chunks = (session_chunks if table == "sessions" else bar_sale_chunks)(source, start, end, rooms, chunk_rows)
+    count = 0
+    for rows in chunks:
+        sink.write(rows)
+        count += len(rows)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export session and bar-sale history as CSV or Parquet")
+    parser.add_argument("table", choices=sorted(TABLES))
+    parser.add_argument("--data", default=".", help="App directory holding receipts.db and analytics/")
+    parser.add_argument("--from", dest="start", help="First day, YYYY-MM-DD (default: everything)")
+    parser.add_argument("--to", dest="end", help="Last day, YYYY-MM-DD (default: today)")
+    parser.add_argument("--room", action="append", help="Only these rooms; repeat for several")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--out", default="-", help="Output file; - writes CSV to stdout")
+    parser.add_argument("--chunk", type=int, default=10000, help="Rows read and written per chunk")
+    args = parser.parse_args()
+
+    start = datetime.combine(date.fromisoformat(args.start), datetime.min.time()) if args.start else datetime(1970, 1, 2)
+    end = datetime.combine(date.fromisoformat(args.end) if args.end else date.today(),
+                           datetime.min.time()) + timedelta(days=1)
+    if args.table == "sessions":
+        source = os.path.join(args.data, "receipts.db")
+    else:
+        source = os.path.join(args.data, "analytics")
+    if not os.path.exists(source):
+        parser.error(f"{source} does not exist")
+
+    columns = TABLES[args.table]
+    if args.format == "parquet":
+        if args.out == "-":
+            parser.error("Parquet export needs --out")
+        if pq is None:
+            parser.error("Parquet export needs pyarrow (pip install pyarrow)")
+        sink = ParquetSink(args.out, columns)
+        out = None
+    else:
+        out = sys.stdout if args.out == "-" else open(args.out, "w", encoding="utf-8", newline="")
+        sink = CsvSink(out, columns)
+    try:
+        count = export(args.table, source, sink, start, end, args.room, args.chunk)
+    finally:
+        sink.close()
+        if out is not None and out is not sys.stdout:
+            out.close()
+    print(f"Exported {count} {args.table.replace('_', ' ')}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
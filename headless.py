@@ -0,0 +1,191 @@
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+
+from analytics_store import Analytics, ColumnarStore
+from customer_index import CustomerIndex
+from reservations import ReservationBook
+from receipt_archive import ReceiptArchive
+from pricing_rules import RuleFile
+from receipt_ledger import ReceiptLedger
+
+
+APP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "testing_final .py")
+
+# Stand-ins for Tk so the session paths of PlayStationManagementSystem can run
+# without a display. Messageboxes, dialogs and file writes are recorded, not shown.
+
+
+class FakeWidget:
+    def __init__(self, value=""):
+        self.value = value
+        self.options = {}
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+    def delete(self, first, last=None):
+        self.value = ""
+
+    def insert(self, index, text):
+        self.value += text
+
+    def config(self, **options):
+        self.options.update(options)
+
+    configure = config
+
+    def __setitem__(self, key, value):
+        self.options[key] = value
+
+    def __getitem__(self, key):
+        return self.options.get(key)
+
+    def __getattr__(self, name):
+        # Any other widget method (pack, grid, destroy, schedule_refresh, ...) is a no-op
+        return lambda *args, **kwargs: None
+
+
+class FakeRoot(FakeWidget):
+    def __init__(self):
+        super().__init__()
+        self.scheduled = []
+
+    def after(self, ms, callback=None, *args):
+        self.scheduled.append((ms, callback, args))
+        return f"after#{len(self.scheduled)}"
+
+    def after_idle(self, callback, *args):
+        return self.after(0, callback, *args)
+
+    def state(self):
+        return "normal"
+
+
+class RecordingMessagebox:
+    def __init__(self):
+        self.shown = []
+
+    def showinfo(self, title, message):
+        self.shown.append(("info", title, message))
+
+    def showerror(self, title, message):
+        self.shown.append(("error", title, message))
+
+    def showwarning(self, title, message):
+        self.shown.append(("warning", title, message))
+
+
+class DeferredWriter:
+    # Collects background jobs instead of running them, so a timed operation only
+    # measures the GUI-thread work. run_pending() executes them off the clock.
+    def __init__(self, run_files=False):
+        self.run_files = run_files
+        self.pending = {}
+        self.files = 0
+
+    def write_file(self, path, content, message=None, mode="w"):
+        self.files += 1
+        if self.run_files:
+            def write():
+                with open(path, mode) as f:
+                    f.write(content)
+            return self.submit(("file", path), write, message)
+        return True
+
+    def submit(self, key, job, message=None, error_message=None):
+        self.pending[key] = job
+        return True
+
+    def run_pending(self):
+        pending = self.pending
+        self.pending = {}
+        for job in pending.values():
+            job()
+
+    def close(self):
+        self.run_pending()
+
+
+class NullJournal:
+    # Serializes like the real journal but keeps nothing
+    def __init__(self):
+        self.seq = 0
+
+    def append(self, op, **fields):
+        self.seq += 1
+        fields["op"] = op
+        fields["seq"] = self.seq
+        json.dumps(fields, separators=(",", ":"))
+        return self.seq
+
+    def needs_snapshot(self):
+        return False
+
+    def snapshot(self, state):
+        pass
+
+    def close(self):
+        pass
+
+
+def load_app_module():
+    module = sys.modules.get("ps_app")
+    if module is None:
+        spec = importlib.util.spec_from_file_location("ps_app", APP_FILE)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        sys.modules["ps_app"] = module
+    return module
+
+
+def room_layout(count):
+    # count rooms split evenly between PS4 and PS5
+    ps4 = (count + 1) // 2
+    return ([(f"PS4-{i}", "PS4") for i in range(1, ps4 + 1)] +
+            [(f"PS5-{i}", "PS5") for i in range(1, count - ps4 + 1)])
+
+
+def create_app(rooms=None, data_dir=None, journal=None, writer=None, clock=None):
+    # data_dir=None keeps the ledger in memory; the columnar history and receipt archive always need a directory
+    module = load_app_module()
+    module.messagebox = RecordingMessagebox()
+    app = module.PlayStationManagementSystem.__new__(module.PlayStationManagementSystem)
+    app.root = FakeRoot()
+    app.init_state(rooms=rooms, clock=clock)
+
+    app.ledger = ReceiptLedger(os.path.join(data_dir, "receipts.db") if data_dir else ":memory:",
+                               auto_flush=False)
+    if data_dir is None:
+        # Owned by the app: removed when the app is garbage collected or the process exits.
+        # It also stands in for the app directory, so nothing is read from or written to the cwd.
+        app.temp_dir = tempfile.TemporaryDirectory(prefix="ps_history_", ignore_cleanup_errors=True)
+        history_dir = app.temp_dir.name
+        app.app_path = app.temp_dir.name
+    else:
+        history_dir = os.path.join(data_dir, "analytics")
+        app.app_path = data_dir
+    app.history = ColumnarStore(history_dir)
+    app.archive = ReceiptArchive(os.path.join(history_dir if data_dir is None else data_dir, "receipts"))
+    app.analytics = Analytics(app.history)
+    app.pricing_file = RuleFile(os.path.join(app.app_path, "pricing_rules.json"))
+    app.customers = CustomerIndex(os.path.join(data_dir, "customers.db") if data_dir else ":memory:")
+    app.reservations = ReservationBook(os.path.join(data_dir, "reservations.db") if data_dir else ":memory:")
+    app.journal = journal or NullJournal()
+    app.writer = writer or DeferredWriter()
+    app.spooler = None
+    app.outbox = None
+    app.sync_agent = None
+
+    for name in ("player_name", "contact_number", "room_dropdown", "status_label", "date_label", "room_grid"):
+        setattr(app, name, FakeWidget())
+    app.room_var = FakeWidget()
+    app.console_type = FakeWidget("PS4")
+    app.game_mode = FakeWidget("Single")
+    app.prepaid = FakeWidget("Open")
+    return app, module.messagebox
@@ -0,0 +1,150 @@
+import bisect
+import time
+import tkinter
+from collections import deque
+from datetime import datetime
+
+
+# Upper bounds (ms) of the histogram buckets; anything slower lands in the last one
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, float("inf"))
+LAG = "event-loop lag"
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS_MS)
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, ms):
+        self.counts[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def merge(self, other):
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def count(self):
+        return sum(self.counts)
+
+    def percentile(self, q):
+        # Upper bound of the bucket holding the q-th sample, capped at the slowest seen
+        target = q * self.count()
+        seen = 0
+        for bound, count in zip(BUCKETS_MS, self.counts):
+            seen += count
+            if count and seen >= target:
+                return min(bound, self.max)
+        return 0.0
+
+
+def handler_name(func):
+    func = getattr(func, "__func__", func)
+    name = getattr(func, "__qualname__", None) or type(func).__name__
+    if name.endswith("<locals>.callit"):
+        # root.after wraps the callback in a closure; report the function it calls
+        cells = dict(zip(func.__code__.co_freevars, func.__closure__ or ()))
+        if "func" in cells:
+            return "after: " + handler_name(cells["func"].cell_contents)
+        return "after: " + func.__name__
+    return name
+
+
+class Instrumentation:
+    # Opt-in timing of every Tk callback (button commands, bindings, root.after
+    # jobs) plus the lag of the one-second tick. Samples go into per-minute
+    # histograms; the last hour of them is written to a text file now and then.
+    # Nothing is patched unless install() is called.
+    def __init__(self, root, path, window_s=60, windows=60, export_s=60, slow_ms=200):
+        self.root = root
+        self.path = path
+        self.window_s = window_s
+        self.export_s = export_s
+        self.slow_ms = slow_ms
+        self.writer = None
+        self.scheduler = None
+        self.windows = deque(maxlen=windows)
+        self.current = {}
+        self.window_started = time.monotonic()
+        self.slow = deque(maxlen=50)
+        self.original_call = None
+
+    def install(self):
+        # Tk binds each callback's CallWrapper.__call__ when the widget or job is
+        # created, so this has to run before the UI is built to see every handler
+        original = self.original_call = tkinter.CallWrapper.__call__
+        record = self.record
+
+        def timed_call(wrapper, *args):
+            started = time.perf_counter()
+            try:
+                return original(wrapper, *args)
+            finally:
+                record(handler_name(wrapper.func), (time.perf_counter() - started) * 1000)
+
+        tkinter.CallWrapper.__call__ = timed_call
+
+    def uninstall(self):
+        if self.original_call is not None:
+            tkinter.CallWrapper.__call__ = self.original_call
+            self.original_call = None
+
+    def start(self, writer, scheduler):
+        # Needs the writer for exports and the scheduler whose tick lag is measured
+        self.writer = writer
+        self.scheduler = scheduler
+        scheduler.add(self.observe_tick)
+        self.root.after(self.export_s * 1000, self._export_loop)
+
+    def observe_tick(self, now):
+        self.record(LAG, self.scheduler.lag * 1000)
+
+    def record(self, name, ms):
+        if time.monotonic() - self.window_started >= self.window_s:
+            self.windows.append(self.current)
+            self.current = {}
+            self.window_started = time.monotonic()
+        histogram = self.current.get(name)
+        if histogram is None:
+            histogram = self.current[name] = Histogram()
+        histogram.record(ms)
+        if ms >= self.slow_ms:
+            self.slow.append((datetime.now(), name, ms))
+
+    def totals(self):
+        # {name: Histogram} over every window still kept, including the current one
+        totals = {}
+        for window in list(self.windows) + [self.current]:
+            for name, histogram in window.items():
+                totals.setdefault(name, Histogram()).merge(histogram)
+        return totals
+
+    def report(self):
+        totals = self.totals()
+        minutes = (len(self.windows) * self.window_s + time.monotonic() - self.window_started) / 60
+        lines = [f"Metrics at {datetime.now():%Y-%m-%d %H:%M:%S} (last {minutes:.0f} min, times in ms)",
+                 f"{'callback':<60}{'count':>8}{'mean':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}"]
+        names = sorted(totals, key=lambda name: (name != LAG, -totals[name].max))
+        for name in names:
+            histogram = totals[name]
+            count = histogram.count()
+            lines.append(f"{name[:59]:<60}{count:>8}{histogram.total / count:>9.1f}"
+                         f"{histogram.percentile(0.50):>9.1f}{histogram.percentile(0.95):>9.1f}"
+                         f"{histogram.percentile(0.99):>9.1f}{histogram.max:>9.1f}")
+        lines.append("")
+        lines.append(f"Slowest recent callbacks (>= {self.slow_ms} ms):")
+        for when, name, ms in self.slow:
+            lines.append(f"  {when:%Y-%m-%d %H:%M:%S}  {name}  {ms:.1f}")
+        return "\n".join(lines) + "\n"
+
+    def export(self):
+        if self.writer is not None:
+            self.writer.write_file(self.path, self.report())
+
+    def _export_loop(self):
+        self.export()
+        self.root.after(self.export_s * 1000, self._export_loop)
@@ -0,0 +1,223 @@
+import heapq
+from datetime import datetime, timedelta
+
+
+EPOCH = datetime(2000, 1, 1)
+HOUR = 3600
+
+
+def seconds_of(when):
+    return (when - EPOCH).total_seconds()
+
+
+class ConsoleCounters:
+    __slots__ = ("open", "start_sum", "rate_sum", "rate_start_sum", "bar_value", "closed_seconds",
+                 "sessions", "turned_away")
+
+    def __init__(self):
+        self.open = 0              # sessions running now
+        self.start_sum = 0.0       # sum of their start times, clamped to the period start
+        self.rate_sum = 0.0        # sum of their hourly rates
+        self.rate_start_sum = 0.0  # sum of rate * actual start, for the value accrued so far
+        self.bar_value = 0.0       # bar items on their tabs
+        self.closed_seconds = 0.0  # occupied time of sessions that ended this period
+        self.sessions = 0
+        self.turned_away = 0
+
+
+class LiveCounters:
+    # Running utilization and revenue figures for the dashboard. They are kept
+    # up to date from engine events and completed receipts, so reading them
+    # never walks the rooms or the ledger. Open sessions are folded in at read
+    # time from a few running sums (count, start times, rates): the occupied
+    # time of n sessions is n * now - sum(starts), and their accrued value is
+    # sum(rate) * now - sum(rate * start). Occupied time covers the period
+    # since the counters were created or last reset at end of day; the value
+    # of an open session is counted from its actual start.
+    #
+    # The accrued value of open sessions uses the flat tariff; time-of-day
+    # rules and rounding are only applied on the receipt.
+    def __init__(self, engine, billing, now=datetime.now):
+        self.engine = engine
+        self.billing = billing
+        self.now = now
+        self.consoles = {}
+        self.open = {}          # room -> (console, actual start, rate, bar value, paid until or None)
+        self.hour_starts = {}   # hour -> [open sessions that started in it, sum of their clamped starts]
+        self.releases = {}      # console -> heap of (paid until, room, start) for prepaid sessions
+        self.reset(now())
+        for name in engine.occupied_rooms():
+            self._start(engine.rooms[name])
+        engine.subscribe(self._on_room_changed)
+
+    def reset(self, now, revenue=0.0, sessions=0):
+        # Starts a new period at `now`; sessions still open carry over from there.
+        # revenue and sessions seed the completed totals, e.g. after a restart.
+        # Only the per-console sums change, so this does not depend on how many rooms are open.
+        self.period_start = seconds_of(now)
+        self.revenue = revenue
+        self.sessions = sessions
+        self.room_seconds = {}
+        self.hour_closed = {}   # hour -> occupied seconds of sessions that ended
+        for counters in self.consoles.values():
+            counters.start_sum = counters.open * self.period_start
+            counters.closed_seconds = 0.0
+            counters.sessions = 0
+            counters.turned_away = 0
+        still_open = len(self.open)
+        self.hour_starts = {int(self.period_start // HOUR): [still_open, still_open * self.period_start]}
+
+    def console(self, console):
+        counters = self.consoles.get(console)
+        if counters is None:
+            counters = self.consoles[console] = ConsoleCounters()
+        return counters
+
+    def _on_room_changed(self, event, room):
+        if event == "start" or (event == "sync" and room.status == 1 and room.name not in self.open):
+            self._start(room)
+        elif event == "end" or (event == "sync" and room.status == 0 and room.name in self.open):
+            self._end(room.name, seconds_of(self.now()))
+        elif event in ("bar", "sync") and room.name in self.open:
+            self._bar(room)
+
+    def _start(self, room):
+        started = seconds_of(room.start_time)
+        start = max(started, self.period_start)
+        try:
+            rate = self.billing.rate(room.type, room.mode)
+        except ValueError:
+            rate = 0
+        bar_value = self.billing.bar_cost(room.bar_items)
+        paid_until = seconds_of(room.paid_until) if room.paid_until else None
+        self.open[room.name] = (room.type, started, rate, bar_value, paid_until)
+        counters = self.console(room.type)
+        counters.open += 1
+        counters.start_sum += start
+        counters.rate_sum += rate
+        counters.rate_start_sum += rate * started
+        counters.bar_value += bar_value
+        bucket = self.hour_starts.setdefault(int(start // HOUR), [0, 0.0])
+        bucket[0] += 1
+        bucket[1] += start
+        if room.paid_until:
+            heapq.heappush(self.releases.setdefault(room.type, []), (room.paid_until, room.name, room.start_time))
+
+    def _bar(self, room):
+        console, start, rate, bar_value, paid_until = self.open[room.name]
+        value = self.billing.bar_cost(room.bar_items)
+        self.open[room.name] = (console, start, rate, value, paid_until)
+        self.console(console).bar_value += value - bar_value
+
+    def _end(self, name, end):
+        console, started, rate, bar_value, paid_until = self.open.pop(name)
+        if paid_until is not None:
+            # An expired prepaid session ends at its paid end, however late its timer fired
+            end = min(end, paid_until)
+        start = max(started, self.period_start)
+        end = max(end, start)
+        counters = self.consoles[console]
+        counters.open -= 1
+        counters.start_sum -= start
+        counters.rate_sum -= rate
+        counters.rate_start_sum -= rate * started
+        counters.bar_value -= bar_value
+        counters.closed_seconds += end - start
+        counters.sessions += 1
+        self.room_seconds[name] = self.room_seconds.get(name, 0.0) + end - start
+        bucket = self.hour_starts[int(start // HOUR)]
+        bucket[0] -= 1
+        bucket[1] -= start
+        # Spread the session over the hours it covered; a few steps per session at most
+        hour = int(start // HOUR)
+        while start < end:
+            edge = min(end, (hour + 1) * HOUR)
+            self.hour_closed[hour] = self.hour_closed.get(hour, 0.0) + edge - start
+            start = edge
+            hour += 1
+
+    def record_receipt(self, receipt):
+        self.revenue += receipt["total_cost"]
+        self.sessions += 1
+
+    def turned_away(self, console):
+        # A walk-in found no free room of the console they asked for
+        self.console(console).turned_away += 1
+
+    def occupied_seconds(self, console, now):
+        counters = self.consoles.get(console)
+        if counters is None:
+            return 0.0
+        return counters.closed_seconds + counters.open * seconds_of(now) - counters.start_sum
+
+    def room_minutes(self, name, now):
+        minutes = self.room_seconds.get(name, 0.0) / 60
+        if name in self.open:
+            minutes += (seconds_of(now) - max(self.open[name][1], self.period_start)) / 60
+        return minutes
+
+    def open_value(self, now):
+        # Gaming time accrued so far plus bar tabs, over every open session
+        now = seconds_of(now)
+        return sum(max(0.0, (c.rate_sum * now - c.rate_start_sum) / HOUR) + c.bar_value
+                   for c in self.consoles.values())
+
+    def utilization(self, console, now):
+        # Share of the console's room time occupied this period
+        rooms = self.console(console).open + len(self.engine.free.get(console, ()))
+        elapsed = seconds_of(now) - self.period_start
+        if not rooms or elapsed <= 0:
+            return 0.0
+        return min(1.0, self.occupied_seconds(console, now) / (rooms * elapsed))
+
+    def hourly(self, now):
+        # [(hour start, occupied room-hours)] for every hour of the period so far
+        now = seconds_of(now)
+        first = int(self.period_start // HOUR)
+        last = int(now // HOUR)
+        result = []
+        started = 0  # open sessions that started before the hour being looked at
+        for hour in range(first, last + 1):
+            hour_start = hour * HOUR
+            hour_end = min(now, hour_start + HOUR)
+            seconds = self.hour_closed.get(hour, 0.0) + started * (hour_end - max(hour_start, self.period_start))
+            count, start_sum = self.hour_starts.get(hour, (0, 0.0))
+            seconds += count * hour_end - start_sum
+            started += count
+            result.append((EPOCH + timedelta(seconds=hour_start), seconds / HOUR))
+        return result
+
+    def next_release(self, console, now):
+        # Earliest end of a prepaid session on this console, to tell a waiting customer
+        heap = self.releases.get(console, [])
+        while heap:
+            paid_until, name, start_time = heap[0]
+            room = self.engine.rooms[name]
+            if room.status == 1 and room.start_time == start_time and paid_until >= now:
+                return paid_until
+            # Ended early, or about to be ended by its expiry timer
+            heapq.heappop(heap)
+        return None
+
+    def summary(self, now):
+        # Everything the dashboard shows, as plain values
+        consoles = {}
+        for console in sorted(set(self.consoles) | set(self.engine.free)):
+            counters = self.console(console)
+            consoles[console] = {
+                "busy": counters.open,
+                "free": len(self.engine.free.get(console, ())),
+                "hours": self.occupied_seconds(console, now) / HOUR,
+                "utilization": self.utilization(console, now),
+                "turned_away": counters.turned_away,
+                "next_release": self.next_release(console, now) if not self.engine.free.get(console) else None,
+            }
+        open_value = self.open_value(now)
+        return {
+            "consoles": consoles,
+            "revenue": self.revenue,
+            "open_value": open_value,
+            "accrued": self.revenue + open_value,
+            "sessions": self.sessions,
+            "hourly": self.hourly(now),
+        }
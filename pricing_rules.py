@@ -0,0 +1,172 @@
+import bisect
+import json
+import math
+import os
+import time
+from datetime import timedelta
+
+
+DAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+WEEK = 7 * 86400
+
+# pricing_rules.json, next to the app:
+# {
+#   "rounding_minutes": 5,
+#   "rules": [
+#     {"name": "Night", "start": "00:00", "end": "06:00", "multiplier": 0.7},
+#     {"name": "Happy hour", "days": ["Sun", "Mon", "Tue"], "start": "14:00", "end": "17:00",
+#      "rates": {"PS5:Single": 120}},
+#     {"name": "Weekend", "days": ["Fri", "Sat"], "start": "12:00", "end": "02:00", "multiplier": 1.2}
+#   ]
+# }
+# A rule without "days" applies every day; an end before the start runs past
+# midnight. Where rules overlap the one listed last wins. "rates" sets an
+# hourly rate per "console:mode"; otherwise the tariff is scaled by "multiplier".
+
+
+class PricingError(Exception):
+    pass
+
+
+def parse_clock(text):
+    try:
+        hours, minutes = (int(part) for part in text.split(":"))
+    except (AttributeError, ValueError):
+        raise PricingError(f"Bad time {text!r}, expected HH:MM")
+    if not (0 <= hours <= 24 and 0 <= minutes < 60) or hours * 60 + minutes > 1440:
+        raise PricingError(f"Bad time {text!r}, expected HH:MM")
+    return hours * 3600 + minutes * 60
+
+
+def check_number(value, what):
+    # bool is an int subclass, but true/false in the file is a mistake
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise PricingError(f"{what} must be a number, not {value!r}")
+    if value < 0:
+        raise PricingError(f"{what} must be zero or more, not {value!r}")
+    return value
+
+
+class RateTable:
+    # A rule set compiled into one sorted table of breakpoints over the week
+    # (seconds since Monday 00:00), each naming the rule in force until the
+    # next one. Splitting a session into rate segments is one bisect to find
+    # where it starts, then a walk over the breakpoints it crosses.
+    # Every field is checked here, so a table that was built can always price a session.
+    def __init__(self, rules=(), rounding_minutes=0):
+        if not isinstance(rules, (list, tuple)):
+            raise PricingError("\"rules\" must be a list")
+        self.rules = list(rules)
+        self.rounding = timedelta(minutes=check_number(rounding_minutes, "rounding_minutes"))
+
+        windows = []
+        for index, rule in enumerate(self.rules):
+            if not isinstance(rule, dict):
+                raise PricingError(f"Rule {index + 1} must be an object")
+            if not isinstance(rule.get("name"), str) or not rule["name"]:
+                raise PricingError(f"Rule {index + 1} needs a name")
+            if "multiplier" in rule:
+                check_number(rule["multiplier"], f"The multiplier of rule {rule['name']}")
+            rates = rule.get("rates", {})
+            if not isinstance(rates, dict):
+                raise PricingError(f"The rates of rule {rule['name']} must be an object")
+            for key, rate in rates.items():
+                check_number(rate, f"Rate {key} of rule {rule['name']}")
+            start = parse_clock(rule.get("start", "00:00"))
+            end = parse_clock(rule.get("end", "24:00"))
+            if end <= start:
+                end += 86400
+            days = rule.get("days", DAYS)
+            if not isinstance(days, (list, tuple)):
+                raise PricingError(f"The days of rule {rule['name']} must be a list")
+            for day in days:
+                if day not in DAYS:
+                    raise PricingError(f"Unknown day {day!r} in rule {rule['name']}")
+                first = DAYS.index(day) * 86400
+                if first + end > WEEK:
+                    # Sunday night runs on into Monday morning
+                    windows.append((first + start, WEEK, index))
+                    windows.append((0, first + end - WEEK, index))
+                else:
+                    windows.append((first + start, first + end, index))
+
+        points = sorted({0, WEEK} | {edge for window in windows for edge in window[:2]})
+        self.breaks = []
+        self.rule_at = []
+        for a, b in zip(points, points[1:]):
+            winner = max((index for start, end, index in windows if start <= a and b <= end), default=None)
+            if self.rule_at and self.rule_at[-1] == winner:
+                continue
+            self.breaks.append(a)
+            self.rule_at.append(winner)
+
+    def rate(self, i, console, mode, base_rate):
+        # (label, hourly rate) in force in breakpoint interval i
+        index = self.rule_at[i]
+        if index is None:
+            return "Standard", base_rate
+        rule = self.rules[index]
+        rates = rule.get("rates", {})
+        key = f"{console}:{mode}"
+        if key in rates:
+            return rule["name"], rates[key]
+        return rule["name"], round(base_rate * rule.get("multiplier", 1), 2)
+
+    def segments(self, console, mode, start, end, base_rate):
+        # [(label, segment start, segment end, hourly rate)] covering the session
+        if self.rounding and end > start:
+            # Bill whole rounding units, e.g. a started 5 minutes counts in full
+            end = start + self.rounding * math.ceil((end - start) / self.rounding)
+        week_start = (start - timedelta(days=start.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+        i = bisect.bisect_right(self.breaks, (start - week_start).total_seconds()) - 1
+        segments = []
+        cursor = start
+        while cursor < end:
+            next_break = self.breaks[i + 1] if i + 1 < len(self.breaks) else WEEK
+            segment_end = min(end, week_start + timedelta(seconds=next_break))
+            label, rate = self.rate(i, console, mode, base_rate)
+            if segments and segments[-1][0] == label and segments[-1][3] == rate:
+                segments[-1] = (label, segments[-1][1], segment_end, rate)
+            else:
+                segments.append((label, cursor, segment_end, rate))
+            cursor = segment_end
+            i += 1
+            if i == len(self.breaks):
+                i = 0
+                week_start += timedelta(days=7)
+        return segments
+
+
+class RuleFile:
+    # Reloads the rule file whenever its modification time changes, looking at
+    # most once every `interval` seconds
+    def __init__(self, path, interval=5.0):
+        self.path = path
+        self.interval = interval
+        self.mtime = None
+        self.checked = None
+
+    def poll(self):
+        # (changed, table): table is None when there is no rule file.
+        # Raises PricingError for a file that does not parse; it is not retried until it changes again.
+        now = time.monotonic()
+        if self.checked is not None and now - self.checked < self.interval:
+            return False, None
+        self.checked = now
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self.mtime:
+            return False, None
+        self.mtime = mtime
+        if mtime is None:
+            return True, None
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                spec = json.load(f)
+        except (OSError, ValueError) as e:
+            raise PricingError(f"Could not read {os.path.basename(self.path)}: {e}")
+        if not isinstance(spec, dict):
+            raise PricingError(f"{os.path.basename(self.path)} must hold a JSON object")
+        return True, RateTable(spec.get("rules", ()), spec.get("rounding_minutes", 0))
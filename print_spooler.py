@@ -0,0 +1,157 @@
+import argparse
+import os
+import socket
+import socketserver
+import threading
+import time
+
+from background_writer import BackgroundWriter
+
+
+ESC = b"\x1b"
+GS = b"\x1d"
+INIT = ESC + b"@"
+FONT_B = ESC + b"M\x01"  # 64 columns on 80 mm paper, so the 50-column receipt fits
+BOLD_ON = ESC + b"E\x01"
+BOLD_OFF = ESC + b"E\x00"
+FEED_AND_CUT = ESC + b"d\x04" + GS + b"V\x42\x00"
+
+# Receipt lines printed in bold
+EMPHASIZED = ("PLAYSTATION RECEIPT", "TOTAL COST:", "THANK YOU!")
+
+
+def render_escpos(text, cut=True):
+    # Plain receipt text -> bytes for an ESC/POS thermal printer
+    out = [INIT, FONT_B]
+    for line in text.strip("\n").split("\n"):
+        data = line.encode("cp437", errors="replace")
+        if line.strip().startswith(EMPHASIZED):
+            data = BOLD_ON + data + BOLD_OFF
+        out.append(data + b"\n")
+    if cut:
+        out.append(FEED_AND_CUT)
+    return b"".join(out)
+
+
+def strip_escpos(data):
+    # Back to readable text, for the stand-in printer and tests
+    text = data
+    for code in (FEED_AND_CUT, INIT, FONT_B, BOLD_ON, BOLD_OFF):
+        text = text.replace(code, b"")
+    return text.decode("cp437")
+
+
+class TcpPrinter:
+    # Network printers listen on raw port 9100 (JetDirect)
+    def __init__(self, host, port=9100, timeout=5.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+
+    def send(self, data):
+        with socket.create_connection((self.host, self.port), timeout=self.timeout) as sock:
+            sock.sendall(data)
+
+
+class DevicePrinter:
+    # USB/serial printers exposed as a device file, e.g. /dev/usb/lp0
+    def __init__(self, path):
+        self.path = path
+
+    def send(self, data):
+        with open(self.path, "wb") as f:
+            f.write(data)
+
+
+class FakePrinter:
+    # Keeps jobs in memory; fail_times makes the next sends raise first
+    def __init__(self, fail_times=0, delay=0.0):
+        self.jobs = []
+        self.fail_times = fail_times
+        self.delay = delay
+
+    def send(self, data):
+        time.sleep(self.delay)
+        if self.fail_times:
+            self.fail_times -= 1
+            raise OSError("Printer is offline")
+        self.jobs.append(data)
+
+
+
+def printer_from_spec(spec):
+    # "tcp://host[:port]", "fake", or a device path
+    if spec == "fake":
+        return FakePrinter()
+    if spec.startswith("tcp://"):
+        host, _, port = spec[len("tcp://"):].partition(":")
+        return TcpPrinter(host, int(port or 9100))
+    return DevicePrinter(spec)
+
+
+class PrintSpooler:
+    # Renders receipts to ESC/POS and sends them to the printer from a worker
+    # thread, retrying with backoff while the printer is offline. The queue is
+    # bounded: when it is full submit() refuses the job immediately instead of
+    # blocking checkout. Outcomes reach the GUI through the callbacks.
+    def __init__(self, root, printer, on_done, on_error, maxsize=32, retries=5, retry_delay=1.0):
+        self.printer = printer
+        self.on_error = on_error
+        self.jobs = 0
+        self.queue = BackgroundWriter(root, on_done, on_error, maxsize=maxsize, retries=retries,
+                                      retry_delay=retry_delay)
+
+    def submit(self, text, name="Receipt"):
+        # name only labels the job in status and error messages
+        if self.queue.keys.full():
+            self.on_error(f"The printer queue is full; {name.lower()} was not printed")
+            return False
+        self.jobs += 1
+        data = render_escpos(text)
+        return self.queue.submit(("print", self.jobs), lambda: self.printer.send(data),
+                                 f"{name} printed", f"Printer failed on {name.lower()}", timeout=0)
+
+    def close(self, timeout=2.0):
+        # Receipts still waiting are given up on rather than holding up exit; every
+        # receipt is in the archive and can be reprinted from there
+        self.queue.close(timeout, discard=True)
+
+
+class StandInHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        data = self.rfile.read()
+        server = self.server
+        with server.lock:
+            server.count += 1
+            job = server.count
+        if server.out_dir:
+            with open(os.path.join(server.out_dir, f"job-{job:06d}.bin"), "wb") as f:
+                f.write(data)
+        print(f"--- job {job} ({len(data)} bytes) ---")
+        print(strip_escpos(data))
+
+
+def serve_stand_in(host, port, out_dir=None):
+    # A pretend network printer for trying the spooler without hardware
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    socketserver.ThreadingTCPServer.allow_reuse_address = True
+    with socketserver.ThreadingTCPServer((host, port), StandInHandler) as server:
+        server.lock = threading.Lock()
+        server.count = 0
+        server.out_dir = out_dir
+        print(f"Stand-in printer listening on {host}:{port}")
+        server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in ESC/POS network printer")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--save", help="Directory to keep the raw jobs in")
+    args = parser.parse_args()
+    serve_stand_in(args.host, args.port, args.save)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+import argparse
+import os
+import struct
+import sys
+import threading
+import zlib
+from datetime import date, datetime
+
+
+# Receipts are short and almost all template, so each one is compressed with
+# this text as a preset dictionary. Never change it: stored records need it to
+# decompress. A new dictionary needs a new FORMAT code.
+ZDICT = ("=" * 50 + "\n" + "-" * 50 + "\nPLAYSTATION RECEIPT\nDate:\nRoom:\nPlayer:\nContact:\nStart Time:\n"
+         "End Time:\nDuration:\nConsole:\nGame Mode:\nHourly Rate:\nGaming Cost:\nBar Items:\n"
+         "Bar Items Cost:\nTOTAL COST:\nTHANK YOU!\n hours EGP PS4 PS5 Single Multi None "
+         "Pepsi Tea Coffee Water Chips Chocolate Juice Soda x1 x2 " + " " * 25).encode("utf-8")
+FORMAT = 1
+
+# Segment record: format, payload length, crc32 of the payload, then the payload
+RECORD = struct.Struct("<BII")
+# Index entry: print number, receipt id (0 for a running session), day as
+# yyyymmdd, segment number, offset of the record, payload length
+ENTRY = struct.Struct("<IIIIII")
+
+
+class ReceiptArchive:
+    # Every printed receipt, appended to rolling segment files
+    # (segment-000001.dat, ...) and located through a fixed-width index file.
+    # The whole index is held in memory, so reprinting any receipt is one seek
+    # and one read. Prints are buffered by add() and written by flush(), which
+    # the owner runs off the GUI thread; get() answers unflushed prints from memory.
+    def __init__(self, directory, segment_bytes=4 << 20):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.lock = threading.RLock()
+        self.pending = []
+        os.makedirs(directory, exist_ok=True)
+
+        self.entries = []  # (print_no, receipt_id, day, segment, offset, length) in print order
+        self.by_receipt = {}
+        self.by_day = {}
+        self.index_path = os.path.join(directory, "index.dat")
+        self._load_index()
+        self.next_print = self.entries[-1][0] + 1 if self.entries else 1
+        self.segment = self.entries[-1][3] if self.entries else 1
+        self.index = open(self.index_path, "ab")
+        self.data = open(self._segment_path(self.segment), "ab")
+
+    def _segment_path(self, segment):
+        return os.path.join(self.directory, f"segment-{segment:06d}.dat")
+
+    def _load_index(self):
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, "rb") as f:
+            raw = f.read()
+        # A crash can leave a torn last entry, or entries whose record never reached
+        # the segment; both are dropped
+        sizes = {}
+        valid = 0
+        for entry in ENTRY.iter_unpack(raw[:len(raw) - len(raw) % ENTRY.size]):
+            segment, offset, length = entry[3], entry[4], entry[5]
+            if segment not in sizes:
+                path = self._segment_path(segment)
+                sizes[segment] = os.path.getsize(path) if os.path.exists(path) else 0
+            if offset + RECORD.size + length > sizes[segment]:
+                break
+            self._remember(entry)
+            valid += ENTRY.size
+        if valid != len(raw):
+            with open(self.index_path, "r+b") as f:
+                f.truncate(valid)
+
+    def _remember(self, entry):
+        self.entries.append(entry)
+        if entry[1]:
+            self.by_receipt[entry[1]] = entry
+        self.by_day.setdefault(entry[2], []).append(entry)
+
+    def add(self, text, receipt_id=None, printed_at=None):
+        # Returns the print number; cheap enough for the GUI thread
+        with self.lock:
+            print_no = self.next_print
+            self.next_print += 1
+            printed_at = printed_at or datetime.now()
+            day = printed_at.year * 10000 + printed_at.month * 100 + printed_at.day
+            self.pending.append((print_no, receipt_id or 0, day, text))
+            return print_no
+
+    def flush(self):
+        with self.lock:
+            if not self.pending:
+                return
+            index_size = self.index.tell()
+            entries = []
+            try:
+                for print_no, receipt_id, day, text in self.pending:
+                    if self.data.tell() >= self.segment_bytes:
+                        self.data.close()
+                        self.segment += 1
+                        self.data = open(self._segment_path(self.segment), "ab")
+                    compressor = zlib.compressobj(6, zdict=ZDICT)
+                    payload = compressor.compress(text.encode("utf-8")) + compressor.flush()
+                    offset = self.data.tell()
+                    self.data.write(RECORD.pack(FORMAT, len(payload), zlib.crc32(payload)) + payload)
+                    entries.append((print_no, receipt_id, day, self.segment, offset, len(payload)))
+                # Records reach the disk before the index entries that point at them
+                self.data.flush()
+                os.fsync(self.data.fileno())
+                self.index.write(b"".join(ENTRY.pack(*entry) for entry in entries))
+                self.index.flush()
+                os.fsync(self.index.fileno())
+            except OSError:
+                # The prints stay pending for the retry. Records already written are left
+                # unreferenced in the segment; a partly written index is cut back.
+                self._reopen(index_size)
+                raise
+            self.pending = []
+            for entry in entries:
+                self._remember(entry)
+
+    def _reopen(self, index_size):
+        # Drops whatever the failed flush left in the file buffers
+        for f in (self.data, self.index):
+            try:
+                f.close()
+            except OSError:
+                pass
+        self.index = open(self.index_path, "ab")
+        self.index.truncate(index_size)
+        self.data = open(self._segment_path(self.segment), "ab")
+
+    def _read(self, entry, handles=None):
+        _, _, _, segment, offset, length = entry
+        f = handles.get(segment) if handles is not None else None
+        if f is None:
+            f = open(self._segment_path(segment), "rb")
+            if handles is not None:
+                handles[segment] = f
+        try:
+            f.seek(offset)
+            fmt, size, crc = RECORD.unpack(f.read(RECORD.size))
+            payload = f.read(size)
+        finally:
+            if handles is None:
+                f.close()
+        if fmt != FORMAT or zlib.crc32(payload) != crc:
+            raise ValueError(f"Receipt print #{entry[0]} is damaged")
+        decompressor = zlib.decompressobj(zdict=ZDICT)
+        return (decompressor.decompress(payload) + decompressor.flush()).decode("utf-8")
+
+    def get(self, receipt_id):
+        # Latest print of a completed receipt, or None if it was never printed
+        with self.lock:
+            # A print still waiting for flush() is answered from memory, so the GUI never waits on the disk
+            for _, pending_id, _, text in reversed(self.pending):
+                if pending_id == receipt_id:
+                    return text
+            entry = self.by_receipt.get(receipt_id)
+            return self._read(entry) if entry else None
+
+    def iter_day(self, day):
+        # Texts of every receipt printed on `day` (a date), in print order
+        with self.lock:
+            self.flush()
+            entries = list(self.by_day.get(day.year * 10000 + day.month * 100 + day.day, ()))
+        handles = {}
+        try:
+            for entry in entries:
+                yield self._read(entry, handles)
+        finally:
+            for f in handles.values():
+                f.close()
+
+    def export_day(self, day, out):
+        # Writes one day's receipts to a text stream; returns how many there were
+        count = 0
+        for text in self.iter_day(day):
+            out.write(text)
+            count += 1
+        return count
+
+    def close(self):
+        with self.lock:
+            self.flush()
+            self.data.close()
+            self.index.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read the receipt archive")
+    parser.add_argument("directory", help="Archive directory (receipts/ next to the app)")
+    parser.add_argument("--day", help="Export every receipt printed on YYYY-MM-DD")
+    parser.add_argument("--receipt", type=int, help="Print one receipt by its id")
+    args = parser.parse_args()
+
+    archive = ReceiptArchive(args.directory)
+    try:
+        if args.receipt is not None:
+            text = archive.get(args.receipt)
+            if text is None:
+                sys.exit(f"Receipt #{args.receipt} was never printed")
+            sys.stdout.write(text)
+        elif args.day:
+            archive.export_day(date.fromisoformat(args.day), sys.stdout)
+        else:
+            print(f"{len(archive.entries)} receipts in {archive.segment} segment(s)")
+    finally:
+        archive.close()
+
+
+if __name__ == "__main__":
+    main()
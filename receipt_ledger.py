@@ -0,0 +1,175 @@
+import json
+import sqlite3
+import threading
+
+
+RECEIPT_COLUMNS = ("id", "room", "console", "player", "contact", "start_time", "end_time", "duration",
+                   "mode", "hourly_rate", "gaming_cost", "bar_items", "bar_items_cost", "total_cost", "segments")
+# Columns stored as JSON text
+JSON_COLUMNS = ("bar_items", "segments")
+
+
+class ReceiptLedger:
+    # Durable receipt history in SQLite (WAL mode). New receipts are buffered and
+    # inserted in batches. Reads combine the committed rows with the buffer, so
+    # callers see their own writes without a read ever writing to SQLite. Indexes
+    # cover the columns the GUI and reports filter on. With auto_flush=False the
+    # owner decides when (and on which thread) to flush.
+    def __init__(self, path, batch_size=50, auto_flush=True):
+        self.path = path
+        self.batch_size = batch_size
+        self.auto_flush = auto_flush
+        self.buffer = []
+        self.lock = threading.RLock()
+
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS receipts (
+                id INTEGER PRIMARY KEY,
+                room TEXT NOT NULL,
+                console TEXT NOT NULL,
+                player TEXT,
+                contact TEXT,
+                start_time TEXT,
+                end_time TEXT NOT NULL,
+                duration TEXT,
+                mode TEXT,
+                hourly_rate REAL,
+                gaming_cost REAL,
+                bar_items TEXT,
+                bar_items_cost REAL,
+                total_cost REAL,
+                segments TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_receipts_room ON receipts (room, end_time);
+            CREATE INDEX IF NOT EXISTS idx_receipts_console ON receipts (console, end_time);
+            CREATE INDEX IF NOT EXISTS idx_receipts_player ON receipts (player);
+            CREATE INDEX IF NOT EXISTS idx_receipts_contact ON receipts (contact);
+            CREATE INDEX IF NOT EXISTS idx_receipts_end_time ON receipts (end_time);
+        """)
+        self.conn.commit()
+        self.next_id = (self.conn.execute("SELECT MAX(id) FROM receipts").fetchone()[0] or 0) + 1
+
+    def add(self, receipt):
+        # Ids are handed out up front so a receipt can be referenced before its batch is written
+        with self.lock:
+            if receipt.get("id") is None:
+                receipt["id"] = self.next_id
+            self.next_id = max(self.next_id, receipt["id"] + 1)
+            row = tuple(json.dumps(receipt.get(c)) if c in JSON_COLUMNS else receipt.get(c) for c in RECEIPT_COLUMNS)
+            self.buffer.append(row)
+            if self.auto_flush and len(self.buffer) >= self.batch_size:
+                self.flush()
+            return receipt["id"]
+
+    def flush(self):
+        with self.lock:
+            if not self.buffer:
+                return
+            with self.conn:
+                # OR IGNORE makes replaying receipts from the session journal idempotent
+                self.conn.executemany(
+                    f"INSERT OR IGNORE INTO receipts ({', '.join(RECEIPT_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * len(RECEIPT_COLUMNS))})", self.buffer)
+            # Only dropped once committed, so a failed flush is retried with the same rows
+            self.buffer = []
+
+    def _pending(self, match):
+        # Buffered receipts accepted by `match` that are not committed yet; a receipt
+        # replayed from the journal can be in both, and the committed copy wins
+        # because the INSERT ignores the buffered one
+        receipts = {}
+        for row in self.buffer:
+            receipt = dict(zip(RECEIPT_COLUMNS, row))
+            if receipt["id"] not in receipts and match(receipt):
+                receipts[receipt["id"]] = receipt
+        if receipts:
+            ids = list(receipts)
+            committed = self.conn.execute(f"SELECT id FROM receipts WHERE id IN ({', '.join('?' * len(ids))})", ids)
+            for (receipt_id,) in committed:
+                del receipts[receipt_id]
+        return list(receipts.values())
+
+    def _query(self, sql, params, match, key=None, reverse=False, limit=None):
+        # Committed rows merged with the matching buffered ones, re-sorted by `key` and
+        # cut to `limit`; the SQL applies the same order and limit to the committed part
+        with self.lock:
+            rows = [dict(row) for row in self.conn.execute(sql, params)]
+            pending = self._pending(match)
+        if pending:
+            rows += pending
+            if key is not None:
+                rows.sort(key=key, reverse=reverse)
+            if limit is not None:
+                rows = rows[:limit]
+        return [self._to_receipt(row) for row in rows]
+
+    def _to_receipt(self, row):
+        receipt = dict(row)
+        receipt["bar_items"] = json.loads(receipt["bar_items"] or "{}")
+        receipt["segments"] = json.loads(receipt["segments"] or "null") or []
+        return receipt
+
+    def get(self, receipt_id):
+        rows = self._query("SELECT * FROM receipts WHERE id = ?", (receipt_id,), lambda r: r["id"] == receipt_id)
+        return rows[0] if rows else None
+
+    def recent(self, limit=50):
+        return self._query("SELECT * FROM receipts ORDER BY id DESC LIMIT ?", (limit,), lambda r: True,
+                           key=lambda r: r["id"], reverse=True, limit=limit)
+
+    def _latest(self, column, value, limit):
+        return self._query(f"SELECT * FROM receipts WHERE {column} = ? ORDER BY end_time DESC LIMIT ?", (value, limit),
+                           lambda r: r[column] == value, key=lambda r: r["end_time"], reverse=True, limit=limit)
+
+    def by_room(self, room, limit=50):
+        return self._latest("room", room, limit)
+
+    def by_contact(self, contact, limit=50):
+        return self._latest("contact", contact, limit)
+
+    def by_player(self, player, limit=50):
+        return self._latest("player", player, limit)
+
+    def between(self, start, end):
+        # start/end are "YYYY-mm-dd HH:MM:SS" strings, which sort the same as the times they hold
+        return self._query("SELECT * FROM receipts WHERE end_time >= ? AND end_time < ? ORDER BY end_time",
+                           (start, end), lambda r: start <= r["end_time"] < end, key=lambda r: r["end_time"])
+
+    def console_totals(self, start, end):
+        with self.lock:
+            totals = {console: [count, total] for console, count, total in self.conn.execute(
+                "SELECT console, COUNT(*), COALESCE(SUM(total_cost), 0) FROM receipts "
+                "WHERE end_time >= ? AND end_time < ? GROUP BY console", (start, end))}
+            pending = self._pending(lambda r: start <= r["end_time"] < end)
+        for receipt in pending:
+            figures = totals.setdefault(receipt["console"], [0, 0])
+            figures[0] += 1
+            figures[1] += receipt["total_cost"] or 0
+        return [(console, count, total) for console, (count, total) in sorted(totals.items())]
+
+    def customer_totals(self):
+        # One row per contact with the name on its latest receipt, used to seed the customer index
+        with self.lock:
+            rows = {row[0]: list(row) for row in self.conn.execute(
+                "SELECT r.contact, r.player, t.visits, t.spend, t.last_visit, t.id FROM receipts r JOIN "
+                "(SELECT MAX(id) AS id, COUNT(*) AS visits, COALESCE(SUM(total_cost), 0) AS spend, "
+                "MAX(end_time) AS last_visit FROM receipts GROUP BY contact) t ON r.id = t.id")}
+            pending = self._pending(lambda r: True)
+        for receipt in sorted(pending, key=lambda r: r["id"]):
+            row = rows.setdefault(receipt["contact"], [receipt["contact"], receipt["player"], 0, 0, None, 0])
+            row[2] += 1
+            row[3] += receipt["total_cost"] or 0
+            row[4] = max(row[4] or "", receipt["end_time"])
+            if receipt["id"] > row[5]:
+                row[1] = receipt["player"]
+                row[5] = receipt["id"]
+        return [tuple(row) for row in rows.values()]
+
+    def close(self):
+        with self.lock:
+            self.flush()
+            self.conn.close()
@@ -0,0 +1,273 @@
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class Totals:
+    # Aggregates for one (branch, day); partial totals from different chunks
+    # of the same day are combined with merge(), so a day may be split freely
+    __slots__ = ("sessions", "hours", "gaming", "bar", "revenue", "consoles", "bar_items", "hourly")
+
+    def __init__(self):
+        self.sessions = 0
+        self.hours = 0.0
+        self.gaming = 0.0
+        self.bar = 0.0
+        self.revenue = 0.0
+        self.consoles = {}   # console -> [sessions, hours, revenue]
+        self.bar_items = {}  # item -> quantity
+        self.hourly = [0] * 24  # sessions by the hour they started
+
+    def add(self, console, start_time, end_time, gaming, bar, total, bar_items):
+        start = datetime.fromisoformat(start_time) if start_time else None
+        end = datetime.fromisoformat(end_time)
+        hours = (end - start).total_seconds() / 3600 if start else 0.0
+        self.sessions += 1
+        self.hours += hours
+        self.gaming += gaming or 0
+        self.bar += bar or 0
+        self.revenue += total or 0
+        figures = self.consoles.setdefault(console, [0, 0.0, 0.0])
+        figures[0] += 1
+        figures[1] += hours
+        figures[2] += total or 0
+        for item, qty in (bar_items or {}).items():
+            self.bar_items[item] = self.bar_items.get(item, 0) + qty
+        if start:
+            self.hourly[start.hour] += 1
+
+    def merge(self, other):
+        self.sessions += other.sessions
+        self.hours += other.hours
+        self.gaming += other.gaming
+        self.bar += other.bar
+        self.revenue += other.revenue
+        for console, (sessions, hours, revenue) in other.consoles.items():
+            figures = self.consoles.setdefault(console, [0, 0.0, 0.0])
+            figures[0] += sessions
+            figures[1] += hours
+            figures[2] += revenue
+        for item, qty in other.bar_items.items():
+            self.bar_items[item] = self.bar_items.get(item, 0) + qty
+        for hour, count in enumerate(other.hourly):
+            self.hourly[hour] += count
+        return self
+
+    def as_dict(self):
+        return {
+            "sessions": self.sessions,
+            "hours": round(self.hours, 2),
+            "gaming_cost": round(self.gaming, 2),
+            "bar_cost": round(self.bar, 2),
+            "revenue": round(self.revenue, 2),
+            "consoles": {console: {"sessions": s, "hours": round(h, 2), "revenue": round(r, 2)}
+                         for console, (s, h, r) in sorted(self.consoles.items())},
+            "bar_items": dict(sorted(self.bar_items.items())),
+            "sessions_by_hour": list(self.hourly),
+        }
+
+
+# A source is (branch, kind, path): kind "ledger" is one branch's receipts.db,
+# "head_office" is the aggregator database from branch_sync.py (branch is None
+# there, every branch in it is reported). Work is split into chunks of rowids
+# so each worker runs one primary-key range scan.
+
+SOURCE_QUERIES = {
+    "ledger": ("SELECT MIN(id), MAX(id) FROM receipts",
+               "SELECT ?, console, start_time, end_time, gaming_cost, bar_items_cost, total_cost, bar_items "
+               "FROM receipts WHERE id BETWEEN ? AND ? AND end_time >= ? AND end_time < ?"),
+    "head_office": ("SELECT MIN(rowid), MAX(rowid) FROM records",
+                    "SELECT branch, json_extract(data, '$.console'), json_extract(data, '$.start_time'), "
+                    "json_extract(data, '$.end_time') AS end_time, json_extract(data, '$.gaming_cost'), "
+                    "json_extract(data, '$.bar_items_cost'), json_extract(data, '$.total_cost'), "
+                    "json_extract(data, '$.bar_items') FROM records "
+                    "WHERE rowid BETWEEN ? AND ? AND kind = 'session' AND end_time >= ? AND end_time < ?"),
+}
+
+
+def connect_read_only(path):
+    return sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", uri=True)
+
+
+def plan(sources, chunk_rows):
+    # [(kind, path, branch, first rowid, last rowid)] covering every source
+    tasks = []
+    for branch, kind, path in sources:
+        conn = connect_read_only(path)
+        try:
+            first, last = conn.execute(SOURCE_QUERIES[kind][0]).fetchone()
+        finally:
+            conn.close()
+        if first is None:
+            continue
+        for lo in range(first, last + 1, chunk_rows):
+            tasks.append((kind, path, branch, lo, min(last, lo + chunk_rows - 1)))
+    return tasks
+
+
+def aggregate_chunk(task, start, end):
+    # Runs in a worker process: {(branch, day): Totals} for one rowid range
+    kind, path, branch, lo, hi = task
+    conn = connect_read_only(path)
+    partials = {}
+    try:
+        query = SOURCE_QUERIES[kind][1]
+        params = (branch, lo, hi, start, end) if kind == "ledger" else (lo, hi, start, end)
+        for row_branch, console, start_time, end_time, gaming, bar, total, bar_items in conn.execute(query, params):
+            key = (row_branch, end_time[:10])
+            totals = partials.get(key)
+            if totals is None:
+                totals = partials[key] = Totals()
+            totals.add(console, start_time, end_time, gaming, bar, total, json.loads(bar_items or "null"))
+    finally:
+        conn.close()
+    return partials
+
+
+def _aggregate_chunk(args):
+    return aggregate_chunk(*args)
+
+
+def build_report(sources, start, end, workers=None, chunk_rows=20000):
+    # {(branch, day): Totals} for receipts that ended in [start, end); start and end are dates.
+    # workers=1 runs in this process, which is simpler to debug and profile.
+    start_text = start.strftime(TIME_FORMAT)
+    end_text = end.strftime(TIME_FORMAT)
+    jobs = [(task, start_text, end_text) for task in plan(sources, chunk_rows)]
+    if workers == 1:
+        return merge_partials(map(_aggregate_chunk, jobs))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Partials are merged here as they arrive, in task order
+        return merge_partials(pool.map(_aggregate_chunk, jobs))
+
+
+def merge_partials(results):
+    merged = {}
+    for partials in results:
+        for key, totals in partials.items():
+            if key in merged:
+                merged[key].merge(totals)
+            else:
+                merged[key] = totals
+    return merged
+
+
+def branch_totals(merged):
+    # {branch: Totals over every day}, plus "ALL" over every branch
+    totals = {}
+    for (branch, _), day_totals in merged.items():
+        totals.setdefault(branch, Totals()).merge(day_totals)
+        totals.setdefault("ALL", Totals()).merge(day_totals)
+    return totals
+
+
+def write_text(merged, start, end, out):
+    totals = branch_totals(merged)
+    out.write(f"{'=' * 50}\n{'PERIOD REPORT'.center(50)}\n{'=' * 50}\n")
+    last_day = end - timedelta(days=1)
+    out.write(f"{'From:':<25}{start.isoformat():>25}\n{'To:':<25}{last_day.isoformat():>25}\n")
+    for branch in sorted(b for b in totals if b != "ALL") + ["ALL"]:
+        branch_total = totals.get(branch)
+        if branch_total is None:
+            continue
+        title = "ALL BRANCHES" if branch == "ALL" else f"BRANCH {branch}"
+        out.write(f"{'=' * 50}\n{title.center(50)}\n{'=' * 50}\n")
+        if branch != "ALL":
+            for (_, day), day_totals in sorted(item for item in merged.items() if item[0][0] == branch):
+                out.write(f"{day:<14}{day_totals.sessions:>8} sessions{day_totals.revenue:>15.2f} EGP\n")
+            out.write(f"{'-' * 50}\n")
+        out.write(f"{'Total Sessions:':<25}{branch_total.sessions:>25}\n")
+        out.write(f"{'Total Revenue:':<25}{branch_total.revenue:>21.2f} EGP\n")
+        out.write(f"{'Gaming Revenue:':<25}{branch_total.gaming:>21.2f} EGP\n")
+        out.write(f"{'Bar Revenue:':<25}{branch_total.bar:>21.2f} EGP\n")
+        out.write(f"{'Hours Played:':<25}{branch_total.hours:>25.2f}\n")
+        for console, (sessions, hours, revenue) in sorted(branch_total.consoles.items()):
+            out.write(f"{console + ' sessions:':<25}{sessions:>25}\n")
+            out.write(f"{console + ' revenue:':<25}{revenue:>21.2f} EGP\n")
+        for item, qty in sorted(branch_total.bar_items.items(), key=lambda kv: -kv[1])[:5]:
+            out.write(f"{item + ' sold:':<25}{qty:>25}\n")
+        if branch_total.sessions:
+            busiest = max(range(24), key=lambda hour: branch_total.hourly[hour])
+            out.write(f"{'Busiest start hour:':<25}{f'{busiest:02d}:00':>25}\n")
+    out.write("=" * 50 + "\n")
+
+
+def write_csv(merged, out):
+    # One row per branch, day and console
+    writer = csv.writer(out)
+    writer.writerow(["branch", "day", "console", "sessions", "hours", "revenue"])
+    for (branch, day), totals in sorted(merged.items()):
+        for console, (sessions, hours, revenue) in sorted(totals.consoles.items()):
+            writer.writerow([branch, day, console, sessions, f"{hours:.2f}", f"{revenue:.2f}"])
+
+
+def write_json(merged, start, end, out):
+    totals = branch_totals(merged)
+    branches = {}
+    for (branch, day), day_totals in sorted(merged.items()):
+        branches.setdefault(branch, {"days": {}})["days"][day] = day_totals.as_dict()
+    for branch, entry in branches.items():
+        entry["totals"] = totals[branch].as_dict()
+    json.dump({"from": start.isoformat(), "to": end.isoformat(), "branches": branches,
+               "totals": totals["ALL"].as_dict() if "ALL" in totals else Totals().as_dict()}, out, indent=1)
+    out.write("\n")
+
+
+def parse_source(text, kind):
+    # "branch=path" for a ledger, or just the path (branch from its directory name)
+    if kind == "head_office":
+        return None, kind, text
+    branch, _, path = text.rpartition("=")
+    return branch or os.path.basename(os.path.dirname(os.path.abspath(path))), kind, path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Month-end and per-branch reports over receipt data")
+    parser.add_argument("--ledger", action="append", default=[], metavar="[BRANCH=]receipts.db",
+                        help="A branch's receipt ledger; repeat for several branches")
+    parser.add_argument("--head-office", action="append", default=[], metavar="head_office.db",
+                        help="Aggregator database with every synced branch")
+    parser.add_argument("--from", dest="start", required=True, help="First day, YYYY-MM-DD")
+    parser.add_argument("--to", dest="end", help="Last day, YYYY-MM-DD (default: the first day)")
+    parser.add_argument("--out", default="report", help="Output path without extension")
+    parser.add_argument("--formats", default="txt,csv,json", help="Any of txt,csv,json")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument("--chunk", type=int, default=20000, help="Receipts per work item")
+    args = parser.parse_args()
+
+    sources = ([parse_source(text, "ledger") for text in args.ledger] +
+               [parse_source(text, "head_office") for text in args.head_office])
+    if not sources:
+        parser.error("give at least one --ledger or --head-office")
+    start = date.fromisoformat(args.start)
+    end = date.fromisoformat(args.end or args.start) + timedelta(days=1)
+
+    started = time.perf_counter()
+    merged = build_report(sources, start, end, args.workers, args.chunk)
+    formats = args.formats.split(",")
+    if "txt" in formats:
+        with open(args.out + ".txt", "w", encoding="utf-8") as f:
+            write_text(merged, start, end, f)
+    if "csv" in formats:
+        with open(args.out + ".csv", "w", encoding="utf-8", newline="") as f:
+            write_csv(merged, f)
+    if "json" in formats:
+        with open(args.out + ".json", "w", encoding="utf-8") as f:
+            write_json(merged, start, end, f)
+    sessions = sum(totals.sessions for totals in merged.values())
+    print(f"{sessions} sessions over {len({day for _, day in merged})} days and "
+          f"{len({branch for branch, _ in merged})} branches in {time.perf_counter() - started:.2f}s",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+import bisect
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+from customer_index import normalize_phone
+
+
+class ReservationError(Exception):
+    pass
+
+
+class Reservation:
+    __slots__ = ("id", "room", "player", "contact", "start", "end")
+
+    def __init__(self, reservation_id, room, player, contact, start, end):
+        self.id = reservation_id
+        self.room = room
+        self.player = player
+        self.contact = contact
+        self.start = start
+        self.end = end
+
+
+class ReservationBook:
+    # Future bookings per room. A room's reservations never overlap, so keeping
+    # them sorted by start time is all the interval index needs: a conflict
+    # check, "is this room held soon" and "first gap after t" are each one
+    # bisect. A customer who has not arrived `grace` after their start time
+    # no longer holds the room. Changes are written to SQLite by flush().
+    def __init__(self, path, grace=timedelta(minutes=15)):
+        self.path = path
+        self.grace = grace
+        self.lock = threading.RLock()
+        self.by_room = {}     # room -> ([start times], [reservations]) in start order
+        self.by_id = {}
+        self.by_contact = {}  # normalized phone -> {id: reservation}
+        self.changed = {}     # id -> reservation, or None once cancelled
+
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS reservations (
+                id INTEGER PRIMARY KEY,
+                room TEXT NOT NULL,
+                player TEXT,
+                contact TEXT,
+                start_time TEXT NOT NULL,
+                end_time TEXT NOT NULL
+            )
+        """)
+        self.conn.commit()
+        for row in self.conn.execute("SELECT id, room, player, contact, start_time, end_time FROM reservations"):
+            self._insert(Reservation(row[0], row[1], row[2], row[3],
+                                     datetime.fromisoformat(row[4]), datetime.fromisoformat(row[5])))
+        self.next_id = max(self.by_id, default=0) + 1
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def _insert(self, reservation):
+        starts, booked = self.by_room.setdefault(reservation.room, ([], []))
+        i = bisect.bisect_left(starts, reservation.start)
+        starts.insert(i, reservation.start)
+        booked.insert(i, reservation)
+        self.by_id[reservation.id] = reservation
+        self.by_contact.setdefault(normalize_phone(reservation.contact), {})[reservation.id] = reservation
+
+    def _remove(self, reservation):
+        starts, booked = self.by_room[reservation.room]
+        i = bisect.bisect_left(starts, reservation.start)
+        del starts[i]
+        del booked[i]
+        del self.by_id[reservation.id]
+        del self.by_contact[normalize_phone(reservation.contact)][reservation.id]
+
+    def conflict(self, room, start, end):
+        # The reservation overlapping [start, end) in this room, if any
+        starts, booked = self.by_room.get(room, ((), ()))
+        i = bisect.bisect_left(starts, start)
+        if i > 0 and booked[i - 1].end > start:
+            return booked[i - 1]
+        if i < len(starts) and starts[i] < end:
+            return booked[i]
+        return None
+
+    def add(self, room, player, contact, start, end, now=None, busy=None):
+        # now rejects a start in the past; busy is {room: end of its current session}
+        # as for next_free_slot()
+        if end <= start:
+            raise ReservationError("A reservation must end after it starts")
+        if now is not None and start < now:
+            raise ReservationError("A reservation cannot start in the past")
+        if busy and room in busy:
+            until = busy[room]
+            if until is None:
+                raise ReservationError(f"{room} is in use with no end time")
+            if start < until:
+                raise ReservationError(f"{room} is in use until {until:%a %H:%M}")
+        with self.lock:
+            clash = self.conflict(room, start, end)
+            if clash is not None:
+                raise ReservationError(f"{room} is already reserved {clash.start:%a %H:%M}-{clash.end:%H:%M}")
+            reservation = Reservation(self.next_id, room, player, contact, start, end)
+            self.next_id += 1
+            self._insert(reservation)
+            self.changed[reservation.id] = reservation
+            return reservation
+
+    def cancel(self, reservation_id):
+        # Also used when a customer checks in: the reservation has become a session
+        with self.lock:
+            reservation = self.by_id.get(reservation_id)
+            if reservation is None:
+                raise ReservationError(f"No reservation #{reservation_id}")
+            self._remove(reservation)
+            self.changed[reservation_id] = None
+            return reservation
+
+    def holder(self, room, now, horizon):
+        # The reservation keeping this room free, i.e. one that starts within
+        # `horizon` from now and whose customer is not yet a no-show
+        starts, booked = self.by_room.get(room, ((), ()))
+        i = bisect.bisect_right(starts, now - self.grace)
+        if i < len(starts) and starts[i] < now + horizon:
+            return booked[i]
+        return None
+
+    def held_rooms(self, now, horizon):
+        return {room for room in self.by_room if self.holder(room, now, horizon) is not None}
+
+    def due(self, contact, now, horizon):
+        # The earliest reservation of this customer that they could check in to now
+        upcoming = [r for r in self.by_contact.get(normalize_phone(contact), {}).values()
+                    if now - self.grace < r.start < now + horizon]
+        return min(upcoming, key=lambda r: r.start, default=None)
+
+    def first_gap(self, room, duration, after):
+        # Earliest start >= after at which this room is free for `duration`
+        starts, booked = self.by_room.get(room, ((), ()))
+        i = bisect.bisect_left(starts, after)
+        candidate = after
+        if i > 0 and booked[i - 1].end > candidate:
+            candidate = booked[i - 1].end
+        while i < len(starts) and starts[i] < candidate + duration:
+            candidate = max(candidate, booked[i].end)
+            i += 1
+        return candidate
+
+    def next_free_slot(self, rooms, duration, after, busy=None):
+        # (start, room) of the earliest slot among `rooms`, e.g. every PS5. busy maps
+        # rooms in use to the end of their session, or None for an open-ended one,
+        # which keeps the room out of the search.
+        best = None
+        busy = busy or {}
+        for room in rooms:
+            if room in busy:
+                if busy[room] is None:
+                    continue
+                start = self.first_gap(room, duration, max(after, busy[room]))
+            else:
+                start = self.first_gap(room, duration, after)
+            if best is None or start < best[0]:
+                best = (start, room)
+                if start == after:
+                    break
+        return best
+
+    def prune(self, before):
+        # Drop reservations that ended before `before`, e.g. no-shows from earlier days
+        with self.lock:
+            for reservation in [r for r in self.by_id.values() if r.end < before]:
+                self._remove(reservation)
+                self.changed[reservation.id] = None
+
+    def flush(self):
+        with self.lock:
+            if not self.changed:
+                return
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO reservations VALUES (?, ?, ?, ?, ?, ?)",
+                    [(r.id, r.room, r.player, r.contact, r.start.isoformat(), r.end.isoformat())
+                     for r in self.changed.values() if r is not None])
+                self.conn.executemany("DELETE FROM reservations WHERE id = ?",
+                                      [(i,) for i, r in self.changed.items() if r is None])
+            # Only cleared once committed, so a failed flush is retried with the same changes
+            self.changed = {}
+
+    def close(self):
+        with self.lock:
+            self.flush()
+            self.conn.close()
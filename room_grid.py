@@ -0,0 +1,166 @@
+import tkinter as tk
+from datetime import datetime
+
+
+class VirtualRoomGrid:
+    # Room status grid that only builds tiles for the rows visible inside the
+    # outer scroll canvas. Tiles are pooled and rebound while scrolling, and a
+    # tile is redrawn only when its room changed or it was rebound to a new room.
+    def __init__(self, parent, engine, scroll_canvas, columns=3, tile_height=125, overscan=1, live_text=None,
+                 now=datetime.now):
+        self.parent = parent
+        self.engine = engine
+        self.scroll_canvas = scroll_canvas
+        self.columns = columns
+        self.tile_height = tile_height
+        self.overscan = overscan
+        # live_text(rooms, now) -> {room: {label key: text}} for time-dependent labels
+        self.live_text = live_text
+        self.now = now
+
+        self.order = list(engine.rooms.keys())
+        self.bound = {}      # room -> tile currently showing it
+        self.pool = []       # detached tiles ready for reuse
+        self.dirty = set()
+        self._flush_pending = False
+
+        self.container = tk.Frame(parent, bg="#000000", height=self._height())
+        self.container.pack(fill=tk.BOTH, expand=True)
+        self.container.bind("<Configure>", lambda e: self.schedule_refresh())
+
+        engine.subscribe(self._on_room_changed)
+
+    def _height(self):
+        return max((len(self.order) + self.columns - 1) // self.columns, 1) * self.tile_height
+
+    def _on_room_changed(self, event, room):
+        if len(self.order) != len(self.engine.rooms):
+            # A room first reported by the session server after the grid was built;
+            # rooms are only ever added, at the end, so the new ones go after the rest
+            self.order = list(self.engine.rooms.keys())
+            self.container.config(height=self._height())
+        self.mark_dirty(room.name)
+
+    def mark_dirty(self, room):
+        self.dirty.add(room)
+        self.schedule_refresh()
+
+    def schedule_refresh(self):
+        # Coalesce bursts of scroll and state events into one redraw per idle cycle
+        if not self._flush_pending:
+            self._flush_pending = True
+            self.container.after_idle(self.refresh)
+
+    def visible_rows(self):
+        rows = (len(self.order) + self.columns - 1) // self.columns
+        if not self.container.winfo_ismapped():
+            return 0, min(rows, 2 + self.overscan)
+
+        # Work out which part of the container sits inside the canvas viewport
+        viewport_height = self.scroll_canvas.winfo_height()
+        top = self.container.winfo_rooty() - self.scroll_canvas.winfo_rooty()
+        first = max(0, int(-top // self.tile_height) - self.overscan)
+        last = min(rows, int((viewport_height - top) // self.tile_height) + 1 + self.overscan)
+        return first, max(first, last)
+
+    def refresh(self):
+        self._flush_pending = False
+        first, last = self.visible_rows()
+        start = first * self.columns
+        wanted = self.order[start:last * self.columns]
+        wanted_set = set(wanted)
+
+        # Release tiles whose rooms scrolled out of view
+        for room in [r for r in self.bound if r not in wanted_set]:
+            tile = self.bound.pop(room)
+            tile["frame"].place_forget()
+            tile["room"] = None
+            self.pool.append(tile)
+
+        for offset, room in enumerate(wanted):
+            tile = self.bound.get(room)
+            if tile is None:
+                tile = self.pool.pop() if self.pool else self._create_tile()
+                self.bound[room] = tile
+                tile["room"] = room
+                i = start + offset
+                tile["frame"].place(relx=(i % self.columns) / self.columns,
+                                    y=(i // self.columns) * self.tile_height,
+                                    relwidth=1 / self.columns,
+                                    height=self.tile_height)
+                self._draw(tile, room)
+            elif room in self.dirty:
+                self._draw(tile, room)
+
+        # Off-screen rooms are drawn fresh when they are bound, so drop their dirty flags too
+        self.dirty.clear()
+
+    def _create_tile(self):
+        frame = tk.Frame(self.container, bg="#000000", bd=1, relief=tk.SOLID,
+                         highlightbackground="#5c7cfa", highlightthickness=1)
+        tile = {
+            "frame": frame,
+            "room": None,
+            "drawn": {},
+            "label": tk.Label(frame, text="", font=("Arial", 10, "bold"), bg="#000000", fg="white"),
+            "status": tk.Label(frame, text="", font=("Arial", 10, "bold"),
+                               fg="white", bg="#5c7cfa", width=12, padx=5),
+            "time": tk.Label(frame, text="", font=("Arial", 8), bg="#000000", fg="#aaaaaa"),
+            "player": tk.Label(frame, text="", font=("Arial", 9), bg="#000000", fg="white", wraplength=120),
+            "cost": tk.Label(frame, text="", font=("Arial", 9, "bold"), bg="#000000", fg="#ff9500")
+        }
+        tile["label"].pack(pady=(5, 0))
+        tile["status"].pack()
+        tile["time"].pack()
+        tile["player"].pack()
+        tile["cost"].pack(pady=(0, 5))
+        return tile
+
+    def _draw(self, tile, room):
+        info = self.engine.rooms[room]
+        if info.status == 1:
+            start_time = info.start_time.strftime("%H:%M:%S") if info.start_time else ""
+            state = {
+                "label": {"text": room},
+                "status": {"text": "OCCUPIED", "bg": "#ff0000"},
+                "time": {"text": f"Started: {start_time}"},
+                "player": {"text": f"{info.player}\n({info.contact})"},
+                "cost": {"text": ""},
+            }
+            if self.live_text is not None:
+                for key, text in self.live_text([info], self.now()).get(room, {}).items():
+                    state[key] = {"text": text}
+        else:
+            state = {
+                "label": {"text": room},
+                "status": {"text": "AVAILABLE", "bg": "#5c7cfa"},
+                "time": {"text": ""},
+                "player": {"text": ""},
+                "cost": {"text": ""},
+            }
+
+        # Only touch labels whose options actually changed since the last draw
+        drawn = tile["drawn"]
+        for key, options in state.items():
+            if drawn.get(key) != options:
+                tile[key].config(**options)
+                drawn[key] = options
+
+    def visible_occupied(self):
+        rooms = self.engine.rooms
+        return [rooms[room] for room in self.bound if rooms[room].status == 1]
+
+    def update_live(self, now):
+        # Called once per tick: recompute live labels for on-screen occupied rooms only
+        if self.live_text is None:
+            return
+        for room, labels in self.live_text(self.visible_occupied(), now).items():
+            tile = self.bound.get(room)
+            if tile is None:
+                continue
+            drawn = tile["drawn"]
+            for key, text in labels.items():
+                options = {"text": text}
+                if drawn.get(key) != options:
+                    tile[key].config(**options)
+                    drawn[key] = options
@@ -0,0 +1,172 @@
+import bisect
+
+
+class SessionError(Exception):
+    pass
+
+
+class Room:
+    # One compact record per room; __slots__ keeps thousands of rooms cheap
+    __slots__ = ("name", "type", "index", "status", "player", "contact", "start_time", "mode", "bar_items",
+                 "paid_until")
+
+    def __init__(self, name, console, index):
+        self.name = name
+        self.type = console
+        self.index = index
+        self.status = 0  # 0=available, 1=occupied
+        self.player = ""
+        self.contact = ""
+        self.start_time = None
+        self.mode = None
+        self.bar_items = {}  # item -> quantity
+        self.paid_until = None  # end of a prepaid block, None for open-ended sessions
+
+
+class SessionEngine:
+    def __init__(self):
+        self.rooms = {}
+        # Per console: free rooms as a list kept in display order (one bisect per start or
+        # end, so listing them never sorts), occupied rooms as a dict for O(1) add/remove
+        self.free = {}
+        self.occupied = {}
+        self.occupied_count = 0
+        self.listeners = []
+
+    def add_room(self, name, console):
+        if name in self.rooms:
+            raise SessionError(f"Room {name} already exists")
+        self.rooms[name] = Room(name, console, len(self.rooms))
+        self.free.setdefault(console, []).append(name)
+        self.occupied.setdefault(console, {})
+        return self.rooms[name]
+
+    def subscribe(self, callback):
+        # callback(event, room) is called after every start, end and bar mutation
+        self.listeners.append(callback)
+
+    def _notify(self, event, room):
+        for callback in self.listeners:
+            callback(event, room)
+
+    def consoles(self):
+        return list(self.free.keys())
+
+    def _take(self, room):
+        free = self.free[room.type]
+        del free[bisect.bisect_left(free, room.index, key=self._index)]
+        self.occupied[room.type][room.name] = None
+        self.occupied_count += 1
+
+    def _release(self, room):
+        del self.occupied[room.type][room.name]
+        bisect.insort(self.free[room.type], room.name, key=self._index)
+        self.occupied_count -= 1
+
+    def _index(self, name):
+        return self.rooms[name].index
+
+    def first_available(self, console, skip=()):
+        # The first free room in display order, the same order available_rooms() lists
+        return next((name for name in self.free.get(console, ()) if name not in skip), None)
+
+    def available_rooms(self, console):
+        return list(self.free.get(console, ()))
+
+    def occupied_rooms(self, console=None):
+        if console is not None:
+            names = list(self.occupied.get(console, ()))
+        else:
+            names = [name for rooms in self.occupied.values() for name in rooms]
+        return sorted(names, key=lambda name: self.rooms[name].index)
+
+    def has_active_sessions(self):
+        return self.occupied_count > 0
+
+    def is_free(self, name):
+        room = self.rooms.get(name)
+        return room is not None and room.status == 0
+
+    def start_session(self, name, player, contact, start_time, mode="Single", paid_until=None):
+        room = self.rooms.get(name)
+        if room is None:
+            raise SessionError(f"Unknown room {name}")
+        if room.status == 1:
+            raise SessionError(f"Room {name} is already occupied")
+
+        self._take(room)
+
+        room.status = 1
+        room.player = player
+        room.contact = contact
+        room.start_time = start_time
+        room.mode = mode
+        room.bar_items = {}
+        room.paid_until = paid_until
+        self._notify("start", room)
+        return room
+
+    def session(self, name):
+        # The running session in a room, in the form end_session() returns it
+        room = self.rooms.get(name)
+        if room is None:
+            raise SessionError(f"Unknown room {name}")
+        if room.status == 0:
+            raise SessionError(f"No active session in {name}")
+        return {
+            "room": name,
+            "console": room.type,
+            "player": room.player,
+            "contact": room.contact,
+            "start_time": room.start_time,
+            "mode": room.mode,
+            "bar_items": room.bar_items,
+            "paid_until": room.paid_until,
+        }
+
+    def end_session(self, name):
+        # Hand the finished session back to the caller before the room is reset
+        session = self.session(name)
+        room = self.rooms[name]
+
+        self._release(room)
+
+        room.status = 0
+        room.player = ""
+        room.contact = ""
+        room.start_time = None
+        room.mode = None
+        room.bar_items = {}
+        room.paid_until = None
+        self._notify("end", room)
+        return session
+
+    def apply_state(self, name, console, status, player="", contact="", start_time=None, mode=None, bar_items=(),
+                    paid_until=None):
+        # Overwrites a room with state received from elsewhere (e.g. a session server)
+        room = self.rooms.get(name)
+        if room is None:
+            room = self.add_room(name, console)
+        if room.status != status:
+            if status == 1:
+                self._take(room)
+            else:
+                self._release(room)
+
+        room.status = status
+        room.player = player
+        room.contact = contact
+        room.start_time = start_time
+        room.mode = mode
+        room.bar_items = dict(bar_items)
+        room.paid_until = paid_until
+        self._notify("sync", room)
+        return room
+
+    def add_bar_item(self, name, item, qty=1):
+        room = self.rooms.get(name)
+        if room is None or room.status == 0:
+            raise SessionError(f"No active session in {name}")
+        room.bar_items[item] = room.bar_items.get(item, 0) + qty
+        self._notify("bar", room)
+        return room
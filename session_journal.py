@@ -0,0 +1,152 @@
+import json
+import os
+import threading
+import time
+
+
+class SessionJournal:
+    # Write-ahead journal for live sessions. Every mutation is appended as one
+    # JSON line; a background thread writes and fsyncs whatever has queued up
+    # (group commit), so a burst of clicks costs one fsync rather than one each.
+    # A compact snapshot of the whole state periodically replaces the journal so
+    # replay on startup only has to read the snapshot plus a short tail.
+    def __init__(self, directory, commit_interval=0.05, snapshot_every=500):
+        self.directory = directory
+        self.journal_path = os.path.join(directory, "journal.log")
+        self.snapshot_path = os.path.join(directory, "snapshot.json")
+        self.commit_interval = commit_interval
+        self.snapshot_every = snapshot_every
+
+        os.makedirs(directory, exist_ok=True)
+        self.seq = 0
+        self.since_snapshot = 0
+        self.pending = []
+        self.pending_snapshot = None
+        self.lock = threading.Lock()
+        self.io_lock = threading.Lock()
+        self.wakeup = threading.Condition(self.lock)
+        self.closed = False
+
+        self.file = None
+        self.thread = None
+
+    def open(self):
+        # Load before opening for append so seq continues where the last run stopped
+        state, records = self.load()
+        self.file = open(self.journal_path, "a", encoding="utf-8")
+        self.thread = threading.Thread(target=self._commit_loop, name="session-journal", daemon=True)
+        self.thread.start()
+        return state, records
+
+    def load(self):
+        state = None
+        snapshot_seq = 0
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            snapshot_seq = snapshot["seq"]
+            state = snapshot["state"]
+
+        records = []
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # A torn final line from a crash mid-write; everything before it is good
+                        break
+                    if record["seq"] > snapshot_seq:
+                        records.append(record)
+
+        self.seq = records[-1]["seq"] if records else snapshot_seq
+        self.since_snapshot = len(records)
+        return state, records
+
+    def append(self, op, **fields):
+        with self.lock:
+            self.seq += 1
+            fields["op"] = op
+            fields["seq"] = self.seq
+            self.pending.append((self.seq, json.dumps(fields, separators=(",", ":")) + "\n"))
+            self.since_snapshot += 1
+            self.wakeup.notify()
+        return self.seq
+
+    def needs_snapshot(self):
+        return self.since_snapshot >= self.snapshot_every
+
+    def snapshot(self, state):
+        # The state is captured at the current seq; the commit thread writes it
+        # after the records before it, so the GUI thread never waits on fsync
+        with self.lock:
+            self.pending_snapshot = (self.seq, state)
+            self.since_snapshot = 0
+            self.wakeup.notify()
+
+    def sync(self):
+        with self.io_lock:
+            self._commit()
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            self.wakeup.notify()
+        if self.thread is not None:
+            self.thread.join()
+        with self.io_lock:
+            self._commit()
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+    def _commit(self):
+        # Caller holds self.io_lock; appends can carry on while we write and fsync
+        with self.lock:
+            batch = self.pending
+            self.pending = []
+            snapshot = self.pending_snapshot
+            self.pending_snapshot = None
+        if self.file is None:
+            return
+
+        if batch:
+            self.file.write("".join(line for _, line in batch))
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+        if snapshot is not None:
+            seq, state = snapshot
+            tmp_path = self.snapshot_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"seq": seq, "time": time.time(), "state": state}, f, separators=(",", ":"))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+
+            # Records up to seq now live in the snapshot; keep only the ones after it
+            with self.lock:
+                tail = [record for record in batch if record[0] > seq] + self.pending
+                self.pending = []
+            # The short journal is written aside and swapped in whole, so a crash
+            # leaves either the old journal or the new one, never a truncated one
+            tmp_path = self.journal_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write("".join(line for _, line in tail))
+                f.flush()
+                os.fsync(f.fileno())
+            self.file.close()
+            os.replace(tmp_path, self.journal_path)
+            self.file = open(self.journal_path, "a", encoding="utf-8")
+
+    def _commit_loop(self):
+        while True:
+            with self.lock:
+                while not self.pending and self.pending_snapshot is None and not self.closed:
+                    self.wakeup.wait()
+                if self.closed:
+                    return
+            # Let more records pile up so they share a single fsync
+            time.sleep(self.commit_interval)
+            with self.io_lock:
+                self._commit()
@@ -0,0 +1,327 @@
+import argparse
+import asyncio
+import json
+import queue
+import random
+import socket
+import threading
+import time
+from datetime import datetime
+
+from session_engine import SessionEngine, SessionError
+
+
+DEFAULT_PORT = 8765
+DEFAULT_ROOMS = [("PS4-1", "PS4"), ("PS4-2", "PS4"), ("PS4-3", "PS4"),
+                 ("PS5-1", "PS5"), ("PS5-2", "PS5"), ("PS5-3", "PS5")]
+
+# Protocol: one JSON object per line in both directions.
+#   request:  {"id": 7, "op": "start", "room": "PS5-1", ...}
+#   response: {"id": 7, "ok": true, "room": {...}} or {"id": 7, "ok": false, "error": "..."}
+#   push:     {"event": "start", "room": {...}}  sent to every client after each change
+
+
+def encode(message):
+    return (json.dumps(message, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def parse_time(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+def room_state(room, version):
+    return {
+        "room": room.name,
+        "type": room.type,
+        "status": room.status,
+        "player": room.player,
+        "contact": room.contact,
+        "start_time": room.start_time.isoformat() if room.start_time else None,
+        "mode": room.mode,
+        "bar_items": dict(room.bar_items),
+        "paid_until": room.paid_until.isoformat() if room.paid_until else None,
+        "version": version
+    }
+
+
+class SessionServer:
+    # Owns the one authoritative SessionEngine for a venue. Every terminal sends
+    # its bookings here, and every change is pushed to all connected terminals.
+    def __init__(self, engine, max_buffer=1 << 20):
+        self.engine = engine
+        self.max_buffer = max_buffer
+        self.clients = set()
+        self.versions = {}
+        self.version = 0
+        engine.subscribe(self._on_change)
+
+    async def start(self, host="127.0.0.1", port=DEFAULT_PORT):
+        self.server = await asyncio.start_server(self._handle, host, port)
+        return self.server
+
+    def _state(self, room):
+        return room_state(room, self.versions.get(room.name, 0))
+
+    def _on_change(self, event, room):
+        self.version += 1
+        self.versions[room.name] = self.version
+        message = encode({"event": event, "room": self._state(room)})
+        for writer in list(self.clients):
+            # A terminal that stops reading is dropped rather than buffered forever
+            if writer.is_closing() or writer.transport.get_write_buffer_size() > self.max_buffer:
+                self.clients.discard(writer)
+                writer.close()
+                continue
+            writer.write(message)
+
+    async def _handle(self, reader, writer):
+        self.clients.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    request = None
+                if not isinstance(request, dict):
+                    writer.write(encode({"ok": False, "error": "Malformed request"}))
+                    continue
+                writer.write(encode(self.dispatch(request)))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.clients.discard(writer)
+            writer.close()
+
+    def dispatch(self, request):
+        op = request.get("op")
+        response = {"id": request.get("id"), "ok": True}
+        try:
+            if op == "rooms":
+                response["rooms"] = [self._state(room) for room in self.engine.rooms.values()]
+            elif op == "start":
+                room = self.engine.start_session(request["room"], request["player"], request["contact"],
+                                                 datetime.fromisoformat(request["start_time"]),
+                                                 request.get("mode", "Single"),
+                                                 parse_time(request.get("paid_until")))
+                response["room"] = self._state(room)
+            elif op == "end":
+                session = self.engine.end_session(request["room"])
+                session["start_time"] = session["start_time"].isoformat()
+                session["paid_until"] = session["paid_until"].isoformat() if session["paid_until"] else None
+                response["session"] = session
+                response["room"] = self._state(self.engine.rooms[request["room"]])
+            elif op == "bar":
+                room = self.engine.add_bar_item(request["room"], request["item"], request.get("qty", 1))
+                response["room"] = self._state(room)
+            elif op == "ping":
+                pass
+            else:
+                raise SessionError(f"Unknown operation {op}")
+        except SessionError as e:
+            response = {"id": request.get("id"), "ok": False, "error": str(e)}
+        except (KeyError, ValueError, TypeError) as e:
+            # Missing fields, or fields of the wrong type (e.g. a list where a room name belongs)
+            response = {"id": request.get("id"), "ok": False, "error": f"Bad request: {e}"}
+        return response
+
+
+class SessionClient:
+    # Blocking client for the Tk side. A reader thread matches responses to
+    # waiting requests and queues pushed events for the GUI thread to apply.
+    def __init__(self, host, port=DEFAULT_PORT, timeout=5.0):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.settimeout(None)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.timeout = timeout
+        self.send_lock = threading.Lock()
+        self.next_id = 0
+        self.waiting = {}
+        self.events = queue.SimpleQueue()
+        self.connected = True
+        self.thread = threading.Thread(target=self._read_loop, name="session-client", daemon=True)
+        self.thread.start()
+
+    def request(self, op, **fields):
+        if not self.connected:
+            raise SessionError("Lost connection to the session server")
+        with self.send_lock:
+            self.next_id += 1
+            request_id = self.next_id
+            slot = self.waiting[request_id] = [threading.Event(), None]
+            fields["op"] = op
+            fields["id"] = request_id
+            try:
+                self.sock.sendall(encode(fields))
+            except OSError:
+                # The server went away mid-send; fail now rather than wait out the timeout
+                self.connected = False
+                self.waiting.pop(request_id, None)
+                raise SessionError("Lost connection to the session server")
+        if not slot[0].wait(self.timeout):
+            self.waiting.pop(request_id, None)
+            raise SessionError("Session server did not respond")
+        response = slot[1]
+        if response is None:
+            raise SessionError("Lost connection to the session server")
+        if not response["ok"]:
+            raise SessionError(response["error"])
+        return response
+
+    def close(self):
+        self.connected = False
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+    def _read_loop(self):
+        try:
+            for line in self.sock.makefile("r", encoding="utf-8"):
+                message = json.loads(line)
+                if "event" in message:
+                    self.events.put(message)
+                    continue
+                slot = self.waiting.pop(message.get("id"), None)
+                if slot is not None:
+                    slot[1] = message
+                    slot[0].set()
+        except (OSError, ValueError):
+            pass
+        self.connected = False
+        # Wake anyone still waiting so they fail fast instead of timing out
+        for slot in list(self.waiting.values()):
+            slot[0].set()
+        self.waiting.clear()
+
+
+class RemoteEngine(SessionEngine):
+    # Local replica of the server's rooms. Reads are served locally; mutations go
+    # to the server and the replica is updated from its answer and pushed events.
+    def __init__(self, host, port=DEFAULT_PORT):
+        super().__init__()
+        self.client = SessionClient(host, port)
+        self.versions = {}
+        for state in self.client.request("rooms")["rooms"]:
+            self._apply(state)
+
+    def _apply(self, state):
+        # Responses and pushes can arrive out of order; versions keep the newest state
+        if state["version"] < self.versions.get(state["room"], -1):
+            return
+        self.versions[state["room"]] = state["version"]
+        self.apply_state(state["room"], state["type"], state["status"], state["player"], state["contact"],
+                         parse_time(state["start_time"]), state["mode"], state["bar_items"],
+                         parse_time(state.get("paid_until")))
+
+    def pump(self):
+        # Apply changes pushed by other terminals; called from the Tk loop
+        changed = 0
+        while True:
+            try:
+                message = self.client.events.get_nowait()
+            except queue.Empty:
+                return changed
+            self._apply(message["room"])
+            changed += 1
+
+    def start_session(self, name, player, contact, start_time, mode="Single", paid_until=None):
+        response = self.client.request("start", room=name, player=player, contact=contact,
+                                       start_time=start_time.isoformat(), mode=mode,
+                                       paid_until=paid_until.isoformat() if paid_until else None)
+        self._apply(response["room"])
+        return self.rooms[name]
+
+    def end_session(self, name):
+        response = self.client.request("end", room=name)
+        self._apply(response["room"])
+        session = response["session"]
+        session["start_time"] = datetime.fromisoformat(session["start_time"])
+        session["paid_until"] = parse_time(session.get("paid_until"))
+        return session
+
+    def add_bar_item(self, name, item, qty=1):
+        response = self.client.request("bar", room=name, item=item, qty=qty)
+        self._apply(response["room"])
+        return self.rooms[name]
+
+    def close(self):
+        self.client.close()
+
+
+async def serve(host, port, rooms):
+    engine = SessionEngine()
+    for name, console in rooms:
+        engine.add_room(name, console)
+    server = SessionServer(engine)
+    await server.start(host, port)
+    print(f"Session server listening on {host}:{port} with {len(engine.rooms)} rooms")
+    await asyncio.Event().wait()
+
+
+async def load_test(host, port, clients, operations):
+    # Each simulated terminal books, adds an item and ends a random free room in a loop
+    latencies = []
+
+    async def terminal(n):
+        reader, writer = await asyncio.open_connection(host, port)
+        request_id = 0
+
+        async def call(**fields):
+            nonlocal request_id
+            request_id += 1
+            fields["id"] = request_id
+            started = time.perf_counter()
+            writer.write(encode(fields))
+            while True:
+                message = json.loads(await reader.readline())
+                if message.get("id") == request_id:
+                    latencies.append(time.perf_counter() - started)
+                    return message
+
+        rooms = (await call(op="rooms"))["rooms"]
+        names = [room["room"] for room in rooms]
+        for _ in range(operations // 3):
+            room = random.choice(names)
+            response = await call(op="start", room=room, player=f"load-{n}", contact="0",
+                                  start_time=datetime.now().isoformat())
+            if response["ok"]:
+                await call(op="bar", room=room, item="Water")
+                await call(op="end", room=room)
+        writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(terminal(n) for n in range(clients)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    p = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+    print(f"{len(latencies)} requests from {clients} clients in {elapsed:.2f}s "
+          f"({len(latencies) / elapsed:.0f} ops/s)")
+    print(f"latency ms: p50={p(0.50):.2f} p95={p(0.95):.2f} p99={p(0.99):.2f} max={latencies[-1] * 1000:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared room state server for several front desks")
+    parser.add_argument("command", choices=["serve", "loadtest"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--rooms", type=int, default=0, help="Rooms per console (default: the six standard rooms)")
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--operations", type=int, default=300, help="Requests per load-test client")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        rooms = DEFAULT_ROOMS
+        if args.rooms:
+            rooms = [(f"{console}-{i}", console) for console in ("PS4", "PS5") for i in range(1, args.rooms + 1)]
+        asyncio.run(serve(args.host, args.port, rooms))
+    else:
+        asyncio.run(load_test(args.host, args.port, args.clients, args.operations))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+import argparse
+import heapq
+import random
+import time
+from datetime import datetime, timedelta
+
+from clock import SimulatedClock
+from headless import create_app, room_layout
+
+
+# Relative arrival rate for each hour of the day (evenings are busiest)
+HOURLY_PROFILE = [0.4, 0.3, 0.2, 0.1, 0.05, 0.05, 0.05, 0.1, 0.2, 0.3, 0.4, 0.5,
+                  0.7, 0.8, 0.9, 1.0, 1.2, 1.4, 1.7, 2.0, 2.0, 1.8, 1.3, 0.8]
+
+
+class VenueSimulator:
+    # Discrete-event simulation of a venue that drives the real session logic
+    # (start_session, add_bar_item, end_session, end_of_day) on a headless app
+    # whose clock jumps from one event to the next instead of waiting.
+    def __init__(self, rooms=200, days=30, seed=1, start=None, arrivals_per_room_hour=0.15,
+                 mean_stay_hours=2.0, bar_orders_per_hour=0.8, ps5_share=0.5, multi_share=0.4,
+                 customers=5000, tariffs=None):
+        self.days = days
+        self.random = random.Random(seed)
+        self.start = start or datetime(2025, 1, 1)
+        self.clock = SimulatedClock(self.start)
+        self.app, _ = create_app(rooms=room_layout(rooms), clock=self.clock)
+        if tariffs:
+            self.app.billing.set_tariffs({**self.app.billing.tariffs, **tariffs})
+
+        self.peak_rate = rooms * arrivals_per_room_hour * max(HOURLY_PROFILE)
+        self.mean_stay_hours = mean_stay_hours
+        self.bar_orders_per_hour = bar_orders_per_hour
+        self.ps5_share = ps5_share
+        self.multi_share = multi_share
+        self.customers = customers
+        self.items = [item["name"] for item in self.app.bar_items]
+
+        self.events = []
+        self.seq = 0
+        self.sessions = {}  # room -> start time of the session the scheduled events belong to
+        self.daily = []
+        self.lost = {"PS4": 0, "PS5": 0}
+        self.occupied_seconds = 0.0
+        self.room_count = rooms
+
+    def schedule(self, when, kind, *payload):
+        self.seq += 1
+        heapq.heappush(self.events, (when, self.seq, kind, payload))
+
+    def next_arrival(self, after):
+        # Thinning: draw from the peak rate and keep each candidate with probability rate(t)/peak
+        t = after
+        while True:
+            t += timedelta(hours=self.random.expovariate(self.peak_rate))
+            if self.random.random() * max(HOURLY_PROFILE) <= HOURLY_PROFILE[t.hour]:
+                return t
+
+    def run(self):
+        end = self.start + timedelta(days=self.days)
+        self.schedule(self.next_arrival(self.start), "arrival")
+        for day in range(self.days):
+            self.schedule(self.start + timedelta(days=day + 1) - timedelta(seconds=1), "eod")
+
+        handled = 0
+        while self.events:
+            when, _, kind, payload = heapq.heappop(self.events)
+            if when >= end:
+                break
+            self.clock.set(when)
+            getattr(self, "on_" + kind)(*payload)
+            handled += 1
+            if handled % 2000 == 0:
+                # Stand-in for the background writer thread catching up
+                self.app.writer.run_pending()
+        self.app.writer.run_pending()
+        return self.summary(handled)
+
+    def on_arrival(self):
+        app = self.app
+        now = self.clock.now()
+        self.schedule(self.next_arrival(now), "arrival")
+
+        console = "PS5" if self.random.random() < self.ps5_share else "PS4"
+        app.console_type.set(console)
+        app.update_room_dropdown()
+        room = app.room_var.get()
+        if not room:
+            # Nothing free for this console; the customer walks away
+            self.lost[console] += 1
+            return
+
+        customer = self.random.randrange(self.customers)
+        app.player_name.set(f"Customer {customer}")
+        app.contact_number.set(f"010{customer:08d}")
+        app.game_mode.set("Multi" if self.random.random() < self.multi_share else "Single")
+        app.start_session()
+        self.sessions[room] = now
+
+        stay = timedelta(hours=max(0.25, self.random.expovariate(1 / self.mean_stay_hours)))
+        self.schedule(now + stay, "departure", room, now)
+        t = now
+        while True:
+            t += timedelta(hours=self.random.expovariate(self.bar_orders_per_hour))
+            if t >= now + stay:
+                break
+            self.schedule(t, "bar", room, now, self.random.choice(self.items))
+
+    def on_bar(self, room, started, item):
+        if self.sessions.get(room) == started:
+            self.app.add_bar_item_to(room, item)
+
+    def on_departure(self, room, started):
+        if self.sessions.get(room) != started:
+            return
+        del self.sessions[room]
+        self.occupied_seconds += (self.clock.now() - started).total_seconds()
+        self.app.current_room = room
+        self.app.end_session()
+
+    def on_eod(self):
+        self.app.writer.run_pending()
+        self.daily.append({
+            "date": self.clock.now().strftime("%Y-%m-%d"),
+            "sessions": self.app.daily_sessions,
+            "revenue": self.app.daily_revenue,
+            "open_sessions": len(self.sessions),
+        })
+        self.app.end_of_day()
+
+    def summary(self, handled):
+        hours = self.days * 24
+        return {
+            "events": handled,
+            "days": self.daily,
+            "sessions": sum(day["sessions"] for day in self.daily),
+            "revenue": round(sum(day["revenue"] for day in self.daily), 2),
+            "lost_customers": dict(self.lost),
+            "utilization": self.occupied_seconds / 3600 / (hours * self.room_count),
+            "revenue_by_console": self.app.analytics.revenue("console"),
+        }
+
+
+def parse_tariffs(values):
+    # PS5:Single=170 -> {("PS5", "Single"): 170}
+    tariffs = {}
+    for value in values or []:
+        key, _, rate = value.partition("=")
+        console, _, mode = key.partition(":")
+        tariffs[(console, mode)] = float(rate)
+    return tariffs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate a venue faster than real time")
+    parser.add_argument("--rooms", type=int, default=200)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--arrivals", type=float, default=0.15, help="Arrivals per room per hour at profile 1.0")
+    parser.add_argument("--stay", type=float, default=2.0, help="Mean stay in hours")
+    parser.add_argument("--bar-rate", type=float, default=0.8, help="Bar orders per session hour")
+    parser.add_argument("--tariff", action="append", help="Override a rate, e.g. PS5:Single=170")
+    parser.add_argument("--daily", action="store_true", help="Print one line per simulated day")
+    args = parser.parse_args()
+
+    simulator = VenueSimulator(rooms=args.rooms, days=args.days, seed=args.seed,
+                               arrivals_per_room_hour=args.arrivals, mean_stay_hours=args.stay,
+                               bar_orders_per_hour=args.bar_rate, tariffs=parse_tariffs(args.tariff))
+    started = time.perf_counter()
+    result = simulator.run()
+    elapsed = time.perf_counter() - started
+
+    if args.daily:
+        for day in result["days"]:
+            print(f"{day['date']}  sessions={day['sessions']:<5} revenue={day['revenue']:>12.2f} EGP  "
+                  f"open at close={day['open_sessions']}")
+    print(f"Simulated {args.days} days of {args.rooms} rooms ({result['events']} events) in {elapsed:.1f}s")
+    print(f"Sessions: {result['sessions']}  Revenue: {result['revenue']:.2f} EGP  "
+          f"Utilization: {result['utilization']:.1%}")
+    print(f"Lost customers: {result['lost_customers']}")
+    for console, revenue in sorted(result["revenue_by_console"].items()):
+        print(f"  {console} revenue: {revenue:.2f} EGP")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+import argparse
+import json
+import os
+import struct
+import zlib
+from datetime import datetime, timedelta
+
+
+EPOCH = datetime(2000, 1, 1)
+MAGIC = b"PSSNAP"
+VERSION = 1
+
+# File layout (little-endian), every section a packed array of fixed-width records:
+#   header
+#   rooms      one ROOM per room, in display order
+#   receipts   one RECEIPT per receipt of the current day
+#   bar        BAR entries; rooms and receipts point at a run of them (first, count)
+#   strings    STRING_END offsets (in characters) into the UTF-8 text that follows
+# Strings are stored once and referred to by index; index 0 is the empty string.
+# Times are microseconds since EPOCH, NO_TIME when unset.
+HEADER = struct.Struct("<6sHIqdIIIII")  # magic, version, crc32 of the rest, saved at, daily revenue,
+                                         # daily sessions, rooms, receipts, bar entries, strings
+ROOM = struct.Struct("<IIBIIIqqII")      # name, console, status, mode, player, contact, start, paid until,
+                                         # first bar entry, bar entries
+RECEIPT = struct.Struct("<I8IddddIII")   # id, room, console, player, contact, start, end, duration, mode,
+                                         # hourly rate, gaming cost, bar cost, total, segments (JSON),
+                                         # first bar entry, bar entries
+BAR = struct.Struct("<II")               # item, quantity
+STRING_END = struct.Struct("<I")
+NO_TIME = -1
+
+RECEIPT_TEXT = ("room", "console", "player", "contact", "start_time", "end_time", "duration", "mode")
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def to_micros(when):
+    if when is None:
+        return NO_TIME
+    delta = when - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+def from_micros(value):
+    return None if value == NO_TIME else EPOCH + timedelta(microseconds=value)
+
+
+class StringTable:
+    def __init__(self):
+        self.index = {"": 0}
+        self.values = [""]
+
+    def __call__(self, value):
+        value = "" if value is None else str(value)
+        i = self.index.get(value)
+        if i is None:
+            i = self.index[value] = len(self.values)
+            self.values.append(value)
+        return i
+
+
+def encode(state):
+    # state: {"rooms": [{"name", "console", "status", "player", "contact", "start_time", "mode",
+    #          "bar_items", "paid_until"}], "receipts": [ledger receipts], "daily_revenue",
+    #          "daily_sessions", "saved_at"} -> bytes
+    strings = StringTable()
+    bar = []
+    rooms = []
+    for room in state["rooms"]:
+        first = len(bar)
+        bar.extend((strings(item), qty) for item, qty in (room.get("bar_items") or {}).items())
+        rooms.append(ROOM.pack(strings(room["name"]), strings(room["console"]), room.get("status", 0),
+                               strings(room.get("mode")), strings(room.get("player")), strings(room.get("contact")),
+                               to_micros(room.get("start_time")), to_micros(room.get("paid_until")),
+                               first, len(bar) - first))
+    receipts = []
+    for receipt in state["receipts"]:
+        first = len(bar)
+        bar.extend((strings(item), qty) for item, qty in (receipt.get("bar_items") or {}).items())
+        receipts.append(RECEIPT.pack(receipt["id"], *(strings(receipt.get(name)) for name in RECEIPT_TEXT),
+                                     receipt.get("hourly_rate") or 0, receipt.get("gaming_cost") or 0,
+                                     receipt.get("bar_items_cost") or 0, receipt.get("total_cost") or 0,
+                                     strings(json.dumps(receipt["segments"]) if receipt.get("segments") else ""),
+                                     first, len(bar) - first))
+
+    text = "".join(strings.values)
+    ends = []
+    end = 0
+    for value in strings.values:
+        end += len(value)
+        ends.append(end)
+    body = b"".join([b"".join(rooms), b"".join(receipts), b"".join(BAR.pack(*entry) for entry in bar),
+                     struct.pack(f"<{len(ends)}I", *ends), text.encode("utf-8")])
+    header = HEADER.pack(MAGIC, VERSION, zlib.crc32(body), to_micros(state.get("saved_at") or datetime.now()),
+                         state.get("daily_revenue", 0), state.get("daily_sessions", 0),
+                         len(rooms), len(receipts), len(bar), len(ends))
+    return header + body
+
+
+def decode(data):
+    # bytes -> the state given to encode(); raises SnapshotError for anything that is not a valid snapshot
+    data = memoryview(data)
+    if len(data) < HEADER.size or bytes(data[:len(MAGIC)]) != MAGIC:
+        raise SnapshotError("Not a state snapshot")
+    (_, version, crc, saved_at, daily_revenue, daily_sessions,
+     room_count, receipt_count, bar_count, string_count) = HEADER.unpack_from(data)
+    if version != VERSION:
+        raise SnapshotError(f"Snapshot version {version} is not supported (expected {VERSION})")
+    body = data[HEADER.size:]
+    if zlib.crc32(body) != crc:
+        raise SnapshotError("Snapshot is damaged")
+
+    offset = 0
+    sections = []
+    for record, count in ((ROOM, room_count), (RECEIPT, receipt_count), (BAR, bar_count),
+                          (STRING_END, string_count)):
+        size = record.size * count
+        sections.append(body[offset:offset + size])
+        offset += size
+    room_data, receipt_data, bar_data, end_data = sections
+    # One decode for all the text, then plain slicing
+    text = bytes(body[offset:]).decode("utf-8")
+    ends = struct.unpack(f"<{string_count}I", end_data)
+    strings = [text[start:end] for start, end in zip((0,) + ends, ends)]
+    bar = [(strings[item], qty) for item, qty in BAR.iter_unpack(bar_data)]
+
+    rooms = []
+    for name, console, status, mode, player, contact, start, paid_until, first, count in ROOM.iter_unpack(room_data):
+        rooms.append({
+            "name": strings[name], "console": strings[console], "status": status,
+            "mode": strings[mode] or None, "player": strings[player], "contact": strings[contact],
+            "start_time": from_micros(start), "paid_until": from_micros(paid_until),
+            "bar_items": dict(bar[first:first + count]),
+        })
+    receipts = []
+    for values in RECEIPT.iter_unpack(receipt_data):
+        receipt = {"id": values[0]}
+        receipt.update(zip(RECEIPT_TEXT, (strings[i] for i in values[1:9])))
+        receipt["hourly_rate"], receipt["gaming_cost"], receipt["bar_items_cost"], receipt["total_cost"] = values[9:13]
+        segments = strings[values[13]]
+        receipt["segments"] = json.loads(segments) if segments else []
+        receipt["bar_items"] = dict(bar[values[14]:values[14] + values[15]])
+        receipts.append(receipt)
+    return {"rooms": rooms, "receipts": receipts, "daily_revenue": daily_revenue,
+            "daily_sessions": daily_sessions, "saved_at": from_micros(saved_at)}
+
+
+def write_snapshot(path, state):
+    data = encode(state)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return len(data)
+
+
+def read_snapshot(path):
+    with open(path, "rb") as f:
+        return decode(f.read())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect a state snapshot (state.pss or a handover file)")
+    parser.add_argument("path")
+    args = parser.parse_args()
+    try:
+        state = read_snapshot(args.path)
+    except (OSError, SnapshotError) as e:
+        raise SystemExit(f"{args.path}: {e}")
+    busy = [room for room in state["rooms"] if room["status"]]
+    print(f"Saved {state['saved_at']:%Y-%m-%d %H:%M:%S}: {len(state['rooms'])} rooms, {len(busy)} in use, "
+          f"{len(state['receipts'])} receipts, {state['daily_sessions']} sessions / "
+          f"{state['daily_revenue']:.2f} EGP today")
+    for room in busy:
+        print(f"  {room['name']:<10}{room['player']:<20}since {room['start_time']:%H:%M}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,41 +1,345 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
-from datetime import datetime
+from tkinter import ttk, messagebox, filedialog
+from datetime import datetime, timedelta
 import sys
 import os
+import socket
+
+from session_engine import SessionEngine, SessionError
+from room_grid import VirtualRoomGrid
+from session_journal import SessionJournal
+from receipt_ledger import ReceiptLedger
+from background_writer import BackgroundWriter
+from billing import BillingEngine, DEFAULT_TARIFFS
+from tick_scheduler import TickScheduler
+from analytics_store import ColumnarStore, Analytics
+from session_server import RemoteEngine, DEFAULT_PORT, parse_time
+from bar_catalog import BarCatalog, StockError, format_bar_items
+from clock import SystemClock
+from instrumentation import Instrumentation
+from dialogs import DialogPool, Autocomplete
+from customer_index import CustomerIndex
+from reservations import ReservationBook, ReservationError
+from timer_wheel import TimerWheel
+from receipt_archive import ReceiptArchive
+from print_spooler import PrintSpooler, printer_from_spec
+from pricing_rules import RuleFile, PricingError
+from live_counters import LiveCounters
+from branch_sync import Outbox, SyncAgent
+from state_snapshot import read_snapshot, write_snapshot, encode, SnapshotError
 
 
 class PlayStationManagementSystem:
-    def __init__(self, root):
+    DEFAULT_ROOMS = [("PS4-1", "PS4"), ("PS4-2", "PS4"), ("PS4-3", "PS4"),
+                     ("PS5-1", "PS5"), ("PS5-2", "PS5"), ("PS5-3", "PS5")]
+    # Binary snapshot of rooms, open sessions and today's receipts, written on close
+    STATE_FILE = "state.pss"
+    
+    def __init__(self, root, server=None, printer=None, sync=None, branch=None, restore=None):
         self.root = root
         self.root.title("PlayStation Management System")
         self.root.geometry("1200x800")
         self.root.minsize(1000, 700)
         self.root.configure(bg="#003791")  # PlayStation blue background
         
-        # Initialize variables
-        self.ps4_single_price = 100
-        self.ps4_multi_price = 120
-        self.ps5_single_price = 150
-        self.ps5_multi_price = 180
-        self.bar_item_price = 50
+        # The room layout comes from the last saved state, or from a handover file
+        # taken on another machine, rather than from DEFAULT_ROOMS
+        app_path = os.path.dirname(os.path.abspath(sys.argv[0]))
+        snapshot = self.load_snapshot(restore or os.path.join(app_path, self.STATE_FILE), required=bool(restore))
+        rooms = [(room["name"], room["console"]) for room in snapshot["rooms"]] if snapshot else None
+        self.init_state(server, rooms=rooms)
+        self.open_storage(app_path)
+        if restore and snapshot:
+            self.apply_handover(snapshot)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        # Set PS_INSTRUMENT=1 to time every callback and the clock tick into metrics.txt
+        self.instrumentation = None
+        if os.environ.get("PS_INSTRUMENT"):
+            self.instrumentation = Instrumentation(self.root, os.path.join(self.app_path, "metrics.txt"))
+            self.instrumentation.install()
+        
+        # All saves go through a worker thread; results come back to the status bar.
+        # The writer, spooler and outbox exist before the UI because the scheduler's first
+        # tick runs while the UI is built and may end overdue prepaid sessions.
+        self.writer = BackgroundWriter(self.root, self.update_status,
+                                       lambda message: messagebox.showerror("Error", message))
+        
+        # With a receipt printer, receipts are spooled to it instead of shown in a dialog
+        self.spooler = None
+        if printer:
+            self.spooler = PrintSpooler(self.root, printer_from_spec(printer), self.update_status,
+                                        lambda message: messagebox.showerror("Printer", message))
+        
+        # With a head-office URL, closed sessions, bar sales and day totals are queued in
+        # outbox.db and uploaded in the background whenever the link is up
+        self.outbox = None
+        self.sync_agent = None
+        if sync:
+            self.outbox = Outbox(os.path.join(self.app_path, "outbox.db"))
+            self.sync_agent = SyncAgent(self.outbox, sync, branch or socket.gethostname()).start()
+        
+        # Room pickers are built on first use and reused afterwards
+        self.dialogs = DialogPool(self.root)
+        self.create_scrollable_ui()
+        if self.instrumentation:
+            self.instrumentation.start(self.writer, self.scheduler)
+        if self.sync_agent:
+            self.scheduler.add(self.update_sync_status)
         
-        # Room status (0=available, 1=occupied)
-        self.rooms = {
-            "PS4-1": {"status": 0, "type": "PS4", "player": "", "contact": "", "start_time": None, "bar_items": []},
-            "PS4-2": {"status": 0, "type": "PS4", "player": "", "contact": "", "start_time": None, "bar_items": []},
-            "PS4-3": {"status": 0, "type": "PS4", "player": "", "contact": "", "start_time": None, "bar_items": []},
-            "PS5-1": {"status": 0, "type": "PS5", "player": "", "contact": "", "start_time": None, "bar_items": []},
-            "PS5-2": {"status": 0, "type": "PS5", "player": "", "contact": "", "start_time": None, "bar_items": []},
-            "PS5-3": {"status": 0, "type": "PS5", "player": "", "contact": "", "start_time": None, "bar_items": []},
-        }
+        if self.remote:
+            self.pump_remote()
+    
+    def init_state(self, server=None, rooms=None, clock=None):
+        # Everything the session logic needs apart from widgets and files,
+        # so benchmarks and simulations can drive it without a window
+        self.clock = clock or SystemClock()
+        self.bar_item_price = 50
+        # Each item may set its own "price" and "stock"; stock counts persist in bar_stock.json
+        self.bar_items = [
+            {"name": "Pepsi", "color": "#5c7cfa", "icon": "🥤"},
+            {"name": "Tea", "color": "#5c7cfa", "icon": "🍵"},
+            {"name": "Coffee", "color": "#5c7cfa", "icon": "☕"},
+            {"name": "Water", "color": "#5c7cfa", "icon": "💧"},
+            {"name": "Chips", "color": "#5c7cfa", "icon": "🍟"},
+            {"name": "Chocolate", "color": "#5c7cfa", "icon": "🍫"},
+            {"name": "Juice", "color": "#5c7cfa", "icon": "🧃"},
+            {"name": "Soda", "color": "#5c7cfa", "icon": "🥤"}
+        ]
+        self.catalog = BarCatalog(self.bar_items, self.bar_item_price)
+        # Hourly rates per (console, mode) are shared by receipts, previews and EOD
+        self.billing = BillingEngine(DEFAULT_TARIFFS, self.catalog)
+        
+        # Rooms and sessions are owned by the engine (status 0=available, 1=occupied).
+        # With a session server the engine is a replica shared with the other front desks.
+        self.remote = server is not None
+        if self.remote:
+            host, _, port = server.partition(":")
+            try:
+                self.engine = RemoteEngine(host, int(port or DEFAULT_PORT))
+            except OSError as e:
+                messagebox.showerror("Error", f"Cannot reach session server {server}: {e}")
+                raise SystemExit(1)
+        else:
+            self.engine = SessionEngine()
+            for room, console in rooms or self.DEFAULT_ROOMS:
+                self.engine.add_room(room, console)
+        self.rooms = self.engine.rooms
         
         self.daily_revenue = 0
         self.daily_sessions = 0
+        # Utilization and accrued revenue for the dashboard, updated on every start, end and bar sale
+        self.counters = LiveCounters(self.engine, self.billing, self.clock.now)
         self.current_room = None
-        self.receipts = {}
-        
-        self.create_scrollable_ui()
+        # A room reserved to start within this window is kept free for its customer
+        self.reservation_hold = timedelta(hours=1)
+        
+        # Prepaid blocks end themselves; the wheel fires a warning and then end_session
+        self.prepaid_blocks = {"Open": None, "1 hour": 1, "2 hours": 2, "3 hours": 3}
+        self.prepaid_warning = timedelta(minutes=5)
+        self.timers = TimerWheel(self.clock.now())
+        self.expiry_timers = {}  # room -> (warning timer, expiry timer)
+    
+    def open_storage(self, app_path):
+        self.app_path = app_path
+        self.catalog.load_stock(os.path.join(app_path, "bar_stock.json"))
+        
+        # Completed receipts live in the ledger rather than in memory
+        self.ledger = ReceiptLedger(os.path.join(self.app_path, "receipts.db"), auto_flush=False)
+        # Printed receipts, exactly as printed
+        self.archive = ReceiptArchive(os.path.join(self.app_path, "receipts"))
+        # Optional time-of-day and weekend rates, checked for changes by reload_pricing every few seconds
+        self.pricing_file = RuleFile(os.path.join(self.app_path, "pricing_rules.json"))
+        # Closed sessions and bar sales are also kept column-wise for analytics
+        self.history = ColumnarStore(os.path.join(self.app_path, "analytics"))
+        self.analytics = Analytics(self.history)
+        # Returning customers with their visit count and lifetime spend
+        self.customers = CustomerIndex(os.path.join(self.app_path, "customers.db"))
+        if not len(self.customers):
+            self.customers.rebuild(self.ledger.customer_totals())
+            self.customers.flush()
+        self.reservations = ReservationBook(os.path.join(self.app_path, "reservations.db"))
+        
+        # Rebuild any sessions that were live when the app last stopped
+        self.journal = SessionJournal(os.path.join(self.app_path, "journal"))
+        state, records = self.journal.open()
+        self.restore_state(state, records)
+        
+    def pump_remote(self):
+        # Bookings made at other desks arrive as pushed events
+        if self.engine.pump():
+            self.update_room_dropdown()
+        self.root.after(50, self.pump_remote)
+        
+    def restore_state(self, state, records):
+        # A session server owns live sessions itself; only the local counters are restored then
+        if state:
+            for session in state["sessions"] if not self.remote else []:
+                room = self.engine.start_session(session["room"], session["player"], session["contact"],
+                                                 datetime.fromisoformat(session["start_time"]),
+                                                 session.get("mode", "Single"),
+                                                 parse_time(session.get("paid_until")))
+                room.bar_items = dict(session["bar_items"])
+            self.daily_revenue = state["daily_revenue"]
+            self.daily_sessions = state["daily_sessions"]
+        
+        for record in records:
+            op = record["op"]
+            if self.remote and op in ("start", "bar"):
+                continue
+            try:
+                if op == "start":
+                    self.engine.start_session(record["room"], record["player"], record["contact"],
+                                              datetime.fromisoformat(record["start_time"]),
+                                              record.get("mode", "Single"),
+                                              parse_time(record.get("paid_until")))
+                elif op == "bar":
+                    self.engine.add_bar_item(record["room"], record["item"])
+                elif op == "end":
+                    if not self.remote:
+                        self.engine.end_session(record["room"])
+                    # The ledger ignores receipts it already stored before the restart
+                    self.ledger.add(record["receipt"])
+                    self.customers.record_visit(record["receipt"])
+                    self.daily_revenue += record["receipt"]["total_cost"]
+                    self.daily_sessions += 1
+                elif op == "eod":
+                    self.daily_revenue = 0
+                    self.daily_sessions = 0
+            except SessionError:
+                # The room layout changed since the record was written
+                continue
+        
+        # Replayed sessions ended at their recorded times, so the live counters start over from here
+        self.counters.reset(self.clock.now(), self.daily_revenue, self.daily_sessions)
+        
+        # Prepaid sessions that ran out while the app was closed end on the first tick.
+        # With a session server, only the desk that started a session ends it.
+        for name in self.engine.occupied_rooms() if not self.remote else []:
+            self.schedule_expiry(name)
+    
+    def journal_state(self):
+        sessions = []
+        for name in self.engine.occupied_rooms():
+            room = self.rooms[name]
+            sessions.append({
+                "room": name,
+                "player": room.player,
+                "contact": room.contact,
+                "start_time": room.start_time.isoformat(),
+                "mode": room.mode,
+                "bar_items": dict(room.bar_items),
+                "paid_until": room.paid_until.isoformat() if room.paid_until else None
+            })
+        return {
+            "sessions": sessions,
+            "daily_revenue": self.daily_revenue,
+            "daily_sessions": self.daily_sessions
+        }
+    
+    def load_snapshot(self, path, required=False):
+        if not required and not os.path.exists(path):
+            return None
+        try:
+            return read_snapshot(path)
+        except (OSError, SnapshotError) as e:
+            messagebox.showerror("Error", f"Could not load {os.path.basename(path)}: {e}")
+            return None
+    
+    def snapshot_state(self):
+        # Every room in display order plus the receipts that ended today
+        rooms = []
+        for name in sorted(self.rooms, key=lambda name: self.rooms[name].index):
+            room = self.rooms[name]
+            rooms.append({"name": name, "console": room.type, "status": room.status, "player": room.player,
+                          "contact": room.contact, "start_time": room.start_time, "mode": room.mode,
+                          "bar_items": room.bar_items, "paid_until": room.paid_until})
+        now = self.clock.now()
+        receipts = self.ledger.between(now.strftime("%Y-%m-%d"), (now + timedelta(days=1)).strftime("%Y-%m-%d"))
+        return {"rooms": rooms, "receipts": receipts, "daily_revenue": self.daily_revenue,
+                "daily_sessions": self.daily_sessions, "saved_at": self.clock.now()}
+    
+    def apply_handover(self, snapshot):
+        # Takes over the shift recorded in a handover file: open sessions, today's receipts and counters.
+        # Rooms already in use here are left alone, and so are receipts this ledger already holds, so
+        # restoring the same handover twice changes nothing.
+        taken = 0
+        for room in snapshot["rooms"]:
+            if not room["status"] or self.remote:
+                continue
+            try:
+                self.engine.start_session(room["name"], room["player"], room["contact"], room["start_time"],
+                                          room["mode"] or "Single", room["paid_until"])
+            except SessionError:
+                continue
+            self.rooms[room["name"]].bar_items = dict(room["bar_items"])
+            self.schedule_expiry(room["name"])
+            taken += 1
+        applied = self.applied_receipts(snapshot["receipts"])
+        for receipt in snapshot["receipts"]:
+            if (receipt["room"], receipt["start_time"], receipt["end_time"]) in applied:
+                continue
+            # Ids from the other machine's ledger may already be taken here; each receipt gets a new one
+            receipt = dict(receipt, id=None)
+            self.ledger.add(receipt)
+            self.customers.record_visit(receipt)
+            # The handed-over day adds to anything already taken on this machine today
+            self.daily_revenue += receipt["total_cost"]
+            self.daily_sessions += 1
+        self.ledger.flush()
+        self.customers.flush()
+        self.counters.reset(self.clock.now(), self.daily_revenue, self.daily_sessions)
+        # The journal takes the handed-over state as its starting point
+        self.journal.snapshot(self.journal_state())
+        return taken
+    
+    def applied_receipts(self, receipts):
+        # (room, start, end) of the ledger's receipts over the days the given ones ended on; a room
+        # cannot hold two sessions with the same start and end, so a match is the same session
+        if not receipts:
+            return set()
+        first = min(receipt["end_time"] for receipt in receipts)[:10]
+        last = datetime.strptime(max(receipt["end_time"] for receipt in receipts)[:10], "%Y-%m-%d")
+        return {(receipt["room"], receipt["start_time"], receipt["end_time"])
+                for receipt in self.ledger.between(first, (last + timedelta(days=1)).strftime("%Y-%m-%d"))}
+    
+    def save_handover(self):
+        path = filedialog.asksaveasfilename(title="Save Shift Handover", defaultextension=".pss",
+                                            initialfile=f"handover_{self.clock.now():%Y%m%d_%H%M}.pss",
+                                            filetypes=[("State snapshot", "*.pss")])
+        if not path:
+            return
+        data = encode(self.snapshot_state())
+        self.writer.write_file(path, data, f"Handover saved to {path}", mode="wb")
+    
+    def log_event(self, op, **fields):
+        self.journal.append(op, **fields)
+        if self.journal.needs_snapshot():
+            self.journal.snapshot(self.journal_state())
+    
+    def on_close(self):
+        if self.instrumentation:
+            self.instrumentation.export()
+        if self.spooler:
+            self.spooler.close()
+        if self.sync_agent:
+            self.sync_agent.stop()
+        self.writer.close()
+        if self.outbox:
+            self.outbox.close()
+        if not self.remote:
+            try:
+                write_snapshot(os.path.join(self.app_path, self.STATE_FILE), self.snapshot_state())
+            except OSError as e:
+                messagebox.showerror("Error", f"Could not save {self.STATE_FILE}: {e}")
+        self.journal.close()
+        self.ledger.close()
+        self.archive.close()
+        self.customers.close()
+        self.reservations.close()
+        if self.remote:
+            self.engine.close()
+        self.root.destroy()
         
     def create_scrollable_ui(self):
         # Main container with scrollbar
@@ -49,12 +353,13 @@ class PlayStationManagementSystem:
         self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
-        self.canvas.configure(yscrollcommand=self.scrollbar.set)
-        self.canvas.bind('<Configure>', lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all")))
+        self.canvas.configure(yscrollcommand=self._on_canvas_scroll)
+        self.canvas.bind('<Configure>', self._on_canvas_configure)
         
         # Create a frame inside the canvas
         self.main_frame = tk.Frame(self.canvas, bg="#003791")
         self.canvas.create_window((0, 0), window=self.main_frame, anchor="nw")
+        self.main_frame.bind('<Configure>', lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all")))
         
         # Bind mousewheel to scroll
         self.main_frame.bind("<Enter>", self._bind_mousewheel)
@@ -88,7 +393,7 @@ class PlayStationManagementSystem:
         controller_symbols.pack(side=tk.RIGHT, padx=10)
         
         self.date_label = tk.Label(self.header_frame, 
-                                 text=datetime.now().strftime("%Y-%m-%d %H:%M:%S"), 
+                                 text=self.clock.now().strftime("%Y-%m-%d %H:%M:%S"), 
                                  font=("Arial", 12), 
                                  fg="white", 
                                  bg="#000000")
@@ -111,12 +416,30 @@ class PlayStationManagementSystem:
         # Create all UI components
         self.create_room_status_section()
         self.create_management_section()
+        self.create_dashboard_section()
         self.create_bar_menu_section()
         self.create_status_bar()
         
-        # Update time every second
-        self.update_time()
+        # Clock and live tile costs share one tick
+        self.scheduler = TickScheduler(self.root, now=self.clock.now)
+        self.scheduler.add(self.reload_pricing)
+        self.scheduler.add(self.update_time)
+        self.scheduler.add(self.room_grid.update_live)
+        self.scheduler.add(self.update_dashboard)
+        self.scheduler.add(self.timers.advance)
+        self.scheduler.start()
     
+    def _on_canvas_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        # Rebind room tiles to whatever rows just scrolled into view
+        if hasattr(self, 'room_grid'):
+            self.room_grid.schedule_refresh()
+
+    def _on_canvas_configure(self, event):
+        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+        if hasattr(self, 'room_grid'):
+            self.room_grid.schedule_refresh()
+
     def _bind_mousewheel(self, event):
         self.canvas.bind_all("<MouseWheel>", self._on_mousewheel)
 
@@ -139,35 +462,10 @@ class PlayStationManagementSystem:
                                             pady=10)
         self.room_status_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
-        # Create room status indicators in a grid
-        self.room_indicators = {}
-        for i, room in enumerate(self.rooms.keys()):
-            frame = tk.Frame(self.room_status_frame, bg="#000000", bd=1, relief=tk.SOLID,
-                            highlightbackground="#5c7cfa", highlightthickness=1)
-            frame.grid(row=i//3, column=i%3, padx=5, pady=5, sticky="nsew")
-            
-            status_color = "#5c7cfa" if self.rooms[room]["status"] == 0 else "#ff0000"  # Blue for available, red for occupied
-            status_text = "AVAILABLE" if self.rooms[room]["status"] == 0 else "OCCUPIED"
-            
-            self.room_indicators[room] = {
-                "frame": frame,
-                "label": tk.Label(frame, text=room, font=("Arial", 10, "bold"), bg="#000000", fg="white"),
-                "status": tk.Label(frame, text=status_text, font=("Arial", 10, "bold"), 
-                                 fg="white", bg=status_color, width=12, padx=5),
-                "time": tk.Label(frame, text="", font=("Arial", 8), bg="#000000", fg="#aaaaaa"),
-                "player": tk.Label(frame, text="", font=("Arial", 9), bg="#000000", fg="white", wraplength=120)
-            }
-            
-            self.room_indicators[room]["label"].pack(pady=(5, 0))
-            self.room_indicators[room]["status"].pack()
-            self.room_indicators[room]["time"].pack()
-            self.room_indicators[room]["player"].pack(pady=(0, 5))
-        
-        # Configure grid weights for room status
-        for i in range(3):
-            self.room_status_frame.grid_columnconfigure(i, weight=1)
-        for i in range(2):
-            self.room_status_frame.grid_rowconfigure(i, weight=1)
+        # Room status tiles are virtualized: only rows visible in self.canvas get widgets
+        # (blue for available, red for occupied)
+        self.room_grid = VirtualRoomGrid(self.room_status_frame, self.engine, self.canvas, columns=3,
+                                         live_text=self.live_tile_text, now=self.clock.now)
     
     def create_management_section(self):
         # Room management controls
@@ -218,6 +516,12 @@ class PlayStationManagementSystem:
                                      insertbackground="white")
         self.contact_number.grid(row=1, column=1, padx=5, pady=5)
         
+        # Known customers are suggested as either field is typed in
+        Autocomplete(self.player_name, lambda text: self.customer_choices(self.customers.match_name(text)),
+                     self.fill_customer)
+        Autocomplete(self.contact_number, lambda text: self.customer_choices(self.customers.match_phone(text)),
+                     self.fill_customer)
+        
         # Console and mode selection
         self.selection_frame = tk.Frame(self.control_frame, bg="#000000")
         self.selection_frame.pack(fill=tk.X, pady=5)
@@ -276,6 +580,27 @@ class PlayStationManagementSystem:
                        value="Multi",
                        style="PlayStation.TRadiobutton").pack(anchor="w")
         
+        # Prepaid time
+        self.prepaid_frame = tk.LabelFrame(self.selection_frame, 
+                                         text="Time", 
+                                         font=("Arial", 10),
+                                         bd=1, 
+                                         relief=tk.SOLID,
+                                         bg="#000000",
+                                         fg="white",
+                                         padx=5,
+                                         pady=5)
+        self.prepaid_frame.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        
+        self.prepaid = tk.StringVar()
+        self.prepaid.set("Open")
+        ttk.Combobox(self.prepaid_frame, 
+                     textvariable=self.prepaid, 
+                     values=list(self.prepaid_blocks),
+                     state="readonly",
+                     font=("Arial", 10),
+                     width=10).pack(anchor="w")
+        
         # Room selection
         self.room_select_frame = tk.Frame(self.control_frame, bg="#000000")
         self.room_select_frame.pack(fill=tk.X, pady=5)
@@ -339,6 +664,22 @@ class PlayStationManagementSystem:
                                     **button_style)
         self.receipt_btn.pack(side=tk.LEFT, padx=5)
         
+        self.reserve_btn = tk.Button(self.button_frame, 
+                                    text="📅 Reserve", 
+                                    command=self.reserve_room,
+                                    bg="#ffffff",
+                                    fg="black",
+                                    **button_style)
+        self.reserve_btn.pack(side=tk.LEFT, padx=5)
+        
+        self.handover_btn = tk.Button(self.button_frame, 
+                                     text="💾 Handover", 
+                                     command=self.save_handover,
+                                     bg="#5c7cfa",
+                                     fg="white",
+                                     **button_style)
+        self.handover_btn.pack(side=tk.LEFT, padx=5)
+        
         self.eod_btn = tk.Button(self.button_frame, 
                                 text="📊 End of Day", 
                                 command=self.end_of_day,
@@ -347,10 +688,60 @@ class PlayStationManagementSystem:
                                 **button_style)
         self.eod_btn.pack(side=tk.RIGHT, padx=5)
     
+    def create_dashboard_section(self):
+        # Live figures read from self.counters each tick
+        self.dashboard_frame = tk.LabelFrame(self.right_panel, 
+                                           text="Live Dashboard", 
+                                           font=("Arial", 12, "bold"),
+                                           bd=0, 
+                                           relief=tk.FLAT,
+                                           bg="#000000",
+                                           fg="#5c7cfa",
+                                           padx=10,
+                                           pady=10)
+        self.dashboard_frame.pack(fill=tk.X, padx=10, pady=(10, 0))
+        
+        self.dashboard_labels = {}
+        for key in ["revenue"] + self.engine.consoles() + ["hours"]:
+            label = tk.Label(self.dashboard_frame, 
+                           text="", 
+                           font=("Consolas", 10),
+                           fg="white", 
+                           bg="#000000",
+                           anchor=tk.W,
+                           justify=tk.LEFT)
+            label.pack(fill=tk.X)
+            self.dashboard_labels[key] = label
+    
+    def dashboard_text(self, now):
+        # {dashboard label: text}; cost does not depend on the number of rooms
+        summary = self.counters.summary(now)
+        texts = {"revenue": f"Revenue {summary['accrued']:.2f} EGP "
+                            f"({summary['revenue']:.2f} done + {summary['open_value']:.2f} open)"}
+        for console, figures in summary["consoles"].items():
+            text = (f"{console}: {figures['busy']} busy, {figures['free']} free, "
+                    f"{figures['utilization']:.0%} used ({figures['hours']:.1f} h)")
+            if figures["next_release"]:
+                text += f", next free {figures['next_release']:%H:%M}"
+            if figures["turned_away"]:
+                text += f", {figures['turned_away']} turned away"
+            texts[console] = text
+        hours = summary["hourly"][-12:]
+        peak = max((busy for _, busy in hours), default=0)
+        bars = "".join("▁▂▃▄▅▆▇█"[min(7, int(busy / peak * 8))] if peak else "▁" for _, busy in hours)
+        texts["hours"] = f"Room-hours since {hours[0][0]:%H:00}: {bars}" if hours else ""
+        return texts
+    
+    def update_dashboard(self, now):
+        for key, text in self.dashboard_text(now).items():
+            label = self.dashboard_labels.get(key)
+            if label is not None:
+                self.scheduler.set_text(label, text)
+    
     def create_bar_menu_section(self):
         # Bar menu section
         self.bar_menu_frame = tk.LabelFrame(self.right_panel, 
-                                          text="Bar Menu (50 EGP each)", 
+                                          text="Bar Menu", 
                                           font=("Arial", 12, "bold"),
                                           bd=0, 
                                           relief=tk.FLAT,
@@ -379,24 +770,17 @@ class PlayStationManagementSystem:
         self.bar_items_frame.bind("<Enter>", lambda e: self.bar_canvas.bind_all("<MouseWheel>", lambda event: self.bar_canvas.yview_scroll(int(-1*(event.delta/120)), "units")))
         self.bar_items_frame.bind("<Leave>", lambda e: self.bar_canvas.unbind_all("<MouseWheel>"))
         
-        self.bar_items = [
-            {"name": "Pepsi", "color": "#5c7cfa", "icon": "🥤"},
-            {"name": "Tea", "color": "#5c7cfa", "icon": "🍵"},
-            {"name": "Coffee", "color": "#5c7cfa", "icon": "☕"},
-            {"name": "Water", "color": "#5c7cfa", "icon": "💧"},
-            {"name": "Chips", "color": "#5c7cfa", "icon": "🍟"},
-            {"name": "Chocolate", "color": "#5c7cfa", "icon": "🍫"},
-            {"name": "Juice", "color": "#5c7cfa", "icon": "🧃"},
-            {"name": "Soda", "color": "#5c7cfa", "icon": "🥤"}
-        ]
-        
+        # The item buttons are filled in once the main window has been drawn
+        self.root.after_idle(self.build_bar_buttons)
+    
+    def build_bar_buttons(self):
         for item in self.bar_items:
             btn_frame = tk.Frame(self.bar_items_frame, bg="#000000", bd=1, relief=tk.SOLID,
                                highlightbackground="#5c7cfa", highlightthickness=1)
             btn_frame.pack(fill=tk.X, pady=5)
             
             btn = tk.Button(btn_frame, 
-                          text=f"{item['icon']} {item['name']}", 
+                          text=f"{item['icon']} {item['name']} ({self.catalog.price(item['name'])} EGP)", 
                           font=("Arial", 12, "bold"),
                           bg="#003791",
                           fg="white",
@@ -420,38 +804,74 @@ class PlayStationManagementSystem:
                                    anchor=tk.W)
         self.status_label.pack(fill=tk.X, padx=10, pady=5)
     
-    def update_time(self):
-        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.date_label.config(text=now)
-        self.root.after(1000, self.update_time)
+    def reload_pricing(self, now):
+        # Edits to pricing_rules.json apply within a few seconds; a broken or unreadable file keeps the current rules
+        try:
+            changed, rules = self.pricing_file.poll()
+        except (PricingError, OSError) as e:
+            self.update_status(f"Pricing rules not loaded: {e}")
+            return
+        if changed:
+            self.billing.set_rules(rules)
+            self.update_status("Pricing rules loaded" if rules else "Flat tariffs in use")
+    
+    def queue_upload(self, kind, data):
+        # Queued for head office only when branch sync is on
+        if self.outbox is not None:
+            self.outbox.add(kind, data)
+            self.writer.submit(("outbox",), self.outbox.flush, error_message="Failed to queue upload")
+    
+    def update_sync_status(self, now):
+        status = self.sync_agent.status
+        if status != getattr(self, "shown_sync_status", None):
+            self.shown_sync_status = status
+            self.update_status(status)
+    
+    def update_time(self, now):
+        self.scheduler.set_text(self.date_label, now.strftime("%Y-%m-%d %H:%M:%S"))
+    
+    def live_tile_text(self, rooms, now):
+        costs = self.billing.price_batch(rooms, now)
+        texts = {}
+        for room in rooms:
+            if room.paid_until:
+                # Prepaid rooms count down instead of up
+                left = max(0, int((room.paid_until - now).total_seconds()))
+                clock = f"{left // 3600}:{left % 3600 // 60:02d}:{left % 60:02d} left"
+            else:
+                elapsed = int((now - room.start_time).total_seconds())
+                clock = f"{elapsed // 3600}:{elapsed % 3600 // 60:02d}:{elapsed % 60:02d}"
+            texts[room.name] = {
+                "time": f"Started: {room.start_time.strftime('%H:%M:%S')} ({clock})",
+                "cost": f"{costs[room.name][2]:.2f} EGP"
+            }
+        return texts
+    
+    def customer_choices(self, customers):
+        return [(f"{c.name}  {c.phone}  ({c.visits} visits)", c) for c in customers]
+    
+    def fill_customer(self, customer):
+        self.player_name.delete(0, tk.END)
+        self.player_name.insert(0, customer.name)
+        self.contact_number.delete(0, tk.END)
+        self.contact_number.insert(0, customer.phone)
+        self.update_status(f"{customer.name}: {customer.visits} visits, {customer.spend:.2f} EGP spent")
     
     def update_room_dropdown(self):
-        available_rooms = [room for room, info in self.rooms.items() 
-                         if info["status"] == 0 and info["type"] == self.console_type.get()]
-        self.room_dropdown["values"] = available_rooms
-        if available_rooms:
-            self.room_var.set(available_rooms[0])
-        else:
-            self.room_var.set("")
+        console = self.console_type.get()
+        held = self.reservations.held_rooms(self.clock.now(), self.reservation_hold)
+        # The engine keeps free rooms in display order, so this is a copy rather than a sort
+        rooms = self.engine.available_rooms(console)
+        if held:
+            rooms = [room for room in rooms if room not in held]
+        self.room_dropdown["values"] = rooms
+        self.room_var.set(rooms[0] if rooms else "")
         
         self.update_room_indicators()
     
     def update_room_indicators(self):
-        for room, indicator in self.room_indicators.items():
-            room_info = self.rooms[room]
-            status_color = "#5c7cfa" if room_info["status"] == 0 else "#ff0000"
-            status_text = "AVAILABLE" if room_info["status"] == 0 else "OCCUPIED"
-            
-            indicator["status"].config(text=status_text, bg=status_color)
-            
-            if room_info["status"] == 1:
-                start_time = room_info["start_time"].strftime("%H:%M:%S") if room_info["start_time"] else ""
-                player_text = f"{room_info['player']}\n({room_info['contact']})"
-                indicator["time"].config(text=f"Started: {start_time}")
-                indicator["player"].config(text=player_text)
-            else:
-                indicator["time"].config(text="")
-                indicator["player"].config(text="")
+        # The grid tracks which rooms changed through the engine, so this only redraws those
+        self.room_grid.schedule_refresh()
     
     def start_session(self):
         player_name = self.player_name.get().strip()
@@ -465,274 +885,295 @@ class PlayStationManagementSystem:
             messagebox.showerror("Error", "Please enter contact number")
             return
             
+        now = self.clock.now()
         room = self.room_var.get()
+        # A customer arriving for their reservation gets the room kept for them
+        reservation = self.reservations.due(contact_number, now, self.reservation_hold)
+        if reservation is not None and self.engine.is_free(reservation.room):
+            room = reservation.room
         if not room:
+            self.counters.turned_away(self.console_type.get())
             messagebox.showerror("Error", "No available rooms for selected console type")
             return
+        holder = self.reservations.holder(room, now, self.reservation_hold)
+        if holder is not None and holder is not reservation:
+            messagebox.showerror("Error", f"{room} is reserved for {holder.player} at {holder.start:%H:%M}")
+            self.update_room_dropdown()
+            return
+            
+        hours = self.prepaid_blocks[self.prepaid.get()]
+        paid_until = now + timedelta(hours=hours) if hours else None
             
         # Start the session
-        self.rooms[room]["status"] = 1
-        self.rooms[room]["player"] = player_name
-        self.rooms[room]["contact"] = contact_number
-        self.rooms[room]["start_time"] = datetime.now()
-        self.rooms[room]["bar_items"] = []
+        try:
+            self.engine.start_session(room, player_name, contact_number, now, self.game_mode.get(), paid_until)
+        except SessionError as e:
+            messagebox.showerror("Error", str(e))
+            self.update_room_dropdown()
+            return
+        if reservation is not None:
+            self.reservations.cancel(reservation.id)
+            self.writer.submit(("reservations",), self.reservations.flush, error_message="Failed to store reservations")
+        self.log_event("start", room=room, player=player_name, contact=contact_number,
+                       start_time=self.rooms[room].start_time.isoformat(), mode=self.game_mode.get(),
+                       paid_until=paid_until.isoformat() if paid_until else None)
+        self.schedule_expiry(room)
         
         # Clear input fields for next booking
         self.player_name.delete(0, tk.END)
         self.contact_number.delete(0, tk.END)
         
         self.update_status(f"Session started in {room} for {player_name}")
+        # Refreshing the dropdown also auto-selects the next available room
         self.update_room_dropdown()
-        
-        # Auto-select next available room if exists
-        available_rooms = [r for r, info in self.rooms.items() 
-                          if info["status"] == 0 and info["type"] == self.console_type.get()]
-        if available_rooms:
-            self.room_var.set(available_rooms[0])
+    
+    def schedule_expiry(self, name):
+        room = self.rooms[name]
+        if not room.paid_until:
+            return
+        # The session's start time tells a stale timer apart from a later session in the same room
+        self.expiry_timers[name] = (
+            self.timers.schedule(room.paid_until - self.prepaid_warning, self.warn_expiry, name, room.start_time),
+            self.timers.schedule(room.paid_until, self.expire_session, name, room.start_time))
+    
+    def cancel_expiry(self, name):
+        for timer in self.expiry_timers.pop(name, ()):
+            self.timers.cancel(timer)
+    
+    def warn_expiry(self, name, start_time):
+        room = self.rooms[name]
+        if room.status == 1 and room.start_time == start_time:
+            minutes = round((room.paid_until - self.clock.now()).total_seconds() / 60)
+            self.update_status(f"{name}: {minutes} minutes of prepaid time left for {room.player}")
+    
+    def expire_session(self, name, start_time):
+        room = self.rooms[name]
+        if room.status == 1 and room.start_time == start_time:
+            self.current_room = name
+            # Timers fire on the next tick, or on the first one after a restart; the
+            # session still ends, and is billed, at the end of the prepaid block
+            self.end_session(end_time=room.paid_until)
+            self.update_status(f"Prepaid time is up in {name}; session ended")
+    
+    def reserve_room(self):
+        player_name = self.player_name.get().strip()
+        contact_number = self.contact_number.get().strip()
+        if not player_name or not contact_number:
+            messagebox.showerror("Error", "Please enter the player name and contact number to reserve")
+            return
+        console = self.console_type.get()
+        
+        def confirm_reserve(values):
+            try:
+                start = datetime.strptime(values["Start"], "%Y-%m-%d %H:%M")
+                duration = timedelta(hours=float(values["Hours"]))
+            except ValueError:
+                messagebox.showerror("Error", "Enter the start as YYYY-MM-DD HH:MM and the hours as a number")
+                return False
+            if duration <= timedelta(0):
+                messagebox.showerror("Error", "Hours must be more than zero")
+                return False
+            if start < self.clock.now():
+                messagebox.showerror("Error", "The start is in the past")
+                return False
+            rooms = [name for name, room in self.rooms.items() if room.type == console]
+            # Rooms in use are busy until their prepaid time runs out; open-ended sessions have no end
+            busy = {name: self.rooms[name].paid_until for name in self.engine.occupied_rooms(console)}
+            slot = self.reservations.next_free_slot(rooms, duration, start, busy)
+            if slot is None:
+                messagebox.showerror("Error", f"No {console} room can be reserved; all are in open sessions"
+                                     if rooms else f"There are no {console} rooms")
+                return False
+            if slot[0] != start:
+                messagebox.showerror("Error", f"No {console} is free then. "
+                                              f"The next free slot is {slot[1]} at {slot[0]:%Y-%m-%d %H:%M}")
+                return False
+            try:
+                self.reservations.add(slot[1], player_name, contact_number, start, start + duration,
+                                      self.clock.now(), busy)
+            except ReservationError as e:
+                messagebox.showerror("Error", str(e))
+                return False
+            self.writer.submit(("reservations",), self.reservations.flush, error_message="Failed to store reservations")
+            self.update_status(f"Reserved {slot[1]} for {player_name} at {start:%Y-%m-%d %H:%M}")
+            self.update_room_dropdown()
+            return True
+        
+        start = (self.clock.now() + timedelta(hours=1)).replace(minute=0, second=0, microsecond=0)
+        self.dialogs.form("reserve", "Reserve a Room", ("Start", "Hours"), "#5c7cfa").show(
+            f"Reserve a {console} for {player_name}:", {"Start": start.strftime("%Y-%m-%d %H:%M"), "Hours": "2"},
+            "Reserve", confirm_reserve)
     
     def end_selected_session(self):
         # Let user select which room to end
-        occupied_rooms = [room for room, info in self.rooms.items() if info["status"] == 1]
-        if not occupied_rooms:
+        if not self.engine.has_active_sessions():
             messagebox.showerror("Error", "No active sessions to end")
             return
-            
-        # Create selection dialog
-        selection_window = tk.Toplevel(self.root)
-        selection_window.title("Select Room to End")
-        selection_window.geometry("300x200")
-        selection_window.resizable(False, False)
-        selection_window.configure(bg="#000000")
-        
-        tk.Label(selection_window, 
-                text="Select room to end session:", 
-                font=("Arial", 10),
-                bg="#000000",
-                fg="white").pack(pady=10)
-        
-        room_var = tk.StringVar()
-        room_dropdown = ttk.Combobox(selection_window, 
-                                    textvariable=room_var, 
-                                    values=occupied_rooms,
-                                    state="readonly",
-                                    font=("Arial", 10))
-        room_dropdown.pack(pady=5)
-        room_var.set(occupied_rooms[0])
-        
-        def confirm_end():
-            selected_room = room_var.get()
-            if selected_room:
-                self.current_room = selected_room
-                self.end_session()
-                selection_window.destroy()
-        
-        tk.Button(selection_window, 
-                 text="End Session", 
-                 command=confirm_end,
-                 bg="#ff0000",
-                 fg="white",
-                 font=("Arial", 10, "bold"),
-                 bd=0,
-                 padx=10,
-                 pady=5).pack(pady=10)
-    
-    def end_session(self):
+        occupied_rooms = self.engine.occupied_rooms()
+        
+        def confirm_end(selected_room):
+            self.current_room = selected_room
+            self.end_session()
+        
+        self.dialogs.picker("end", "Select Room to End", "#ff0000").show(
+            "Select room to end session:", occupied_rooms, "End Session", confirm_end)
+    
+    def end_session(self, end_time=None):
         if not self.current_room:
             messagebox.showerror("Error", "No room selected to end")
             return
             
-        room_info = self.rooms[self.current_room]
-        end_time = datetime.now()
-        start_time = room_info["start_time"]
-        duration = (end_time - start_time).total_seconds() / 3600  # in hours
-        
-        # Calculate gaming cost
-        if room_info["type"] == "PS4":
-            price = self.ps4_single_price if self.game_mode.get() == "Single" else self.ps4_multi_price
-        else:
-            price = self.ps5_single_price if self.game_mode.get() == "Single" else self.ps5_multi_price
-        
-        gaming_cost = round(duration * price, 2)
-        
-        # Calculate bar items cost
-        bar_items_cost = len(room_info["bar_items"]) * self.bar_item_price
-        
-        total_cost = gaming_cost + bar_items_cost
+        end_time = end_time or self.clock.now()
+        try:
+            # Priced before the room is freed, so a session that cannot be billed keeps running
+            receipt = self.build_receipt(self.engine.session(self.current_room), end_time)
+            room_info = self.engine.end_session(self.current_room)
+        except (SessionError, ValueError) as e:
+            messagebox.showerror("Error", str(e))
+            self.current_room = None
+            return
+        if self.remote:
+            # The server's copy also has bar items added at other desks
+            receipt = self.build_receipt(room_info, end_time)
+        self.cancel_expiry(self.current_room)
+        total_cost = receipt["total_cost"]
         
         # Update daily revenue
         self.daily_revenue += total_cost
         self.daily_sessions += 1
+        self.counters.record_receipt(receipt)
         
         # Store receipt info
-        self.receipts[self.current_room] = {
-            "room": self.current_room,
-            "player": room_info["player"],
-            "contact": room_info["contact"],
-            "start_time": start_time.strftime("%Y-%m-%d %H:%M:%S"),
-            "end_time": end_time.strftime("%Y-%m-%d %H:%M:%S"),
-            "duration": f"{duration:.2f} hours",
-            "console": room_info["type"],
-            "mode": self.game_mode.get(),
-            "hourly_rate": price,
-            "gaming_cost": gaming_cost,
-            "bar_items": room_info["bar_items"],
-            "bar_items_cost": bar_items_cost,
-            "total_cost": total_cost
-        }
-        
-        # Reset room
-        self.rooms[self.current_room]["status"] = 0
-        self.rooms[self.current_room]["player"] = ""
-        self.rooms[self.current_room]["contact"] = ""
-        self.rooms[self.current_room]["start_time"] = None
-        self.rooms[self.current_room]["bar_items"] = []
+        self.ledger.add(receipt)
+        self.writer.submit(("ledger",), self.ledger.flush, error_message="Failed to store receipt")
+        self.customers.record_visit(receipt)
+        self.writer.submit(("customers",), self.customers.flush, error_message="Failed to store customer")
+        self.history.append_session(self.current_room, receipt["console"], receipt["mode"],
+                                    room_info["start_time"], end_time, receipt["gaming_cost"],
+                                    receipt["bar_items_cost"], total_cost)
+        self.writer.submit(("analytics",), self.history.flush, error_message="Failed to store session history")
+        self.log_event("end", room=self.current_room, receipt=receipt)
+        self.queue_upload("session", receipt)
         
         self.update_status(f"Session ended in {self.current_room}. Total cost: {total_cost} EGP")
         self.update_room_dropdown()
         self.current_room = None
     
+    def build_receipt(self, session, end_time):
+        start_time = session["start_time"]
+        # A prepaid block is charged in full even when the customer leaves early
+        billed_until = max(end_time, session.get("paid_until") or end_time)
+        cost = self.billing.price(session["console"], session["mode"], start_time, billed_until,
+                                  session["bar_items"])
+        return {
+            "room": session["room"],
+            "player": session["player"],
+            "contact": session["contact"],
+            "start_time": start_time.strftime("%Y-%m-%d %H:%M:%S"),
+            "end_time": end_time.strftime("%Y-%m-%d %H:%M:%S"),
+            "duration": f"{cost['duration_hours']:.2f} hours",
+            "console": session["console"],
+            "mode": session["mode"],
+            "hourly_rate": cost["hourly_rate"],
+            "gaming_cost": cost["gaming_cost"],
+            "bar_items": session["bar_items"],
+            "bar_items_cost": cost["bar_items_cost"],
+            "total_cost": cost["total_cost"],
+            "segments": cost["segments"]
+        }
+    
     def print_selected_receipt(self):
-        occupied_rooms = [room for room, info in self.rooms.items() if info["status"] == 1]
-        if not occupied_rooms and not hasattr(self, 'receipts'):
+        occupied_rooms = self.engine.occupied_rooms()
+        # Completed receipts are listed newest first as "#id room player"
+        completed = {f"#{r['id']} {r['room']} {r['player']}": r for r in self.ledger.recent(50)}
+        if not occupied_rooms and not completed:
             messagebox.showerror("Error", "No active sessions or receipts available")
             return
             
-        # Create selection dialog
-        selection_window = tk.Toplevel(self.root)
-        selection_window.title("Select Receipt to Print")
-        selection_window.geometry("300x200")
-        selection_window.resizable(False, False)
-        selection_window.configure(bg="#000000")
-        
-        tk.Label(selection_window, 
-                text="Select room receipt to print:", 
-                font=("Arial", 10),
-                bg="#000000",
-                fg="white").pack(pady=10)
-        
-        room_var = tk.StringVar()
         # Include both active sessions and completed ones with receipts
-        available_receipts = list(self.receipts.keys()) + occupied_rooms
-        room_dropdown = ttk.Combobox(selection_window, 
-                                    textvariable=room_var, 
-                                    values=available_receipts,
-                                    state="readonly",
-                                    font=("Arial", 10))
-        room_dropdown.pack(pady=5)
-        if available_receipts:
-            room_var.set(available_receipts[0])
-        
-        def confirm_print():
-            selected_room = room_var.get()
-            if selected_room:
+        available_receipts = occupied_rooms + list(completed.keys())
+        
+        def confirm_print(selected_room):
+            if selected_room in completed:
+                self.receipt_info = completed[selected_room]
+            else:
                 self.current_room = selected_room
-                if selected_room in self.receipts:
-                    self.receipt_info = self.receipts[selected_room]
-                else:
-                    # Create receipt info for active session
-                    room_info = self.rooms[selected_room]
-                    end_time = datetime.now()
-                    start_time = room_info["start_time"]
-                    duration = (end_time - start_time).total_seconds() / 3600
-                    
-                    if room_info["type"] == "PS4":
-                        price = self.ps4_single_price if self.game_mode.get() == "Single" else self.ps4_multi_price
-                    else:
-                        price = self.ps5_single_price if self.game_mode.get() == "Single" else self.ps5_multi_price
-                    
-                    gaming_cost = round(duration * price, 2)
-                    bar_items_cost = len(room_info["bar_items"]) * self.bar_item_price
-                    total_cost = gaming_cost + bar_items_cost
-                    
-                    self.receipt_info = {
-                        "room": selected_room,
-                        "player": room_info["player"],
-                        "contact": room_info["contact"],
-                        "start_time": start_time.strftime("%Y-%m-%d %H:%M:%S"),
-                        "end_time": end_time.strftime("%Y-%m-%d %H:%M:%S"),
-                        "duration": f"{duration:.2f} hours",
-                        "console": room_info["type"],
-                        "mode": self.game_mode.get(),
-                        "hourly_rate": price,
-                        "gaming_cost": gaming_cost,
-                        "bar_items": room_info["bar_items"],
-                        "bar_items_cost": bar_items_cost,
-                        "total_cost": total_cost
-                    }
-                
-                self.print_receipt()
-                selection_window.destroy()
-        
-        tk.Button(selection_window, 
-                 text="Print Receipt", 
-                 command=confirm_print,
-                 bg="#ff9500",
-                 fg="black",
-                 font=("Arial", 10, "bold"),
-                 bd=0,
-                 padx=10,
-                 pady=5).pack(pady=10)
+                # Create receipt info for active session
+                room_info = self.rooms[selected_room]
+                self.receipt_info = self.build_receipt({
+                    "room": selected_room,
+                    "console": room_info.type,
+                    "player": room_info.player,
+                    "contact": room_info.contact,
+                    "start_time": room_info.start_time,
+                    "mode": room_info.mode,
+                    "bar_items": dict(room_info.bar_items),
+                    "paid_until": room_info.paid_until
+                }, self.clock.now())
+            
+            self.print_receipt()
+        
+        self.dialogs.picker("receipt", "Select Receipt to Print", "#ff9500", "black").show(
+            "Select room receipt to print:", available_receipts, "Print Receipt", confirm_print)
     
     def add_bar_item(self, item):
-        if not any(info["status"] == 1 for info in self.rooms.values()):
+        if not self.engine.has_active_sessions():
             messagebox.showerror("Error", "No active sessions to add bar items")
             return
             
         # Create selection dialog if multiple rooms are active
-        occupied_rooms = [room for room, info in self.rooms.items() if info["status"] == 1]
+        occupied_rooms = self.engine.occupied_rooms()
         if len(occupied_rooms) > 1:
-            selection_window = tk.Toplevel(self.root)
-            selection_window.title("Select Room")
-            selection_window.geometry("300x200")
-            selection_window.resizable(False, False)
-            selection_window.configure(bg="#000000")
-            
-            tk.Label(selection_window, 
-                    text="Select room to add item:", 
-                    font=("Arial", 10),
-                    bg="#000000",
-                    fg="white").pack(pady=10)
-            
-            room_var = tk.StringVar()
-            room_dropdown = ttk.Combobox(selection_window, 
-                                        textvariable=room_var, 
-                                        values=occupied_rooms,
-                                        state="readonly",
-                                        font=("Arial", 10))
-            room_dropdown.pack(pady=5)
-            room_var.set(occupied_rooms[0])
-            
-            def confirm_add():
-                selected_room = room_var.get()
-                if selected_room:
-                    self.rooms[selected_room]["bar_items"].append(item)
-                    self.update_status(f"Added {item} to {selected_room}")
-                    selection_window.destroy()
-            
-            tk.Button(selection_window, 
-                     text=f"Add {item}", 
-                     command=confirm_add,
-                     bg="#5c7cfa",
-                     fg="white",
-                     font=("Arial", 10, "bold"),
-                     bd=0,
-                     padx=10,
-                     pady=5).pack(pady=10)
+            self.dialogs.picker("bar", "Select Room", "#5c7cfa").show(
+                "Select room to add item:", occupied_rooms, f"Add {item}",
+                lambda selected_room: self.add_bar_item_to(selected_room, item))
         else:
             # Only one room is active, add to it directly
-            self.rooms[occupied_rooms[0]]["bar_items"].append(item)
-            self.update_status(f"Added {item} to {occupied_rooms[0]}")
+            self.add_bar_item_to(occupied_rooms[0], item)
+    
+    def add_bar_item_to(self, room, item):
+        if not self.catalog.in_stock(item):
+            messagebox.showerror("Error", f"{item} is out of stock")
+            return
+        try:
+            self.engine.add_bar_item(room, item)
+        except SessionError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        try:
+            self.catalog.take(item)
+        except StockError:
+            # The menu and the catalog disagree; the sale still stands
+            pass
+        self.log_event("bar", room=room, item=item)
+        self.queue_upload("bar", {"room": room, "item": item, "qty": 1, "price": self.catalog.price(item),
+                                  "time": self.clock.now().strftime("%Y-%m-%d %H:%M:%S")})
+        self.history.append_bar_sale(room, item, self.clock.now(), 1, self.catalog.price(item))
+        self.writer.submit(("analytics",), self.history.flush, error_message="Failed to store bar sale")
+        if item in self.catalog.stock:
+            stock = dict(self.catalog.stock)
+            self.writer.submit(("stock",), lambda: self.catalog.save_stock(stock),
+                               error_message="Failed to save bar stock")
+        self.update_status(f"Added {item} to {room}")
     
     def print_receipt(self):
         if not hasattr(self, 'receipt_info'):
             messagebox.showerror("Error", "No receipt information available")
             return
-            
+        
+        # A completed receipt that was printed before is shown exactly as it was
+        receipt_id = self.receipt_info.get('id')
+        archived = self.archive.get(receipt_id) if receipt_id else None
+        if archived is not None:
+            self.show_receipt(archived, f"Receipt #{receipt_id} (reprint)")
+            return
+        
+        now = self.clock.now()
         receipt = f"""
 {'='*50}
 {'PLAYSTATION RECEIPT'.center(50)}
 {'='*50}
-{'Date:':<25}{datetime.now().strftime("%Y-%m-%d %H:%M:%S"):>25}
+{'Date:':<25}{now.strftime("%Y-%m-%d %H:%M:%S"):>25}
 {'Room:':<25}{self.receipt_info['room']:>25}
 {'Player:':<25}{self.receipt_info['player']:>25}
 {'Contact:':<25}{self.receipt_info['contact']:>25}
@@ -743,8 +1184,8 @@ class PlayStationManagementSystem:
 {'Console:':<25}{self.receipt_info['console']:>25}
 {'Game Mode:':<25}{self.receipt_info['mode']:>25}
 {'Hourly Rate:':<25}{self.receipt_info['hourly_rate']:>25} EGP
-{'Gaming Cost:':<25}{self.receipt_info['gaming_cost']:>25} EGP
-{'Bar Items:':<25}{', '.join(self.receipt_info['bar_items']) or 'None':>25}
+{self.format_segments(self.receipt_info.get('segments'))}{'Gaming Cost:':<25}{self.receipt_info['gaming_cost']:>25} EGP
+{'Bar Items:':<25}{format_bar_items(self.receipt_info['bar_items']) or 'None':>25}
 {'Bar Items Cost:':<25}{self.receipt_info['bar_items_cost']:>25} EGP
 {'='*50}
 {'TOTAL COST:':<25}{self.receipt_info['total_cost']:>25} EGP
@@ -753,36 +1194,71 @@ class PlayStationManagementSystem:
 {'='*50}
 """
         
-        # Show receipt in messagebox
-        messagebox.showinfo("Receipt", receipt)
-        
-        # Save receipt to application directory
-        app_path = os.path.dirname(os.path.abspath(sys.argv[0]))
-        receipt_file = os.path.join(app_path, f"receipt_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt")
-        
-        try:
-            with open(receipt_file, "w") as f:
-                f.write(receipt)
-            self.update_status(f"Receipt saved to {receipt_file}")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to save receipt: {str(e)}")
+        # Final receipts go to the archive (written in the background); a running session's
+        # preview has no ledger id and is not kept
+        if receipt_id:
+            print_no = self.archive.add(receipt, receipt_id, now)
+            self.writer.submit(("archive",), self.archive.flush, f"Receipt #{print_no} archived",
+                               "Failed to archive receipt")
+        self.show_receipt(receipt, f"Receipt #{receipt_id}" if receipt_id else f"Receipt for {self.receipt_info['room']}")
+    
+    def format_segments(self, segments):
+        # One line per rate window the session crossed; nothing for a plain flat-rate session
+        if not segments or (len(segments) == 1 and segments[0]["label"] == "Standard"):
+            return ""
+        return "".join(f"  {s['label'][:13]:<13} {s['start'][11:16]}-{s['end'][11:16]} "
+                       f"{s['rate']:>6g}/h {s['cost']:>10.2f}\n" for s in segments)
+    
+    def show_receipt(self, receipt, name):
+        if self.spooler is None:
+            messagebox.showinfo("Receipt", receipt)
+            self.update_status(f"{name} shown")
+        elif self.spooler.submit(receipt, name):
+            self.update_status(f"Printing {name.lower()}...")
 
     def end_of_day(self):
+        now = self.clock.now()
         eod_report = f"""
 {'='*50}
 {'END OF DAY REPORT'.center(50)}
 {'='*50}
-{'Date:':<25}{datetime.now().strftime("%Y-%m-%d"):>25}
+{'Date:':<25}{now.strftime("%Y-%m-%d"):>25}
 {'Total Sessions:':<25}{self.daily_sessions:>25}
 {'Total Revenue:':<25}{self.daily_revenue:>25} EGP
 {'='*50}
+{'BY CONSOLE (TODAY)'.center(50)}
+{'='*50}
+"""
+        
+        today = now.strftime("%Y-%m-%d")
+        tomorrow = (now + timedelta(days=1)).strftime("%Y-%m-%d")
+        for console, count, total in self.ledger.console_totals(today, tomorrow):
+            eod_report += f"{console + ' sessions:':<25}{count:>25}\n"
+            eod_report += f"{console + ' revenue:':<25}{total:>25} EGP\n"
+        
+        # Today's averages and bar sales from the columnar history
+        durations = self.analytics.average_duration("console", today, today)
+        for console, hours in sorted(durations.items()):
+            eod_report += f"{console + ' avg session:':<25}{hours:>19.2f} hours\n"
+        for item, (qty, amount) in sorted(self.analytics.bar_items(today, today).items()):
+            eod_report += f"{item + ' x' + str(qty) + ':':<25}{amount:>25} EGP\n"
+        for console in self.engine.consoles():
+            eod_report += f"{console + ' utilization:':<25}{self.counters.utilization(console, now):>25.1%}\n"
+        for item, left in sorted(self.catalog.stock.items()):
+            eod_report += f"{item + ' stock left:':<25}{left:>25}\n"
+        
+        eod_report += f"""{'='*50}
 {'ROOMS STATUS'.center(50)}
 {'='*50}
 """
         
+        # Price every open session in one batch for the running-cost preview
+        running = self.billing.price_batch([self.rooms[r] for r in self.engine.occupied_rooms()], now)
         for room, info in self.rooms.items():
-            status = "Occupied" if info["status"] else "Available"
+            status = f"Occupied ({running[room][2]:.2f} EGP)" if info.status else "Available"
             eod_report += f"{room:<25}{status:>25}\n"
+        if running:
+            eod_report += f"{'Open Sessions Value:':<25}{sum(t for _, _, t in running.values()):>25.2f} EGP\n"
         
         eod_report += "="*50
         
@@ -790,26 +1266,52 @@ class PlayStationManagementSystem:
         messagebox.showinfo("End of Day Report", eod_report)
         
         # Save report to application directory
-        app_path = os.path.dirname(os.path.abspath(sys.argv[0]))
-        eod_file = os.path.join(app_path, f"eod_report_{datetime.now().strftime('%Y%m%d')}.txt")
+        eod_file = os.path.join(self.app_path, f"eod_report_{now.strftime('%Y%m%d')}.txt")
         
-        try:
-            with open(eod_file, "w") as f:
-                f.write(eod_report)
-            self.update_status(f"End of day report saved to {eod_file}")
-            
-            # Reset daily counters
-            self.daily_revenue = 0
-            self.daily_sessions = 0
-            # Clear receipts
-            self.receipts = {}
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to save EOD report: {str(e)}")
+        # The report text is already built, so the counters can reset while it is written
+        self.writer.write_file(eod_file, eod_report, f"End of day report saved to {eod_file}")
+        self.update_status("Saving end of day report...")
+        
+        self.queue_upload("eod", {"date": now.strftime("%Y-%m-%d %H:%M:%S"), "sessions": self.daily_sessions,
+                                  "revenue": self.daily_revenue, "report": eod_report})
+        if self.sync_agent:
+            self.sync_agent.nudge()
+        
+        # Reset daily counters
+        self.daily_revenue = 0
+        self.daily_sessions = 0
+        self.counters.reset(now)
+        # Reservations that ended without being checked in are no-shows
+        self.reservations.prune(now)
+        self.writer.submit(("reservations",), self.reservations.flush, error_message="Failed to store reservations")
+        # Start the next day from a fresh snapshot instead of replaying this one
+        self.log_event("eod")
+        self.journal.snapshot(self.journal_state())
     
     def update_status(self, message):
         self.status_label.config(text=f"Status: {message}")
 
 if __name__ == "__main__":
+    # Optional: --server host[:port] to share rooms with other desks through session_server.py
+    # and --printer tcp://host[:port] | /dev/usb/lp0 | fake to print receipts (see print_spooler.py)
+    # and --sync http://host:port [--branch NAME] to upload to a head-office aggregator (see branch_sync.py)
+    # and --restore handover.pss to take over a shift saved on another machine (see state_snapshot.py)
+    server = None
+    if "--server" in sys.argv[1:-1]:
+        server = sys.argv[sys.argv.index("--server") + 1]
+    printer = None
+    if "--printer" in sys.argv[1:-1]:
+        printer = sys.argv[sys.argv.index("--printer") + 1]
+    sync = None
+    if "--sync" in sys.argv[1:-1]:
+        sync = sys.argv[sys.argv.index("--sync") + 1]
+    branch = None
+    if "--branch" in sys.argv[1:-1]:
+        branch = sys.argv[sys.argv.index("--branch") + 1]
+    restore = None
+    if "--restore" in sys.argv[1:-1]:
+        restore = sys.argv[sys.argv.index("--restore") + 1]
     root = tk.Tk()
-    app = PlayStationManagementSystem(root)
+    app = PlayStationManagementSystem(root, server=server, printer=printer, sync=sync, branch=branch,
+                                      restore=restore)
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,108 @@
+import builtins
+import os
+from datetime import datetime
+
+import pytest
+
+from analytics_store import Analytics, ColumnarStore
+
+
+DAY = "2026-01-01"
+WHEN = datetime(2026, 1, 1, 12)
+
+
+def add(store, room, total=100):
+    store.append_session(room, "PS4", "Single", WHEN, WHEN, total, 0, total)
+
+
+def rooms(store):
+    data = store.read_day(DAY, "sessions")
+    try:
+        return [store.decode("room", code) for code in data["room"]]
+    finally:
+        data.close()
+
+
+def fail_column_open(monkeypatch, after):
+    # The open of column file number `after` + 1 raises, part way through a table
+    real_open = builtins.open
+    opened = [0]
+
+    def flaky_open(path, *args, **kwargs):
+        if str(path).endswith(".col"):
+            opened[0] += 1
+            if opened[0] == after + 1:
+                raise OSError(28, "No space left on device")
+        return real_open(path, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "open", flaky_open)
+
+
+def test_rows_round_trip(tmp_path):
+    store = ColumnarStore(str(tmp_path))
+    add(store, "PS4-1", 100)
+    add(store, "PS4-2", 50)
+    store.flush()
+    reopened = ColumnarStore(str(tmp_path))
+    assert rooms(reopened) == ["PS4-1", "PS4-2"]
+    assert Analytics(reopened).revenue("room") == {"PS4-1": 100, "PS4-2": 50}
+
+
+def test_bar_sales_and_revenue_by_console(tmp_path):
+    store = ColumnarStore(str(tmp_path))
+    add(store, "PS4-1", 100)
+    add(store, "PS4-2", 50)
+    store.append_bar_sale("PS4-1", "Cola", WHEN, 2, 30)
+    store.flush()
+    analytics = Analytics(ColumnarStore(str(tmp_path)))
+    assert analytics.revenue("console") == {"PS4": 150}
+    assert analytics.bar_items() == {"Cola": (2, 30.0)}
+    assert analytics.session_count() == 2
+
+
+def test_failed_flush_keeps_rows_for_the_retry(tmp_path, monkeypatch):
+    store = ColumnarStore(str(tmp_path))
+    add(store, "PS4-1")
+    with monkeypatch.context() as patch:
+        fail_column_open(patch, after=0)
+        with pytest.raises(OSError):
+            store.flush()
+    add(store, "PS4-2")
+    store.flush()
+    assert rooms(store) == ["PS4-1", "PS4-2"]
+
+
+def test_torn_flush_is_invisible_and_repaired(tmp_path, monkeypatch):
+    store = ColumnarStore(str(tmp_path))
+    add(store, "PS4-1")
+    store.flush()
+    add(store, "PS4-2")
+    with monkeypatch.context() as patch:
+        fail_column_open(patch, after=3)
+        with pytest.raises(OSError):
+            store.flush()
+    # Three columns hold a second row, the rest do not; readers stop at the committed count
+    assert ColumnarStore(str(tmp_path)).read_day(DAY, "sessions").rows == 1
+
+    store.flush()
+    assert rooms(ColumnarStore(str(tmp_path))) == ["PS4-1", "PS4-2"]
+    sizes = {name: os.path.getsize(os.path.join(tmp_path, DAY, name))
+             for name in os.listdir(os.path.join(tmp_path, DAY)) if name.endswith(".col")}
+    assert sizes["sessions.start_ts.col"] == sizes["sessions.total_cost.col"] == 16
+    assert sizes["sessions.room.col"] == 8
+
+
+
+def test_torn_first_flush_of_a_day_is_cut_back(tmp_path, monkeypatch):
+    # Without a rows file nothing of the day is committed, whatever the columns hold
+    store = ColumnarStore(str(tmp_path))
+    add(store, "PS4-1")
+    with monkeypatch.context() as patch:
+        fail_column_open(patch, after=3)
+        with pytest.raises(OSError):
+            store.flush()
+    assert store.committed_rows(DAY, "sessions") == 0
+
+    store.flush()
+    assert rooms(ColumnarStore(str(tmp_path))) == ["PS4-1"]
+    assert os.path.getsize(os.path.join(tmp_path, DAY, "sessions.room.col")) == 4
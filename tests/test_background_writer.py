@@ -0,0 +1,64 @@
+import os
+import threading
+
+from background_writer import BackgroundWriter
+
+
+class Root:
+    # Polling is left to the tests, which call close() to collect the results
+    def after(self, ms, callback=None, *args):
+        pass
+
+
+class FlakyJob:
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise OSError("disk I/O error")
+
+
+def make_writer(done, errors):
+    return BackgroundWriter(Root(), done.append, errors.append, retry_delay=0)
+
+
+def test_failed_job_is_retried():
+    done, errors = [], []
+    writer = make_writer(done, errors)
+    job = FlakyJob(failures=2)
+    writer.submit(("ledger",), job, "Saved")
+    writer.close()
+    assert job.calls == 3
+    assert done == ["Saved"] and errors == []
+
+
+def test_job_that_keeps_failing_is_reported_once():
+    done, errors = [], []
+    writer = make_writer(done, errors)
+    job = FlakyJob(failures=10)
+    writer.submit(("ledger",), job, "Saved", "Failed to store receipt")
+    writer.close()
+    assert job.calls == writer.retries
+    assert done == [] and errors == ["Failed to store receipt: disk I/O error"]
+
+
+def test_waiting_job_is_replaced_by_a_newer_one_with_the_same_key(tmp_path):
+    done, errors = [], []
+    writer = make_writer(done, errors)
+    path = str(tmp_path / "report.txt")
+    # Keep the worker busy so both saves wait in the queue behind this job
+    busy = threading.Event()
+    release = threading.Event()
+    writer.submit(("block",), lambda: (busy.set(), release.wait(5)))
+    busy.wait(5)
+    writer.write_file(path, "first", "First saved")
+    writer.write_file(path, "second", "Report saved")
+    release.set()
+    writer.close()
+    with open(path) as f:
+        assert f.read() == "second"
+    assert done == ["Report saved"] and errors == []
+    assert not os.path.exists(path + ".tmp")
@@ -0,0 +1,128 @@
+import os
+import socket
+import sqlite3
+import threading
+
+import pytest
+
+from branch_sync import Outbox, SyncAgent, make_aggregator_server
+
+
+@pytest.fixture
+def head_office(tmp_path):
+    server = make_aggregator_server("127.0.0.1", 0, str(tmp_path / "head_office.db"))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    server.aggregator.close()
+
+
+def url_of(server):
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+def stored(server):
+    with server.aggregator.lock:
+        return server.aggregator.conn.execute("SELECT branch, epoch, seq FROM records ORDER BY seq").fetchall()
+
+
+def fill(outbox, count, cost=150):
+    for _ in range(count):
+        outbox.add("session", {"total_cost": cost})
+
+
+def test_resent_batch_is_stored_once(tmp_path, head_office):
+    outbox = Outbox(str(tmp_path / "outbox.db"))
+    fill(outbox, 3)
+    agent = SyncAgent(outbox, url_of(head_office), "downtown")
+    rows = outbox.pending(10)
+    # The first answer was lost, so the branch sends the same batch again
+    assert agent.upload(rows) == 3
+    assert agent.upload(rows) == 3
+    outbox.ack(3)
+    assert stored(head_office) == [("downtown", outbox.epoch, seq) for seq in (1, 2, 3)]
+    assert head_office.aggregator.summary() == {"downtown": {"sessions": 3, "revenue": 450.0, "bar_sales": 0}}
+    assert len(outbox) == 0
+    outbox.close()
+
+
+def test_failed_flush_keeps_the_records(tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.db"))
+    fill(outbox, 2)
+    conn = outbox.conn
+    outbox.conn = sqlite3.connect(":memory:")  # no outbox table, so the insert fails
+    with pytest.raises(sqlite3.OperationalError):
+        outbox.flush()
+    outbox.conn.close()
+    outbox.conn = conn
+    assert [row[0] for row in outbox.pending(10)] == [1, 2]
+    outbox.close()
+
+
+def test_partial_ack_leaves_the_rest_in_the_outbox(tmp_path):
+    class HalfTaken(SyncAgent):
+        def upload(self, rows):
+            return rows[len(rows) // 2 - 1][0]
+
+    outbox = Outbox(str(tmp_path / "outbox.db"))
+    fill(outbox, 6)
+    agent = HalfTaken(outbox, "http://127.0.0.1:1", "downtown")
+    assert agent.sync_once() == 3
+    assert [row[0] for row in outbox.pending(10)] == [4, 5, 6]
+    outbox.close()
+
+
+def test_offline_agent_backs_off_and_keeps_the_records(tmp_path):
+    # A port nothing listens on
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+
+    class Waits:
+        def __init__(self):
+            self.delays = []
+
+        def wait(self, delay):
+            self.delays.append(delay)
+            if len(self.delays) == 4:
+                agent.stopping.set()
+
+        def set(self):
+            pass
+
+        def clear(self):
+            pass
+
+    outbox = Outbox(str(tmp_path / "outbox.db"))
+    fill(outbox, 2)
+    agent = SyncAgent(outbox, f"http://127.0.0.1:{port}", "downtown", interval=30, max_backoff=100, timeout=2)
+    agent.wake = Waits()
+    agent._run()
+    assert agent.wake.delays == [30, 60, 100, 100]
+    assert agent.status.startswith("Sync offline")
+    assert len(outbox) == 2
+    outbox.close()
+
+
+def test_recreated_outbox_uploads_under_a_new_epoch(tmp_path, head_office):
+    path = str(tmp_path / "outbox.db")
+    outbox = Outbox(path)
+    first_epoch = outbox.epoch
+    fill(outbox, 2)
+    assert SyncAgent(outbox, url_of(head_office), "downtown").sync_once() == 2
+    outbox.close()
+    assert Outbox(path).epoch == first_epoch
+
+    for name in os.listdir(str(tmp_path)):
+        if name.startswith("outbox.db"):
+            os.remove(os.path.join(str(tmp_path), name))
+    outbox = Outbox(path)
+    assert outbox.epoch != first_epoch
+    fill(outbox, 1, cost=300)
+    assert SyncAgent(outbox, url_of(head_office), "downtown").sync_once() == 1
+    assert sorted((epoch, seq) for _, epoch, seq in stored(head_office)) == sorted([
+        (first_epoch, 1), (first_epoch, 2), (outbox.epoch, 1)])
+    assert head_office.aggregator.summary()["downtown"]["revenue"] == 600.0
+    outbox.close()
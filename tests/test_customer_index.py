@@ -0,0 +1,86 @@
+import sqlite3
+
+import pytest
+
+from customer_index import CustomerIndex, normalize_phone
+
+
+def receipt(receipt_id, contact="01001234567", player="Omar Mohamed", total=100.0):
+    return {"id": receipt_id, "contact": contact, "player": player, "total_cost": total,
+            "end_time": f"2026-01-01 12:{receipt_id:02d}:00"}
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = CustomerIndex(str(tmp_path / "customers.db"))
+    yield index
+    index.close()
+
+
+@pytest.mark.parametrize("contact", ["01001234567", "+20 100 123 4567", "0020-100-123-4567", "(010) 0123 4567"])
+def test_phone_numbers_are_normalized(contact):
+    assert normalize_phone(contact) == "01001234567"
+
+
+def test_visits_are_counted_once_per_receipt(index):
+    index.record_visit(receipt(1))
+    index.record_visit(receipt(2, contact="+20 100 123 4567", total=50.5))
+    # Replayed from the journal after a restart
+    index.record_visit(receipt(2, total=50.5))
+    customer = index.get("01001234567")
+    assert (customer.visits, customer.spend, customer.last_receipt) == (2, 150.5, 2)
+    assert customer.last_visit == "2026-01-01 12:02:00"
+    assert index.record_visit(receipt(3, contact="")) is None
+    assert len(index) == 1
+
+
+def test_latest_name_wins_and_is_searchable(index):
+    index.record_visit(receipt(1, player="Omar Mohamed"))
+    index.record_visit(receipt(2, contact="01112345678", player="Mona Ali"))
+    # Sorted by the matching name word: "mohamed" before "mona ali"
+    assert [c.name for c in index.match_name("mo")] == ["Omar Mohamed", "Mona Ali"]
+    index.record_visit(receipt(3, player="Omar Hassan"))
+    assert index.match_name("moh") == []
+    assert [c.name for c in index.match_name("hass")] == ["Omar Hassan"]
+    assert [c.phone for c in index.match_phone("010 0")] == ["01001234567"]
+    assert [c.phone for c in index.match_phone("01")] == ["01001234567", "01112345678"]
+
+
+def test_customers_survive_a_reopen(tmp_path):
+    path = str(tmp_path / "customers.db")
+    index = CustomerIndex(path)
+    index.record_visit(receipt(1))
+    index.close()
+    index = CustomerIndex(path)
+    assert index.get("01001234567").visits == 1
+    assert [c.name for c in index.match_name("omar")] == ["Omar Mohamed"]
+    index.close()
+
+
+def test_rebuild_adds_ledger_totals(index):
+    index.record_visit(receipt(9, total=10.0))
+    index.rebuild([("+20 100 123 4567", "Omar M", 3, 300.0, "2026-01-01 11:00:00", 5),
+                   ("", "Walk-in", 1, 50.0, "2026-01-01 10:00:00", 6)])
+    customer = index.get("01001234567")
+    assert (customer.visits, customer.spend, customer.name) == (4, 310.0, "Omar Mohamed")
+    assert len(index) == 1
+
+
+def test_failed_flush_is_written_by_the_next_one(tmp_path):
+    path = str(tmp_path / "customers.db")
+    index = CustomerIndex(path)
+    index.record_visit(receipt(1))
+    index.flush()
+    index.record_visit(receipt(2))
+    real = index.conn
+    index.conn = sqlite3.connect(":memory:")  # no customers table, so the upsert fails
+    with pytest.raises(sqlite3.OperationalError):
+        index.flush()
+    index.conn = real
+    index.record_visit(receipt(3, contact="01112345678", player="Mona Ali"))
+    index.close()
+
+    index = CustomerIndex(path)
+    assert index.get("01001234567").visits == 2
+    assert index.get("01112345678").visits == 1
+    index.close()
@@ -0,0 +1,83 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from export import SESSION_COLUMNS, CsvSink, ParquetSink, export
+from receipt_ledger import ReceiptLedger
+
+
+START = datetime(2026, 2, 1, 9)
+
+
+def receipt(i):
+    start = START + timedelta(hours=i * 3)
+    end = start + timedelta(minutes=45 + i * 11 % 60)
+    return {
+        "room": f"PS{4 + i % 2}-{1 + i % 3}", "player": f"Player {i}", "contact": f"010{i:08d}",
+        "start_time": start.strftime("%Y-%m-%d %H:%M:%S"), "end_time": end.strftime("%Y-%m-%d %H:%M:%S"),
+        "duration": "", "console": f"PS{4 + i % 2}", "mode": "Multi" if i % 4 else "Single", "hourly_rate": 100.0,
+        "gaming_cost": 75.0 + i, "bar_items": {"Cola": i % 3} if i % 3 else {}, "bar_items_cost": 15.0 * (i % 3),
+        "total_cost": 75.0 + i + 15.0 * (i % 3),
+    }
+
+
+@pytest.fixture
+def ledger_path(tmp_path):
+    path = str(tmp_path / "receipts.db")
+    ledger = ReceiptLedger(path, auto_flush=False)
+    for i in range(25):
+        ledger.add(receipt(i))
+    ledger.close()
+    return path
+
+
+def ledger_rows(path, start, end, rooms=None):
+    ledger = ReceiptLedger(path)
+    try:
+        receipts = ledger.between(start.strftime("%Y-%m-%d %H:%M:%S"), end.strftime("%Y-%m-%d %H:%M:%S"))
+    finally:
+        ledger.close()
+    return [r for r in receipts if rooms is None or r["room"] in rooms]
+
+
+def check_row(row, r):
+    assert int(row["id"]) == r["id"]
+    for name in ("room", "console", "mode", "player", "contact", "start_time", "end_time"):
+        assert row[name] == r[name]
+    for name in ("hourly_rate", "gaming_cost", "bar_items_cost", "total_cost"):
+        assert float(row[name]) == r[name]
+    assert json.loads(row["bar_items"]) == r["bar_items"]
+
+
+@pytest.mark.parametrize("rooms", [None, ["PS5-2", "PS4-1"]])
+def test_csv_rows_equal_the_ledger_rows(ledger_path, rooms):
+    start, end = datetime(2026, 2, 1), datetime(2026, 2, 3)
+    out = io.StringIO()
+    sink = CsvSink(out, SESSION_COLUMNS)
+    count = export("sessions", ledger_path, sink, start, end, rooms, chunk_rows=4)
+    sink.close()
+
+    rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+    expected = ledger_rows(ledger_path, start, end, rooms)
+    assert count == len(rows) == len(expected) > 0
+    for row, r in zip(rows, expected):
+        check_row(row, r)
+
+
+def test_parquet_rows_equal_the_ledger_rows(ledger_path, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    start, end = datetime(2026, 2, 1), datetime(2026, 3, 1)
+    path = str(tmp_path / "sessions.parquet")
+    sink = ParquetSink(path, SESSION_COLUMNS)
+    export("sessions", ledger_path, sink, start, end, chunk_rows=4)
+    sink.close()
+
+    table = pq.read_table(path)
+    expected = ledger_rows(ledger_path, start, end)
+    assert table.num_rows == len(expected) == 25
+    for row, r in zip(table.to_pylist(), expected):
+        row = dict(row, start_time=row["start_time"].isoformat(" "), end_time=row["end_time"].isoformat(" "))
+        check_row(row, r)
@@ -0,0 +1,84 @@
+import random
+from datetime import datetime, timedelta
+
+from billing import BillingEngine
+from live_counters import LiveCounters
+from session_engine import SessionEngine
+
+
+OPENED = datetime(2026, 3, 2, 10)
+
+
+class Clock:
+    def __init__(self):
+        self.time = OPENED
+
+    def now(self):
+        return self.time
+
+
+def make_counters():
+    engine = SessionEngine()
+    for console in ("PS4", "PS5"):
+        for i in range(1, 5):
+            engine.add_room(f"{console}-{i}", console)
+    billing = BillingEngine()
+    clock = Clock()
+    return engine, billing, clock, LiveCounters(engine, billing, clock.now)
+
+
+def recount(engine, billing, ended, now):
+    # Brute force over every session, the way the counters avoid doing it
+    hours = {console: 0.0 for console in engine.consoles()}
+    value = 0.0
+    for console, start, end in ended:
+        hours[console] += (end - start).total_seconds() / 3600
+    for name in engine.occupied_rooms():
+        room = engine.rooms[name]
+        elapsed = (now - room.start_time).total_seconds() / 3600
+        hours[room.type] += elapsed
+        value += billing.rate(room.type, room.mode) * elapsed
+    return hours, value
+
+
+def test_running_sums_match_a_recount_after_starts_and_ends():
+    engine, billing, clock, counters = make_counters()
+    rng = random.Random(7)
+    ended = []
+    for _ in range(200):
+        clock.time += timedelta(minutes=rng.randint(1, 20))
+        name = rng.choice(list(engine.rooms))
+        room = engine.rooms[name]
+        if room.status:
+            ended.append((room.type, room.start_time, clock.time))
+            engine.end_session(name)
+        else:
+            engine.start_session(name, "Player", "", clock.time, rng.choice(["Single", "Multi"]))
+
+        hours, value = recount(engine, billing, ended, clock.time)
+        summary = counters.summary(clock.time)
+        for console, figures in summary["consoles"].items():
+            assert abs(figures["hours"] - hours[console]) < 1e-6
+            assert figures["busy"] == len(engine.occupied_rooms(console))
+            assert figures["free"] == len(engine.available_rooms(console))
+        assert abs(summary["open_value"] - value) < 1e-6
+        total = sum(h for _, h in summary["hourly"])
+        assert abs(total - sum(hours.values())) < 1e-6
+
+
+def test_reset_starts_a_new_period_for_open_sessions():
+    engine, billing, clock, counters = make_counters()
+    engine.start_session("PS5-1", "Omar", "", OPENED, "Single")
+    engine.start_session("PS4-1", "Mona", "", OPENED, "Multi")
+    clock.time = OPENED + timedelta(hours=2)
+    engine.end_session("PS4-1")
+    counters.record_receipt({"total_cost": 240})
+
+    counters.reset(clock.time)
+    clock.time += timedelta(hours=1)
+    summary = counters.summary(clock.time)
+    assert summary["revenue"] == 0 and summary["sessions"] == 0
+    assert summary["consoles"]["PS5"]["hours"] == 1
+    assert summary["consoles"]["PS4"]["hours"] == 0
+    # The open session's value still runs from its actual start
+    assert summary["open_value"] == 3 * 150
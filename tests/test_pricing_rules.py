@@ -0,0 +1,166 @@
+import json
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from clock import SimulatedClock
+from headless import create_app
+from pricing_rules import PricingError, RateTable, RuleFile
+
+
+# 2026-01-05 is a Monday
+MONDAY = datetime(2026, 1, 5)
+NIGHT = {"name": "Night", "start": "00:00", "end": "06:00", "multiplier": 0.5}
+WEEKEND = {"name": "Weekend", "days": ["Sat", "Sun"], "start": "20:00", "end": "02:00", "multiplier": 2}
+
+
+def labels(segments):
+    return [(label, start.strftime("%a %H:%M"), end.strftime("%a %H:%M"), rate)
+            for label, start, end, rate in segments]
+
+
+def test_no_rules_is_one_standard_segment():
+    start = MONDAY + timedelta(hours=12)
+    assert RateTable().segments("PS5", "Single", start, start + timedelta(hours=2), 100) == [
+        ("Standard", start, start + timedelta(hours=2), 100)]
+
+
+def test_session_across_midnight_is_split():
+    table = RateTable([NIGHT])
+    start = MONDAY + timedelta(hours=22)
+    assert labels(table.segments("PS5", "Single", start, start + timedelta(hours=10), 100)) == [
+        ("Standard", "Mon 22:00", "Tue 00:00", 100),
+        ("Night", "Tue 00:00", "Tue 06:00", 50.0),
+        ("Standard", "Tue 06:00", "Tue 08:00", 100),
+    ]
+
+
+def test_sunday_night_wraps_into_monday():
+    # The later rule wins where they overlap; Sunday 20:00-02:00 runs on past the end of the week
+    table = RateTable([NIGHT, WEEKEND])
+    start = MONDAY + timedelta(days=6, hours=19)
+    assert labels(table.segments("PS4", "Multi", start, start + timedelta(hours=12), 80)) == [
+        ("Standard", "Sun 19:00", "Sun 20:00", 80),
+        ("Weekend", "Sun 20:00", "Mon 02:00", 160),
+        ("Night", "Mon 02:00", "Mon 06:00", 40.0),
+        ("Standard", "Mon 06:00", "Mon 07:00", 80),
+    ]
+
+
+def test_rates_override_the_multiplier_per_console_and_mode():
+    table = RateTable([dict(NIGHT, rates={"PS5:Single": 30})])
+    start = MONDAY + timedelta(hours=1)
+    assert table.segments("PS5", "Single", start, start + timedelta(hours=1), 100)[0][3] == 30
+    assert table.segments("PS5", "Multi", start, start + timedelta(hours=1), 100)[0][3] == 50.0
+
+
+def test_rounding_bills_whole_units():
+    table = RateTable(rounding_minutes=15)
+    start = MONDAY + timedelta(hours=12)
+    (_, _, end, _), = table.segments("PS5", "Single", start, start + timedelta(minutes=16), 100)
+    assert end == start + timedelta(minutes=30)
+    (_, _, end, _), = table.segments("PS5", "Single", start, start + timedelta(minutes=15), 100)
+    assert end == start + timedelta(minutes=15)
+
+
+@pytest.mark.parametrize("rules, rounding, error", [
+    ({"name": "Night"}, 0, "must be a list"),
+    (["Night"], 0, "must be an object"),
+    ([{"start": "00:00"}], 0, "needs a name"),
+    ([dict(NIGHT, multiplier="0.5")], 0, "must be a number"),
+    ([dict(NIGHT, multiplier=True)], 0, "must be a number"),
+    ([dict(NIGHT, multiplier=-1)], 0, "zero or more"),
+    ([dict(NIGHT, rates={"PS5:Single": float("nan")})], 0, "must be a number"),
+    ([dict(NIGHT, rates=[30])], 0, "must be an object"),
+    ([dict(NIGHT, start="25:00")], 0, "Bad time"),
+    ([dict(NIGHT, start=600)], 0, "Bad time"),
+    ([dict(NIGHT, days="Sat")], 0, "must be a list"),
+    ([dict(NIGHT, days=["Caturday"])], 0, "Unknown day"),
+    ([NIGHT], "5", "must be a number"),
+])
+def test_bad_rules_raise_pricing_error(rules, rounding, error):
+    with pytest.raises(PricingError, match=error):
+        RateTable(rules, rounding)
+
+
+def write_rules(path, spec):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(spec if isinstance(spec, str) else json.dumps(spec))
+    # Make the change visible even within the file system's timestamp resolution
+    mtime = os.stat(path).st_mtime_ns + 1000000000
+    os.utime(path, ns=(mtime, mtime))
+
+
+def test_rule_file_reloads_on_change_and_rejects_bad_files(tmp_path):
+    path = str(tmp_path / "pricing_rules.json")
+    rule_file = RuleFile(path, interval=0)
+    assert rule_file.poll() == (False, None)
+    write_rules(path, {"rules": [NIGHT]})
+    changed, table = rule_file.poll()
+    assert changed and table.rules == [NIGHT]
+    assert rule_file.poll() == (False, None)
+    for spec in ("{not json", "[]", {"rules": [{"name": "Night", "days": ["Caturday"]}]}):
+        write_rules(path, spec)
+        with pytest.raises(PricingError):
+            rule_file.poll()
+        # Not retried until the file changes again
+        assert rule_file.poll() == (False, None)
+    os.remove(path)
+    assert rule_file.poll() == (True, None)
+
+
+def test_bad_rule_file_keeps_the_current_rules(tmp_path):
+    app, _ = create_app(data_dir=str(tmp_path))
+    app.pricing_file.interval = 0
+    path = os.path.join(str(tmp_path), "pricing_rules.json")
+    write_rules(path, {"rules": [NIGHT]})
+    app.reload_pricing(None)
+    table = app.billing.rules
+    assert table.rules == [NIGHT]
+    write_rules(path, {"rules": [dict(NIGHT, multiplier="cheap")]})
+    app.reload_pricing(None)
+    assert app.billing.rules is table
+    assert "Pricing rules not loaded" in app.status_label["text"]
+
+
+def test_headless_app_reads_rules_from_its_own_directory(tmp_path, monkeypatch):
+    # A rule file in the working directory belongs to whatever else runs there
+    monkeypatch.chdir(tmp_path)
+    write_rules(str(tmp_path / "pricing_rules.json"), {"rules": [NIGHT]})
+    app, _ = create_app()
+    app.pricing_file.interval = 0
+    app.reload_pricing(None)
+    assert app.billing.rules is None
+    assert os.path.dirname(app.pricing_file.path) == app.temp_dir.name
+
+    (tmp_path / "data").mkdir()
+    app, _ = create_app(data_dir=str(tmp_path / "data"))
+    assert app.pricing_file.path == str(tmp_path / "data" / "pricing_rules.json")
+
+
+def test_session_that_cannot_be_priced_keeps_running(tmp_path):
+    clock = SimulatedClock(MONDAY + timedelta(hours=12))
+    app, messagebox = create_app(data_dir=str(tmp_path), clock=clock)
+    app.console_type.set("PS5")
+    app.update_room_dropdown()
+    room = app.room_var.get()
+    app.player_name.set("Omar")
+    app.contact_number.set("01001234567")
+    app.start_session()
+    assert not app.engine.is_free(room)
+
+    tariffs = app.billing.tariffs
+    app.billing.set_tariffs({key: rate for key, rate in tariffs.items() if key[0] != "PS5"})
+    clock.advance(3600)
+    app.current_room = room
+    app.end_session()
+    assert messagebox.shown[-1][0] == "error" and "No tariff" in messagebox.shown[-1][2]
+    assert not app.engine.is_free(room)
+    assert app.daily_sessions == 0
+
+    app.billing.set_tariffs(tariffs)
+    app.current_room = room
+    app.end_session()
+    assert app.engine.is_free(room)
+    assert app.daily_sessions == 1
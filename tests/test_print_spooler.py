@@ -0,0 +1,82 @@
+import threading
+import time
+
+from print_spooler import BOLD_ON, FakePrinter, PrintSpooler, render_escpos, strip_escpos
+
+
+RECEIPT = "\n" + "=" * 50 + "\nPLAYSTATION RECEIPT\nRoom: PS5-1\nTOTAL COST: 150 EGP\n" + "=" * 50 + "\n"
+
+
+class Root:
+    def after(self, ms, callback=None, *args):
+        pass
+
+
+class BlockedPrinter(FakePrinter):
+    # Holds every send until released, so jobs pile up behind the first one
+    def __init__(self):
+        super().__init__()
+        self.busy = threading.Event()
+        self.release = threading.Event()
+
+    def send(self, data):
+        self.busy.set()
+        self.release.wait(5)
+        super().send(data)
+
+
+def make_spooler(printer, done, errors, **options):
+    return PrintSpooler(Root(), printer, done.append, errors.append, retry_delay=0, **options)
+
+
+def test_render_round_trip():
+    data = render_escpos(RECEIPT)
+    assert BOLD_ON + b"PLAYSTATION RECEIPT" in data
+    assert strip_escpos(data).split("\n")[1:4] == ["PLAYSTATION RECEIPT", "Room: PS5-1", "TOTAL COST: 150 EGP"]
+
+
+def test_receipt_is_retried_until_the_printer_is_back():
+    done, errors = [], []
+    printer = FakePrinter(fail_times=2)
+    spooler = make_spooler(printer, done, errors)
+    assert spooler.submit(RECEIPT)
+    spooler.queue.close()
+    assert printer.jobs == [render_escpos(RECEIPT)]
+    assert done == ["Receipt printed"] and errors == []
+
+
+def test_printer_that_stays_offline_is_reported():
+    done, errors = [], []
+    printer = FakePrinter(fail_times=10)
+    spooler = make_spooler(printer, done, errors, retries=3)
+    spooler.submit(RECEIPT, "Day report")
+    spooler.queue.close()
+    assert printer.jobs == []
+    assert errors == ["Printer failed on day report: Printer is offline"]
+
+
+def test_full_queue_refuses_new_receipts_without_blocking():
+    done, errors = [], []
+    printer = BlockedPrinter()
+    spooler = make_spooler(printer, done, errors, maxsize=2)
+    assert spooler.submit(RECEIPT)
+    printer.busy.wait(5)
+    assert spooler.submit(RECEIPT) and spooler.submit(RECEIPT)
+    assert not spooler.submit(RECEIPT)
+    assert errors == ["The printer queue is full; receipt was not printed"]
+    printer.release.set()
+    spooler.queue.close()
+    assert len(printer.jobs) == 3
+
+
+def test_close_gives_up_on_an_offline_printer_without_waiting():
+    done, errors = [], []
+    printer = FakePrinter(fail_times=100)
+    spooler = PrintSpooler(Root(), printer, done.append, errors.append, maxsize=2, retry_delay=30)
+    for _ in range(3):
+        spooler.submit(RECEIPT)
+    started = time.monotonic()
+    spooler.close()
+    assert time.monotonic() - started < 1
+    assert not spooler.queue.thread.is_alive()
+    assert printer.jobs == []
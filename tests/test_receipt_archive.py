@@ -0,0 +1,94 @@
+import os
+from datetime import date, datetime
+
+import pytest
+
+from headless import create_app
+from receipt_archive import RECORD, ReceiptArchive
+
+
+DAY = datetime(2026, 1, 1, 12)
+
+
+def text(n):
+    return f"{'=' * 50}\nPLAYSTATION RECEIPT\nRoom: PS5-{n}\nPlayer: Omar\nTOTAL COST: {100 + n} EGP\n"
+
+
+def test_receipts_round_trip_through_segments(tmp_path):
+    archive = ReceiptArchive(str(tmp_path), segment_bytes=200)
+    for n in range(1, 11):
+        archive.add(text(n), receipt_id=n, printed_at=DAY)
+    assert archive.get(3) == text(3)  # still pending, answered from memory
+    archive.close()
+
+    archive = ReceiptArchive(str(tmp_path), segment_bytes=200)
+    assert archive.segment > 1
+    assert [archive.get(n) for n in range(1, 11)] == [text(n) for n in range(1, 11)]
+    assert list(archive.iter_day(date(2026, 1, 1))) == [text(n) for n in range(1, 11)]
+    assert archive.get(99) is None
+    archive.close()
+
+
+def test_preset_dictionary_keeps_records_small(tmp_path):
+    archive = ReceiptArchive(str(tmp_path))
+    archive.add(text(1), receipt_id=1, printed_at=DAY)
+    archive.close()
+    size = os.path.getsize(os.path.join(tmp_path, "segment-000001.dat"))
+    assert size - RECORD.size < len(text(1)) / 2
+
+
+def test_reprint_returns_the_latest_print(tmp_path):
+    archive = ReceiptArchive(str(tmp_path))
+    archive.add("first", receipt_id=1, printed_at=DAY)
+    archive.flush()
+    archive.add("second", receipt_id=1, printed_at=DAY)
+    archive.close()
+    assert ReceiptArchive(str(tmp_path)).get(1) == "second"
+
+
+def test_torn_index_entry_is_dropped(tmp_path):
+    archive = ReceiptArchive(str(tmp_path))
+    archive.add(text(1), receipt_id=1, printed_at=DAY)
+    archive.add(text(2), receipt_id=2, printed_at=DAY)
+    archive.close()
+    with open(os.path.join(tmp_path, "index.dat"), "r+b") as f:
+        f.truncate(os.path.getsize(f.name) - 3)
+    archive = ReceiptArchive(str(tmp_path))
+    assert archive.get(1) == text(1) and archive.get(2) is None
+    # Numbering carries on from the last whole entry
+    assert archive.add(text(3), receipt_id=3, printed_at=DAY) == 2
+    archive.close()
+
+
+def test_failed_flush_keeps_the_prints(tmp_path, monkeypatch):
+    archive = ReceiptArchive(str(tmp_path))
+    archive.add(text(1), receipt_id=1, printed_at=DAY)
+    archive.flush()
+    archive.add(text(2), receipt_id=2, printed_at=DAY)
+    with monkeypatch.context() as patch:
+        def disk_full(fd):
+            raise OSError(28, "No space left on device")
+        patch.setattr(os, "fsync", disk_full)
+        with pytest.raises(OSError):
+            archive.flush()
+    assert archive.get(2) == text(2)
+    archive.close()
+    archive = ReceiptArchive(str(tmp_path))
+    assert [archive.get(1), archive.get(2)] == [text(1), text(2)]
+    assert [entry[0] for entry in archive.entries] == [1, 2]
+    archive.close()
+
+
+def test_app_archives_final_receipts_but_not_previews(tmp_path):
+    app, _ = create_app(data_dir=str(tmp_path))
+    receipt = {"room": "PS5-1", "player": "Omar", "contact": "01001234567", "start_time": "2026-01-01 11:00:00",
+               "end_time": "2026-01-01 12:00:00", "duration": "1.00 hours", "console": "PS5", "mode": "Single",
+               "hourly_rate": 100, "gaming_cost": 100.0, "bar_items": {}, "bar_items_cost": 0, "total_cost": 100.0}
+    # A running session's preview has no ledger id
+    app.receipt_info = dict(receipt, end_time="Running")
+    app.print_receipt()
+    app.receipt_info = dict(receipt, id=7)
+    app.print_receipt()
+    app.writer.run_pending()
+    assert [entry[1] for entry in app.archive.entries] == [7]
+    assert "PS5-1" in app.archive.get(7)
@@ -0,0 +1,92 @@
+import sqlite3
+
+import pytest
+
+from receipt_ledger import ReceiptLedger
+
+
+def receipt(room="PS4-1", console="PS4", player="Omar", contact="01001234567", end="2026-01-01 12:00:00",
+            total=100.0, receipt_id=None):
+    return {"id": receipt_id, "room": room, "console": console, "player": player, "contact": contact,
+            "start_time": "2026-01-01 11:00:00", "end_time": end, "duration": "1.00 hours", "mode": "Single",
+            "hourly_rate": total, "gaming_cost": total, "bar_items": {}, "bar_items_cost": 0, "total_cost": total}
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    ledger = ReceiptLedger(str(tmp_path / "receipts.db"), batch_size=3)
+    yield ledger
+    ledger.close()
+
+
+def test_reads_see_buffered_receipts(ledger):
+    first = ledger.add(receipt())
+    second = ledger.add(receipt(room="PS5-1", console="PS5", player="Mona"))
+    assert (first, second) == (1, 2)
+    assert [r["id"] for r in ledger.recent(5)] == [2, 1]
+    assert ledger.get(2)["player"] == "Mona"
+    assert [r["id"] for r in ledger.by_room("PS4-1")] == [1]
+    assert [r["id"] for r in ledger.by_player("Mona")] == [2]
+
+
+def test_ids_continue_after_a_reopen(tmp_path):
+    path = str(tmp_path / "receipts.db")
+    ledger = ReceiptLedger(path)
+    ledger.add(receipt())
+    ledger.add(receipt())
+    ledger.close()
+    ledger = ReceiptLedger(path)
+    assert ledger.add(receipt()) == 3
+    ledger.close()
+
+
+def test_replayed_receipt_is_stored_once(ledger):
+    ledger.add(receipt(receipt_id=7))
+    ledger.flush()
+    ledger.add(receipt(receipt_id=7, total=999.0))
+    assert [(r["id"], r["total_cost"]) for r in ledger.recent(5)] == [(7, 100.0)]
+
+
+def test_between_and_console_totals(ledger):
+    ledger.add(receipt(end="2026-01-01 23:59:59"))
+    ledger.add(receipt(console="PS5", end="2026-01-02 00:00:00", total=150.0))
+    ledger.add(receipt(end="2026-01-02 10:00:00", total=50.0))
+    ledger.add(receipt(console="PS5", end="2026-01-03 00:00:00"))
+    day = ("2026-01-02 00:00:00", "2026-01-03 00:00:00")
+    assert [r["total_cost"] for r in ledger.between(*day)] == [150.0, 50.0]
+    assert ledger.console_totals(*day) == [("PS4", 1, 50.0), ("PS5", 1, 150.0)]
+
+
+def test_failed_flush_keeps_the_receipts(ledger):
+    ledger.add(receipt())
+    real = ledger.conn
+    ledger.conn = sqlite3.connect(":memory:")  # no receipts table, so the insert fails
+    with pytest.raises(sqlite3.OperationalError):
+        ledger.flush()
+    ledger.conn = real
+    ledger.add(receipt(player="Mona"))
+    ledger.flush()
+    assert [r["player"] for r in ledger.recent(5)] == ["Mona", "Omar"]
+
+
+def test_reads_do_not_write_the_buffer(tmp_path):
+    # The GUI thread reads while the background writer owns flushing
+    ledger = ReceiptLedger(str(tmp_path / "receipts.db"), auto_flush=False)
+    ledger.add(receipt(end="2026-01-02 09:00:00"))
+    ledger.add(receipt(contact="0111", player="Mona", end="2026-01-02 10:00:00"))
+    ledger.flush()
+    ledger.add(receipt(console="PS5", end="2026-01-02 11:00:00", total=150.0))
+    ledger.add(receipt(player="Omar Mohamed", end="2026-01-02 12:00:00", total=50.0))
+
+    day = ("2026-01-02 00:00:00", "2026-01-03 00:00:00")
+    assert [r["id"] for r in ledger.recent(3)] == [4, 3, 2]
+    assert [r["id"] for r in ledger.between(*day)] == [1, 2, 3, 4]
+    assert [r["id"] for r in ledger.by_contact("01001234567", limit=2)] == [4, 3]
+    assert ledger.console_totals(*day) == [("PS4", 3, 250.0), ("PS5", 1, 150.0)]
+    assert sorted(ledger.customer_totals()) == [
+        ("01001234567", "Omar Mohamed", 3, 300.0, "2026-01-02 12:00:00", 4),
+        ("0111", "Mona", 1, 100.0, "2026-01-02 10:00:00", 2),
+    ]
+    assert len(ledger.buffer) == 2
+    assert ledger.conn.execute("SELECT COUNT(*) FROM receipts").fetchone()[0] == 2
+    ledger.close()
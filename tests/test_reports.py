@@ -0,0 +1,87 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from receipt_ledger import ReceiptLedger
+from reports import Totals, build_report, merge_partials
+
+
+START = datetime(2026, 1, 1, 10)
+
+
+def receipt(i):
+    start = START + timedelta(hours=i * 5)
+    end = start + timedelta(minutes=30 + i * 7 % 90)
+    bar = {"Cola": i % 3} if i % 3 else {"Chips": 2} if i % 4 == 0 else {}
+    return {
+        "room": f"PS{4 + i % 2}-1", "player": f"Player {i}", "contact": f"010{i:08d}",
+        "start_time": start.strftime("%Y-%m-%d %H:%M:%S"), "end_time": end.strftime("%Y-%m-%d %H:%M:%S"),
+        "duration": "", "console": f"PS{4 + i % 2}", "mode": "Single", "hourly_rate": 100,
+        "gaming_cost": 50.0 + i, "bar_items": bar, "bar_items_cost": 10.0 * (i % 3),
+        "total_cost": 50.0 + i + 10.0 * (i % 3),
+    }
+
+
+@pytest.fixture(scope="module")
+def ledger_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("branch") / "receipts.db")
+    ledger = ReceiptLedger(path, auto_flush=False)
+    for i in range(40):
+        ledger.add(receipt(i))
+    ledger.close()
+    return path
+
+
+def as_dicts(merged):
+    return {key: totals.as_dict() for key, totals in merged.items()}
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 7, 40, 1000])
+def test_chunk_size_does_not_change_the_report(ledger_path, chunk_rows):
+    sources = [("downtown", "ledger", ledger_path)]
+    start, end = date(2026, 1, 1), date(2026, 2, 1)
+    expected = as_dicts(build_report(sources, start, end, workers=1, chunk_rows=40))
+    assert as_dicts(build_report(sources, start, end, workers=1, chunk_rows=chunk_rows)) == expected
+
+
+def test_totals_match_the_receipts(ledger_path):
+    merged = build_report([("downtown", "ledger", ledger_path)], date(2026, 1, 1), date(2026, 1, 3),
+                          workers=1, chunk_rows=7)
+    receipts = [receipt(i) for i in range(40) if receipt(i)["end_time"] < "2026-01-03"]
+    assert sorted(merged) == [("downtown", "2026-01-01"), ("downtown", "2026-01-02")]
+    assert sum(t.sessions for t in merged.values()) == len(receipts)
+    assert sum(t.revenue for t in merged.values()) == pytest.approx(sum(r["total_cost"] for r in receipts))
+    cola = sum(r["bar_items"].get("Cola", 0) for r in receipts)
+    assert sum(t.bar_items.get("Cola", 0) for t in merged.values()) == cola
+
+
+def test_merge_adds_every_figure():
+    a = Totals()
+    a.add("PS5", "2026-01-01 10:00:00", "2026-01-01 11:30:00", 150, 20, 170, {"Cola": 2})
+    b = Totals()
+    b.add("PS5", "2026-01-01 10:15:00", "2026-01-01 10:45:00", 50, 0, 50, {"Chips": 2, "Cola": 1})
+    b.add("PS4", None, "2026-01-01 12:00:00", 0, 5, 5, None)
+    merged = Totals().merge(a).merge(b).as_dict()
+    assert merged["sessions"] == 3
+    assert merged["hours"] == 2.0
+    assert merged["revenue"] == 225
+    assert merged["consoles"] == {"PS4": {"sessions": 1, "hours": 0.0, "revenue": 5},
+                                  "PS5": {"sessions": 2, "hours": 2.0, "revenue": 220}}
+    assert merged["bar_items"] == {"Chips": 2, "Cola": 3}
+    assert merged["sessions_by_hour"][10] == 2 and sum(merged["sessions_by_hour"]) == 2
+
+
+def test_merge_partials_combines_the_same_day():
+    def partial(console, day):
+        totals = Totals()
+        totals.add(console, f"{day} 10:00:00", f"{day} 11:00:00", 100, 0, 100, {})
+        return totals
+
+    merged = merge_partials([
+        {("a", "2026-01-01"): partial("PS4", "2026-01-01")},
+        {("a", "2026-01-01"): partial("PS5", "2026-01-01"), ("b", "2026-01-01"): partial("PS5", "2026-01-01")},
+        {},
+    ])
+    assert sorted(merged) == [("a", "2026-01-01"), ("b", "2026-01-01")]
+    assert merged[("a", "2026-01-01")].sessions == 2
+    assert set(merged[("a", "2026-01-01")].consoles) == {"PS4", "PS5"}
@@ -0,0 +1,106 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from reservations import ReservationBook, ReservationError
+
+
+NOW = datetime(2026, 1, 1, 12)
+HOUR = timedelta(hours=1)
+
+
+@pytest.fixture
+def book(tmp_path):
+    book = ReservationBook(str(tmp_path / "reservations.db"))
+    yield book
+    book.close()
+
+
+def test_overlaps_are_rejected_and_touching_slots_allowed(book):
+    book.add("PS5-1", "Omar", "0100", NOW + HOUR, NOW + 3 * HOUR)
+    for start, end in ((NOW, NOW + 2 * HOUR), (NOW + 2 * HOUR, NOW + 4 * HOUR),
+                       (NOW + 90 * timedelta(minutes=1), NOW + 2 * HOUR), (NOW, NOW + 4 * HOUR)):
+        with pytest.raises(ReservationError, match="already reserved"):
+            book.add("PS5-1", "Mona", "0111", start, end)
+    book.add("PS5-1", "Mona", "0111", NOW, NOW + HOUR)
+    book.add("PS5-1", "Mona", "0111", NOW + 3 * HOUR, NOW + 4 * HOUR)
+    book.add("PS5-2", "Mona", "0111", NOW + HOUR, NOW + 3 * HOUR)
+    assert len(book) == 4
+
+
+def test_rejects_empty_past_and_busy_slots(book):
+    with pytest.raises(ReservationError, match="end after it starts"):
+        book.add("PS5-1", "Omar", "0100", NOW, NOW)
+    with pytest.raises(ReservationError, match="in the past"):
+        book.add("PS5-1", "Omar", "0100", NOW - HOUR, NOW + HOUR, now=NOW)
+    with pytest.raises(ReservationError, match="no end time"):
+        book.add("PS5-1", "Omar", "0100", NOW + 5 * HOUR, NOW + 6 * HOUR, now=NOW, busy={"PS5-1": None})
+    with pytest.raises(ReservationError, match="in use until"):
+        book.add("PS5-1", "Omar", "0100", NOW + HOUR, NOW + 2 * HOUR, now=NOW, busy={"PS5-1": NOW + 2 * HOUR})
+    book.add("PS5-1", "Omar", "0100", NOW + 2 * HOUR, NOW + 3 * HOUR, now=NOW, busy={"PS5-1": NOW + 2 * HOUR})
+    assert len(book) == 1
+
+
+def test_holder_and_no_shows(book):
+    reservation = book.add("PS5-1", "Omar", "01001234567", NOW + HOUR, NOW + 2 * HOUR)
+    assert book.holder("PS5-1", NOW, HOUR) is None
+    assert book.holder("PS5-1", NOW + timedelta(minutes=1), HOUR) is reservation
+    assert book.held_rooms(NOW + HOUR, HOUR) == {"PS5-1"}
+    # Past the grace period the customer is a no-show and the room is free again
+    assert book.holder("PS5-1", NOW + HOUR + book.grace, HOUR) is None
+    assert book.due("+20 100 123 4567", NOW + HOUR, HOUR) is reservation
+
+
+def test_first_gap_skips_back_to_back_bookings(book):
+    book.add("PS5-1", "A", "1", NOW, NOW + HOUR)
+    book.add("PS5-1", "B", "2", NOW + HOUR, NOW + 2 * HOUR)
+    book.add("PS5-1", "C", "3", NOW + 3 * HOUR, NOW + 4 * HOUR)
+    assert book.first_gap("PS5-1", HOUR, NOW) == NOW + 2 * HOUR
+    assert book.first_gap("PS5-1", 2 * HOUR, NOW) == NOW + 4 * HOUR
+    assert book.first_gap("PS5-1", HOUR, NOW - HOUR) == NOW - HOUR
+    assert book.first_gap("PS5-2", HOUR, NOW) == NOW
+
+
+def test_next_free_slot_picks_the_earliest_room(book):
+    book.add("PS5-1", "A", "1", NOW, NOW + 2 * HOUR)
+    book.add("PS5-2", "B", "2", NOW, NOW + HOUR)
+    assert book.next_free_slot(["PS5-1", "PS5-2"], HOUR, NOW) == (NOW + HOUR, "PS5-2")
+    assert book.next_free_slot(["PS5-1", "PS5-2", "PS5-3"], HOUR, NOW) == (NOW, "PS5-3")
+
+
+def test_next_free_slot_accounts_for_running_sessions(book):
+    book.add("PS5-1", "A", "1", NOW, NOW + 2 * HOUR)
+    rooms = ["PS5-1", "PS5-2", "PS5-3"]
+    assert book.next_free_slot(rooms, HOUR, NOW) == (NOW, "PS5-2")
+    busy = {"PS5-2": None, "PS5-3": NOW + 3 * HOUR}
+    assert book.next_free_slot(rooms, HOUR, NOW, busy) == (NOW + 2 * HOUR, "PS5-1")
+    assert book.next_free_slot(["PS5-2"], HOUR, NOW, busy) is None
+
+
+def test_changes_survive_a_reopen(tmp_path):
+    path = str(tmp_path / "reservations.db")
+    book = ReservationBook(path)
+    kept = book.add("PS5-1", "Omar", "0100", NOW, NOW + HOUR)
+    dropped = book.add("PS5-2", "Mona", "0111", NOW, NOW + HOUR)
+    book.flush()
+    book.cancel(dropped.id)
+    book.close()
+    reopened = ReservationBook(path)
+    assert list(reopened.by_id) == [kept.id]
+    assert reopened.conflict("PS5-1", NOW, NOW + HOUR).player == "Omar"
+    assert reopened.conflict("PS5-2", NOW, NOW + HOUR) is None
+    reopened.close()
+
+
+def test_failed_flush_keeps_the_changes(tmp_path):
+    path = str(tmp_path / "reservations.db")
+    book = ReservationBook(path)
+    book.add("PS5-1", "Omar", "0100", NOW, NOW + HOUR)
+    real = book.conn
+    book.conn = sqlite3.connect(":memory:")  # no reservations table, so the write fails
+    with pytest.raises(sqlite3.OperationalError):
+        book.flush()
+    book.conn = real
+    book.close()
+    assert [r.player for r in ReservationBook(path).by_id.values()] == ["Omar"]
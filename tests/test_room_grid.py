@@ -0,0 +1,40 @@
+import room_grid
+from headless import FakeWidget
+from room_grid import VirtualRoomGrid
+from session_engine import SessionEngine
+
+
+def widget(parent=None, **options):
+    widget = FakeWidget()
+    widget.config(**options)
+    return widget
+
+
+def make_grid(monkeypatch):
+    # Unmapped fake widgets: the grid binds tiles for its first rows, as before the window is drawn
+    monkeypatch.setattr(room_grid.tk, "Frame", widget)
+    monkeypatch.setattr(room_grid.tk, "Label", widget)
+    engine = SessionEngine()
+    engine.add_room("PS4-1", "PS4")
+    engine.add_room("PS5-1", "PS5")
+    return engine, VirtualRoomGrid(FakeWidget(), engine, FakeWidget(), columns=2, tile_height=100)
+
+
+def test_rooms_reported_later_are_added_to_the_grid(monkeypatch):
+    engine, grid = make_grid(monkeypatch)
+    assert grid.container["height"] == 100
+    engine.apply_state("PS5-2", "PS5", 1, "Omar", "0100")
+    engine.apply_state("PS4-2", "PS4", 0)
+    assert grid.order == ["PS4-1", "PS5-1", "PS5-2", "PS4-2"]
+    assert grid.container["height"] == 200
+
+    grid.refresh()
+    assert set(grid.bound) == {"PS4-1", "PS5-1", "PS5-2", "PS4-2"}
+    assert grid.bound["PS5-2"]["status"]["text"] == "OCCUPIED"
+
+
+def test_changes_to_known_rooms_keep_the_order(monkeypatch):
+    engine, grid = make_grid(monkeypatch)
+    order = grid.order
+    engine.apply_state("PS5-1", "PS5", 1, "Mona", "0111")
+    assert grid.order is order and grid.dirty == {"PS5-1"}
@@ -0,0 +1,54 @@
+import random
+from datetime import datetime
+
+import pytest
+
+from session_engine import SessionEngine, SessionError
+
+
+NOW = datetime(2026, 1, 1, 12)
+
+
+def make_engine(count=20):
+    engine = SessionEngine()
+    for i in range(count):
+        engine.add_room(f"PS{4 + i % 2}-{i // 2 + 1}", f"PS{4 + i % 2}")
+    return engine
+
+
+def test_free_rooms_stay_in_display_order():
+    engine = make_engine()
+    rng = random.Random(3)
+    for _ in range(500):
+        name = rng.choice(list(engine.rooms))
+        if engine.is_free(name):
+            engine.start_session(name, "Omar", "0100", NOW)
+        else:
+            engine.end_session(name)
+        for console in ("PS4", "PS5"):
+            free = engine.available_rooms(console)
+            assert free == sorted(free, key=lambda room: engine.rooms[room].index)
+            assert engine.first_available(console) == (free[0] if free else None)
+            assert sorted(free + engine.occupied_rooms(console)) == sorted(
+                name for name, room in engine.rooms.items() if room.type == console)
+
+
+def test_first_available_skips_held_rooms():
+    engine = make_engine(6)
+    assert engine.first_available("PS5", skip={"PS5-1"}) == "PS5-2"
+    assert engine.first_available("PS5", skip={"PS5-1", "PS5-2", "PS5-3"}) is None
+
+
+def test_session_errors():
+    engine = make_engine(2)
+    with pytest.raises(SessionError, match="Unknown room"):
+        engine.start_session("PS9-1", "Omar", "0100", NOW)
+    engine.start_session("PS4-1", "Omar", "0100", NOW)
+    with pytest.raises(SessionError, match="already occupied"):
+        engine.start_session("PS4-1", "Mona", "0111", NOW)
+    with pytest.raises(SessionError, match="No active session"):
+        engine.end_session("PS5-1")
+    with pytest.raises(SessionError, match="already exists"):
+        engine.add_room("PS4-1", "PS4")
+    assert engine.end_session("PS4-1")["player"] == "Omar"
+    assert not engine.has_active_sessions()
@@ -0,0 +1,105 @@
+import json
+import os
+
+import pytest
+
+from session_journal import SessionJournal
+
+
+def reopen(directory):
+    journal = SessionJournal(directory, commit_interval=0)
+    state, records = journal.open()
+    return journal, state, records
+
+
+def test_replays_records_after_restart(tmp_path):
+    journal, state, records = reopen(tmp_path)
+    assert state is None and records == []
+    journal.append("start", room="PS4-1", player="Omar")
+    journal.append("bar", room="PS4-1", item="Tea")
+    journal.close()
+
+    journal, state, records = reopen(tmp_path)
+    journal.close()
+    assert [(r["op"], r["seq"]) for r in records] == [("start", 1), ("bar", 2)]
+    assert records[1]["item"] == "Tea"
+
+
+def test_snapshot_keeps_only_the_tail(tmp_path):
+    journal, _, _ = reopen(tmp_path)
+    for _ in range(3):
+        journal.append("bar", room="PS4-1", item="Tea")
+    journal.snapshot({"sessions": [], "daily_revenue": 150, "daily_sessions": 1})
+    journal.append("bar", room="PS4-2", item="Water")
+    journal.close()
+
+    assert not os.path.exists(os.path.join(tmp_path, "journal.log.tmp"))
+    journal, state, records = reopen(tmp_path)
+    journal.close()
+    assert state["daily_revenue"] == 150
+    assert [(r["room"], r["seq"]) for r in records] == [("PS4-2", 4)]
+
+
+def test_sequence_continues_after_restart(tmp_path):
+    journal, _, _ = reopen(tmp_path)
+    journal.append("start", room="PS4-1")
+    journal.close()
+    journal, _, _ = reopen(tmp_path)
+    assert journal.append("end", room="PS4-1") == 2
+    journal.close()
+
+
+def test_torn_last_line_is_dropped(tmp_path):
+    journal, _, _ = reopen(tmp_path)
+    journal.append("start", room="PS4-1")
+    journal.append("start", room="PS4-2")
+    journal.close()
+    with open(os.path.join(tmp_path, "journal.log"), "a", encoding="utf-8") as f:
+        f.write('{"op":"start","room":"PS4-3","se')
+
+    journal, _, records = reopen(tmp_path)
+    journal.close()
+    assert [r["room"] for r in records] == ["PS4-1", "PS4-2"]
+
+
+def test_old_journal_left_by_a_crash_during_compaction(tmp_path):
+    # The snapshot was replaced but the short journal never swapped in:
+    # records already in the snapshot are skipped
+    with open(os.path.join(tmp_path, "snapshot.json"), "w", encoding="utf-8") as f:
+        json.dump({"seq": 2, "time": 0, "state": {"sessions": []}}, f)
+    with open(os.path.join(tmp_path, "journal.log"), "w", encoding="utf-8") as f:
+        for seq in (1, 2, 3):
+            f.write(json.dumps({"op": "bar", "room": "PS4-1", "seq": seq}) + "\n")
+
+    journal, state, records = reopen(tmp_path)
+    journal.close()
+    assert state == {"sessions": []}
+    assert [r["seq"] for r in records] == [3]
+
+
+def test_crash_while_swapping_in_the_compacted_journal(tmp_path, monkeypatch):
+    journal, _, _ = reopen(tmp_path)
+    real_replace = os.replace
+
+    def power_cut(src, dst):
+        if dst.endswith("journal.log"):
+            raise OSError("power cut")
+        real_replace(src, dst)
+
+    # Held so the commit thread stays out of the way while the failure is staged
+    with journal.io_lock:
+        for room in ("PS4-1", "PS4-2", "PS4-3"):
+            journal.append("start", room=room)
+        journal.snapshot({"sessions": ["PS4-1", "PS4-2", "PS4-3"]})
+        journal.append("end", room="PS4-1")
+        monkeypatch.setattr(os, "replace", power_cut)
+        with pytest.raises(OSError):
+            journal._commit()
+        monkeypatch.undo()
+    journal.close()
+
+    # The old journal is intact; what the snapshot already holds is skipped
+    journal, state, records = reopen(tmp_path)
+    journal.close()
+    assert state == {"sessions": ["PS4-1", "PS4-2", "PS4-3"]}
+    assert [(r["op"], r["seq"]) for r in records] == [("end", 4)]
@@ -0,0 +1,106 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from session_engine import SessionEngine
+from session_server import SessionClient, SessionServer, SessionError
+
+
+def make_server():
+    engine = SessionEngine()
+    engine.add_room("PS4-1", "PS4")
+    engine.add_room("PS5-1", "PS5")
+    return SessionServer(engine)
+
+
+def test_start_bar_and_end():
+    server = make_server()
+    started = server.dispatch({"id": 1, "op": "start", "room": "PS5-1", "player": "Omar", "contact": "0100",
+                               "start_time": "2026-01-01T12:00:00", "mode": "Multi"})
+    assert started["ok"] and started["room"]["status"] == 1 and started["room"]["mode"] == "Multi"
+    bar = server.dispatch({"id": 2, "op": "bar", "room": "PS5-1", "item": "Cola", "qty": 2})
+    assert bar["room"]["bar_items"] == {"Cola": 2}
+    ended = server.dispatch({"id": 3, "op": "end", "room": "PS5-1"})
+    assert ended["ok"] and ended["session"]["start_time"] == "2026-01-01T12:00:00"
+    assert ended["room"]["status"] == 0
+    # Every change bumps the room's version
+    assert ended["room"]["version"] > bar["room"]["version"] > started["room"]["version"]
+
+
+@pytest.mark.parametrize("request_, error", [
+    ({"id": 1, "op": "fly"}, "Unknown operation fly"),
+    ({"id": 1, "op": "end", "room": "PS4-1"}, "No active session in PS4-1"),
+    ({"id": 1, "op": "start", "room": "PS4-1"}, "Bad request"),
+    ({"id": 1, "op": "start", "room": "PS4-1", "player": "", "contact": "", "start_time": "noon"}, "Bad request"),
+    ({"id": 1, "op": "bar", "room": ["PS4-1"], "item": "Cola"}, "Bad request"),
+])
+def test_bad_requests_are_answered_not_raised(request_, error):
+    response = make_server().dispatch(request_)
+    assert response["id"] == 1 and not response["ok"]
+    assert response["error"].startswith(error)
+
+
+def test_non_object_lines_get_an_error_and_keep_the_connection():
+    async def run():
+        server = make_server()
+        listener = await server.start(port=0)
+        port = listener.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        answers = []
+        for line in (b"not json\n", b"[1, 2]\n", b"42\n", b'{"id": 9, "op": "ping"}\n'):
+            writer.write(line)
+            await writer.drain()
+            answers.append(json.loads(await asyncio.wait_for(reader.readline(), 5)))
+        writer.close()
+        listener.close()
+        await listener.wait_closed()
+        return answers
+
+    answers = asyncio.run(run())
+    assert answers[:3] == [{"ok": False, "error": "Malformed request"}] * 3
+    assert answers[3] == {"id": 9, "ok": True}
+
+
+@pytest.fixture
+def server_port():
+    server = make_server()
+    loop = asyncio.new_event_loop()
+    listener = loop.run_until_complete(server.start(port=0))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield listener.sockets[0].getsockname()[1]
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    listener.close()
+    loop.run_until_complete(listener.wait_closed())
+    loop.close()
+
+
+def test_client_raises_server_errors(server_port):
+    client = SessionClient("127.0.0.1", server_port)
+    try:
+        assert client.request("ping")["ok"]
+        with pytest.raises(SessionError, match="Unknown room"):
+            client.request("end", room="PS9-9")
+    finally:
+        client.close()
+
+
+class BrokenPipe:
+    def sendall(self, data):
+        raise BrokenPipeError(32, "Broken pipe")
+
+
+def test_failed_send_is_a_lost_connection(server_port):
+    client = SessionClient("127.0.0.1", server_port)
+    sock = client.sock
+    try:
+        client.sock = BrokenPipe()
+        with pytest.raises(SessionError, match="Lost connection"):
+            client.request("ping")
+        assert not client.connected and client.waiting == {}
+    finally:
+        client.sock = sock
+        client.close()
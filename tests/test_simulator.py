@@ -0,0 +1,39 @@
+from datetime import datetime
+
+import clock
+from headless import create_app, room_layout
+from simulator import VenueSimulator
+
+
+def run(monkeypatch=None):
+    simulator = VenueSimulator(rooms=8, days=2, seed=5, arrivals_per_room_hour=0.5)
+    if monkeypatch is not None:
+        # The same traffic through the default SystemClock, with datetime.now()
+        # reading the simulated time instead of the real one
+        simulated = simulator.clock
+
+        class Now(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return simulated.now()
+
+        monkeypatch.setattr(clock, "datetime", Now)
+        simulator.app, _ = create_app(rooms=room_layout(8))
+        assert isinstance(simulator.app.clock, clock.SystemClock)
+    result = simulator.run()
+    receipts = simulator.app.ledger.between("2000-01-01 00:00:00", "2100-01-01 00:00:00")
+    return result, receipts
+
+
+def test_simulated_run_matches_the_wall_clock_path(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    simulated, simulated_receipts = run()
+    wall, wall_receipts = run(monkeypatch)
+
+    assert simulated["sessions"] > 20
+    assert simulated_receipts == wall_receipts
+    for key in ("events", "days", "sessions", "revenue", "lost_customers", "revenue_by_console"):
+        assert simulated[key] == wall[key]
+    # The daily totals the app kept add up to what its ledger holds
+    assert simulated["sessions"] == len(simulated_receipts)
+    assert simulated["revenue"] == round(sum(r["total_cost"] for r in simulated_receipts), 2)
@@ -0,0 +1,78 @@
+from tick_scheduler import TickScheduler
+
+
+class Root:
+    def __init__(self, state="normal"):
+        self.window_state = state
+        self.scheduled = []
+
+    def after(self, ms, callback=None, *args):
+        self.scheduled.append((ms, callback))
+        return f"after#{len(self.scheduled)}"
+
+    def after_cancel(self, after_id):
+        self.scheduled.pop(int(after_id.split("#")[1]) - 1)
+
+    def state(self):
+        return self.window_state
+
+
+def test_jobs_share_one_now_per_tick():
+    root = Root()
+    scheduler = TickScheduler(root)
+    seen = []
+    scheduler.add(seen.append)
+    scheduler.add(seen.append)
+    scheduler.start()
+    assert len(seen) == 2 and seen[0] is seen[1]
+    # start() while running does not add a second chain of ticks
+    scheduler.start()
+    assert len(root.scheduled) == 1
+    scheduler.stop()
+    assert root.scheduled == []
+
+
+def test_failing_job_does_not_stop_the_others_or_the_tick():
+    root = Root()
+    root.reported = []
+    root.report_callback_exception = lambda exc, value, tb: root.reported.append(str(value))
+    scheduler = TickScheduler(root)
+    ran = []
+
+    def broken(now):
+        raise RuntimeError("boom")
+
+    scheduler.add(broken)
+    scheduler.add(ran.append)
+    scheduler.start()
+    assert len(ran) == 1 and root.reported == ["boom"]
+    # The next tick is still scheduled and runs the jobs again
+    root.scheduled[-1][1]()
+    assert len(ran) == 2 and root.reported == ["boom", "boom"]
+
+
+def test_ticks_slow_down_while_hidden():
+    root = Root("iconic")
+    scheduler = TickScheduler(root, interval_ms=1000, hidden_interval_ms=5000)
+    scheduler.start()
+    assert scheduler.hidden
+    assert root.scheduled[-1][0] <= 5000
+    root.window_state = "normal"
+    root.scheduled[-1][1]()
+    assert not scheduler.hidden
+    assert root.scheduled[-1][0] <= 1000
+
+
+def test_set_text_skips_unchanged_text():
+    scheduler = TickScheduler(Root())
+    calls = []
+
+    class Label:
+        def config(self, **options):
+            calls.append(options["text"])
+
+    label = Label()
+    scheduler.set_text(label, "12:00")
+    scheduler.set_text(label, "12:00")
+    scheduler.set_text(label, "12:01")
+    assert calls == ["12:00", "12:01"]
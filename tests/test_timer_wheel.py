@@ -0,0 +1,116 @@
+import random
+from datetime import datetime, timedelta
+
+from clock import SimulatedClock
+from headless import create_app
+from timer_wheel import TimerWheel
+
+
+START = datetime(2026, 1, 1, 9, 30, 15)
+
+
+def test_fires_at_the_deadline_and_not_before():
+    wheel = TimerWheel(START)
+    fired = []
+    wheel.schedule(START + timedelta(seconds=90), fired.append, "a")
+    wheel.advance(START + timedelta(seconds=89))
+    assert fired == []
+    wheel.advance(START + timedelta(seconds=90))
+    assert fired == ["a"]
+    assert len(wheel) == 0
+
+
+def test_past_deadline_fires_on_next_advance():
+    wheel = TimerWheel(START)
+    fired = []
+    wheel.schedule(START - timedelta(hours=1), fired.append, "late")
+    wheel.advance(START + timedelta(seconds=1))
+    assert fired == ["late"]
+
+
+def test_cancelled_timer_never_fires():
+    wheel = TimerWheel(START)
+    fired = []
+    timer = wheel.schedule(START + timedelta(minutes=5), fired.append, "x")
+    wheel.cancel(timer)
+    assert len(wheel) == 0
+    wheel.advance(START + timedelta(hours=1))
+    assert fired == []
+
+
+def test_long_jump_fires_everything_in_deadline_order():
+    # Covers every level: seconds, minutes, hours and the overflow past a day
+    wheel = TimerWheel(START)
+    fired = []
+    rng = random.Random(7)
+    offsets = sorted({rng.randrange(1, 3 * 86400) for _ in range(300)})
+    for offset in rng.sample(offsets, len(offsets)):
+        wheel.schedule(START + timedelta(seconds=offset), fired.append, offset)
+    wheel.advance(START + timedelta(days=3))
+    assert fired == offsets
+
+
+def test_stepwise_advance_matches_deadlines():
+    wheel = TimerWheel(START)
+    fired = []
+    deadlines = [START + timedelta(seconds=s) for s in (5, 61, 3599, 3601, 86400 + 7)]
+    for when in deadlines:
+        wheel.schedule(when, lambda when=when: fired.append((when, now[0])))
+    now = [START]
+    while now[0] < START + timedelta(days=1, minutes=1):
+        now[0] += timedelta(seconds=1)
+        wheel.advance(now[0])
+    assert [(when, at) for when, at in fired] == [(when, when) for when in deadlines]
+
+
+def history_end(app, day):
+    app.writer.run_pending()
+    data = app.history.read_day(day, "sessions")
+    try:
+        return [datetime.fromtimestamp(ts) for ts in data["end_ts"]]
+    finally:
+        data.close()
+
+
+def test_late_expiry_bills_the_prepaid_block(tmp_path):
+    clock = SimulatedClock(START)
+    app, _ = create_app(data_dir=str(tmp_path), clock=clock)
+    app.console_type.set("PS5")
+    app.update_room_dropdown()
+    room = app.room_var.get()
+    app.player_name.set("Omar")
+    app.contact_number.set("01001234567")
+    app.prepaid.set("1 hour")
+    app.start_session()
+
+    # The tick that fires the expiry runs five seconds after the block ran out
+    clock.advance(3605)
+    app.timers.advance(clock.now())
+    assert app.engine.is_free(room)
+    receipt, = app.ledger.recent(1)
+    assert receipt["total_cost"] == 150
+    assert receipt["end_time"] == "2026-01-01 10:30:15"
+    assert history_end(app, "2026-01-01") == [START + timedelta(hours=1)]
+    summary = app.counters.summary(clock.now())
+    assert summary["revenue"] == 150
+    assert summary["consoles"]["PS5"]["hours"] == 1
+
+
+def test_block_that_ran_out_while_closed_is_billed_once_restarted(tmp_path):
+    started = datetime(2026, 3, 2, 19)
+    clock = SimulatedClock(datetime(2026, 3, 3, 9, 0, 1))
+    app, _ = create_app(data_dir=str(tmp_path), clock=clock)
+    app.restore_state(None, [{"op": "start", "seq": 1, "room": "PS5-1", "player": "Mona", "contact": "0111",
+                              "start_time": started.isoformat(), "mode": "Single",
+                              "paid_until": (started + timedelta(hours=2)).isoformat()}])
+    assert not app.engine.is_free("PS5-1")
+
+    # The first tick after startup
+    clock.advance(1)
+    app.timers.advance(clock.now())
+    assert app.engine.is_free("PS5-1")
+    receipt, = app.ledger.recent(1)
+    assert (receipt["duration"], receipt["total_cost"]) == ("2.00 hours", 300)
+    assert receipt["end_time"] == "2026-03-02 21:00:00"
+    assert history_end(app, "2026-03-02") == [started + timedelta(hours=2)]
+    assert app.daily_revenue == 300
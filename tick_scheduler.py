@@ -0,0 +1,62 @@
+import sys
+import time
+from datetime import datetime
+
+
+class TickScheduler:
+    # One root.after callback per tick runs every registered time-driven job
+    # (clock, live tile costs, ...). Ticks line up with wall-clock seconds, and
+    # while the window is minimized or withdrawn the scheduler slows down.
+    def __init__(self, root, interval_ms=1000, hidden_interval_ms=5000, now=datetime.now):
+        self.root = root
+        self.now = now
+        self.interval_ms = interval_ms
+        self.hidden_interval_ms = hidden_interval_ms
+        self.jobs = []
+        self.texts = {}
+        self.after_id = None
+        self.hidden = False
+        self.due = None
+        self.lag = 0.0  # seconds the last tick fired after it was due
+
+    def add(self, job):
+        # job(now) where now is a datetime shared by every job in the tick
+        self.jobs.append(job)
+
+    def remove(self, job):
+        self.jobs.remove(job)
+
+    def start(self):
+        if self.after_id is None:
+            self._tick()
+
+    def stop(self):
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+            self.after_id = None
+
+    def set_text(self, widget, text):
+        # Skip the Tk round trip when the label already shows this text
+        key = str(widget)
+        if self.texts.get(key) != text:
+            widget.config(text=text)
+            self.texts[key] = text
+
+    def _tick(self):
+        try:
+            if self.due is not None:
+                self.lag = max(0.0, time.time() - self.due)
+            now = self.now()
+            self.hidden = self.root.state() in ("iconic", "withdrawn")
+            for job in list(self.jobs):
+                try:
+                    job(now)
+                except Exception:
+                    # Reported the way Tk reports a failing callback; the other jobs still run
+                    self.root.report_callback_exception(*sys.exc_info())
+        finally:
+            interval = self.hidden_interval_ms if self.hidden else self.interval_ms
+            # Aim for the next interval boundary so the clock does not drift
+            delay = max(interval - int(time.time() * 1000) % interval, 1)
+            self.due = time.time() + delay / 1000
+            self.after_id = self.root.after(delay, self._tick)
@@ -0,0 +1,118 @@
+import math
+from datetime import datetime
+
+
+EPOCH = datetime(2000, 1, 1)
+
+
+class Timer:
+    __slots__ = ("deadline", "callback", "args", "bucket", "level")
+
+    def __init__(self, deadline, callback, args):
+        self.deadline = deadline  # whole seconds since EPOCH
+        self.callback = callback  # None once cancelled
+        self.args = args
+        self.bucket = None
+        self.level = None  # wheel level holding it, or None for the overflow list
+
+
+class TimerWheel:
+    # Hierarchical timing wheel with one-second resolution: 60 second slots,
+    # 60 minute slots and 24 hour slots, plus an overflow list for anything
+    # further out than a day. Scheduling and cancelling are O(1); a tick only
+    # looks at the one slot that is due, and timers move down a level when
+    # their minute or hour comes round. Stretches of ticks with nothing
+    # scheduled at the lower levels are skipped, so a long jump of the clock
+    # does not cost one step per second.
+    SIZES = (60, 60, 24)
+    SPANS = (1, 60, 3600, 86400)
+
+    def __init__(self, now):
+        self.current = self._tick_of(now, math.floor)
+        self.levels = [[{} for _ in range(size)] for size in self.SIZES]
+        self.counts = [0] * len(self.SIZES)
+        self.overflow = {}
+
+    def __len__(self):
+        return sum(self.counts) + len(self.overflow)
+
+    def _tick_of(self, when, rounding=math.ceil):
+        return rounding((when - EPOCH).total_seconds())
+
+    def schedule(self, when, callback, *args):
+        # callback(*args) runs on the first advance() at or after `when`;
+        # a time already past fires on the next one
+        timer = Timer(self._tick_of(when), callback, args)
+        self._place(timer, self.current + 1)
+        return timer
+
+    def cancel(self, timer):
+        if timer.bucket is not None:
+            del timer.bucket[timer]
+            if timer.level is not None:
+                self.counts[timer.level] -= 1
+            timer.bucket = None
+        timer.callback = None
+
+    def _place(self, timer, earliest):
+        deadline = max(timer.deadline, earliest)
+        delta = deadline - self.current
+        for level, size in enumerate(self.SIZES):
+            span = self.SPANS[level]
+            if delta < span * size:
+                bucket = self.levels[level][deadline // span % size]
+                self.counts[level] += 1
+                break
+        else:
+            bucket = self.overflow
+            level = None
+        bucket[timer] = None
+        timer.bucket = bucket
+        timer.level = level
+
+    def _take(self, bucket, level):
+        timers = list(bucket)
+        bucket.clear()
+        if level is not None:
+            self.counts[level] -= len(timers)
+        for timer in timers:
+            timer.bucket = None
+        return timers
+
+    def advance(self, now):
+        # Runs every timer due by `now`; called from the tick scheduler
+        target = self._tick_of(now, math.floor)
+        while self.current < target:
+            if not len(self):
+                self.current = target
+                break
+            # With the lower levels empty nothing can happen before the next
+            # boundary of the lowest level that holds timers
+            level = next((level for level, count in enumerate(self.counts) if count), len(self.SIZES))
+            if level:
+                boundary = (self.current // self.SPANS[level] + 1) * self.SPANS[level]
+                if boundary > target:
+                    self.current = target
+                    break
+                self.current = boundary - 1
+            self.current += 1
+            self._step()
+
+    def _step(self):
+        now = self.current
+        # Cascade coarser levels first so timers due this very second reach slot 0 in time
+        if now % self.SPANS[3] == 0 and self.overflow:
+            for timer in self._take(self.overflow, None):
+                self._place(timer, now)
+        for level in (2, 1):
+            span = self.SPANS[level]
+            if now % span == 0 and self.counts[level]:
+                for timer in self._take(self.levels[level][now // span % self.SIZES[level]], level):
+                    self._place(timer, now)
+        for timer in self._take(self.levels[0][now % self.SIZES[0]], 0):
+            if timer.callback is None:
+                continue
+            if timer.deadline <= now:
+                timer.callback(*timer.args)
+            else:
+                self._place(timer, now + 1)